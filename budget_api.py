@@ -0,0 +1,255 @@
+"""
+本地 JSON 接口：读取一次工作簿，把每个公司看板上的指标预先序列化为 JSON，供 BI、月报生成等内部工具直接调用
+
+用法：
+    python budget_api.py 2026预算小结.xlsx --port 8502
+
+接口（均为 GET，也支持 HEAD）：
+    /api/companies              公司列表：名称、数据指纹和明细地址
+    /api/companies/<公司简称>    单个公司的指标（公司简称按 URL 编码）
+    /api/summaries              全部公司的指标
+    /api/group                  集团合并的指标
+    /api/health                 工作簿信息
+
+全部响应在启动时生成好 JSON、gzip 压缩版本和 ETag，请求时只查表和写出字节；
+客户端带 If-None-Match 且内容未变时返回 304，请求头 Accept-Encoding 含 gzip 时返回压缩版本
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+import pandas as pd
+
+from budget_core import load_budget_frame, company_metrics, CompanyIndex, TEXT_FIELDS
+from budget_core import build_group_rollup, row_fingerprints, GROUP_ROLLUP_NAME
+from budget_export import company_records, compact_numbers
+
+API_PREFIX = '/api'
+
+# 输出数值的小数位数：金额（万元）保留 2 位，百分数（毛利率、费用率、占比）保留 4 位；
+# 压缩为 float32 的列带有的尾数误差不会出现在接口数据中
+AMOUNT_DIGITS = 2
+PERCENT_DIGITS = 4
+PERCENT_KEYS = ('gross_margin', 'rate', 'share')
+
+# 小于该字节数的响应不压缩：压缩后几乎不变小，还要多花解压时间
+GZIP_MIN_BYTES = 512
+
+
+def _text(value):
+    if pd.isna(value):
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def json_bytes(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def round_summary(value, digits=AMOUNT_DIGITS):
+    """
+    按字段逐层保留小数：PERCENT_KEYS 之下的数值为百分数，其余为金额
+    """
+    if isinstance(value, dict):
+        return {k: round_summary(v, PERCENT_DIGITS if k in PERCENT_KEYS else digits) for k, v in value.items()}
+    if isinstance(value, list):
+        return [round_summary(v, digits) for v in value]
+    return compact_numbers(value, digits)
+
+
+def company_summary(name, row, schema):
+    """
+    一个公司（或集团合并记录）的接口数据：company_metrics() 的全部指标（数值按 round_summary() 保留小数）
+    加上备注和小结原文
+    """
+    summary = {'company': name}
+    summary.update(round_summary(company_metrics(row)))
+    summary['remarks'] = {field: _text(schema.get(row, field, None)) for field in TEXT_FIELDS}
+    return summary
+
+
+class Resource:
+    """
+    一个预先生成的响应：JSON 字节、gzip 压缩后的字节（不值得压缩时为 None）和强 ETag
+    """
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+        compressed = gzip.compress(self.body, compresslevel=6, mtime=0) if len(self.body) >= GZIP_MIN_BYTES else None
+        self.gzip_body = compressed if compressed is not None and len(compressed) < len(self.body) else None
+
+
+class SummaryStore:
+    """
+    请求路径（URL 解码后）→ Resource 的只读表，启动时一次构建；构建完成后不再修改，多线程并发读取不需要加锁
+    """
+
+    def __init__(self, df, schema, source='', include_group=True):
+        index = CompanyIndex(df)
+        fingerprints = row_fingerprints(df)
+        # 整表一次转为逐行字典，比逐个单元格经 CompanyRecord 取值快一个数量级
+        summaries = [company_summary(name, record, schema) for name, record in company_records(df, index)]
+
+        # 全部公司的接口直接拼接各公司已序列化的 JSON，不再重复序列化
+        bodies = [json_bytes(summary) for summary in summaries]
+        self.resources = {}
+        for name, body in zip(index.companies, bodies):
+            self.resources[f'{API_PREFIX}/companies/{name}'] = Resource(body)
+        self.resources[f'{API_PREFIX}/summaries'] = Resource(b'[' + b','.join(bodies) + b']')
+        self.resources[f'{API_PREFIX}/companies'] = Resource(json_bytes([
+            {'company': name, 'fingerprint': fingerprints[name], 'url': self.company_path(name)}
+            for name in index.companies
+        ]))
+        if include_group:
+            self.resources[f'{API_PREFIX}/group'] = Resource(json_bytes(
+                company_summary(GROUP_ROLLUP_NAME, build_group_rollup(df), schema)
+            ))
+        self.resources[f'{API_PREFIX}/health'] = Resource(json_bytes({
+            'source': os.path.basename(source),
+            'companies': len(index),
+            'duplicates': [str(name) for name in index.duplicates],
+            'missing_columns': schema.missing_columns,
+        }))
+
+    @staticmethod
+    def company_path(name):
+        """
+        公司明细的请求地址（URL 编码）
+        """
+        return f'{API_PREFIX}/companies/' + quote(str(name), safe='')
+
+    def __len__(self):
+        return len(self.resources)
+
+    def get(self, path):
+        return self.resources.get(path)
+
+
+def build_store(path, loader='stream', include_group=True):
+    """
+    读取工作簿并构建 SummaryStore；未找到'公司简称'列时抛出 ValueError
+    """
+    loaded = load_budget_frame(path, loader)
+    if loaded is None:
+        raise ValueError("未找到'公司简称'列，请检查表头格式是否变动")
+    df, schema, _ = loaded
+    return SummaryStore(df, schema, path, include_group)
+
+
+def etag_matches(header, etag):
+    """
+    If-None-Match 是否命中：支持 "*"、逗号分隔的多个 ETag 和弱比较（W/ 前缀）
+    """
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+def accepts_gzip(header):
+    """
+    Accept-Encoding 是否接受 gzip（q=0 表示明确拒绝）
+    """
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            match = re.search(r'q\s*=\s*([0-9.]+)', params)
+            return not (match and float(match.group(1)) == 0)
+    return False
+
+
+class SummaryHandler(BaseHTTPRequestHandler):
+    """
+    只读接口的请求处理：保持连接（HTTP/1.1），按预先生成的字节直接写出
+    """
+    protocol_version = 'HTTP/1.1'
+    server_version = 'BudgetAPI/1.0'
+    store = None
+    quiet = True
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        path = unquote(urlsplit(self.path).path)
+        resource = self.store.get(path)
+        if resource is None:
+            self._send(404, json_bytes({'error': f'未找到 {path}'}), send_body)
+            return
+
+        headers = {'ETag': resource.etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+        if etag_matches(self.headers.get('If-None-Match', ''), resource.etag):
+            self._send(304, b'', False, headers)
+            return
+        body = resource.body
+        if resource.gzip_body is not None and accepts_gzip(self.headers.get('Accept-Encoding', '')):
+            body = resource.gzip_body
+            headers['Content-Encoding'] = 'gzip'
+        self._send(200, body, send_body, headers)
+
+    def _send(self, status, body, send_body, headers=None):
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if send_body and body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+class SummaryServer(ThreadingHTTPServer):
+    """
+    每个连接一个线程；监听队列加长，突发的大量并发连接不会被拒绝
+    """
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def make_server(store, host='127.0.0.1', port=8502, quiet=True):
+    handler = type('Handler', (SummaryHandler,), {'store': store, 'quiet': quiet})
+    return SummaryServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='以本地 JSON 接口提供每个公司的预算指标')
+    parser.add_argument('workbook', help='2026预算小结 Excel 文件路径')
+    parser.add_argument('--host', default=os.environ.get('BUDGET_API_HOST', '127.0.0.1'), help='监听地址（默认 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('BUDGET_API_PORT', 8502)), help='端口（默认 8502）')
+    parser.add_argument('--loader', choices=['stream', 'full'], default='stream', help='Excel 读取方式')
+    parser.add_argument('--no-group', action='store_true', help='不提供集团合并接口')
+    parser.add_argument('--verbose', action='store_true', help='逐条输出请求日志')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    store = build_store(args.workbook, args.loader, include_group=not args.no_group)
+    server = make_server(store, args.host, args.port, quiet=not args.verbose)
+    print(
+        f"已加载 {args.workbook}（{len(store)} 个接口，用时 {time.perf_counter() - start:.1f} 秒），"
+        f"监听 http://{args.host}:{server.server_address[1]}{API_PREFIX}/companies"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
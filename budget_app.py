@@ -1,848 +1,1050 @@
-import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-import re
-
-# 页面设置
-st.set_page_config(page_title="2026预算可视化看板", layout="wide")
-
-# CSS样式美化
-st.markdown("""
-<style>
-    /* 全局配色方案 */
-    :root {
-        --primary-blue: #0052cc;
-        --light-blue-bg: #e6f0ff;
-        --rise-red: #ff4d4f;
-        --fall-green: #52c41a;
-        --text-dark: #1f1f1f;
-        --text-gray: #666;
-        --border-light: #d9d9d9;
-    }
-    
-    /* KPI卡片样式 */
-    .kpi-card {
-        background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
-        padding: 24px;
-        border-radius: 12px;
-        border: 1px solid var(--border-light);
-        box-shadow: 0 4px 12px rgba(0, 82, 204, 0.08);
-        transition: all 0.3s ease;
-        margin-bottom: 16px;
-    }
-    .kpi-card:hover {
-        box-shadow: 0 6px 20px rgba(0, 82, 204, 0.15);
-        transform: translateY(-2px);
-    }
-    .kpi-title {
-        font-size: 0.95rem;
-        color: var(--text-gray);
-        font-weight: 500;
-        margin-bottom: 12px;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-    .kpi-value-2026 {
-        font-size: 2.2rem;
-        font-weight: 700;
-        color: var(--primary-blue);
-        margin: 8px 0;
-        line-height: 1.2;
-    }
-    .kpi-value-2025 {
-        font-size: 1.3rem;
-        font-weight: 600;
-        color: var(--text-gray);
-        margin: 4px 0;
-    }
-    .kpi-change {
-        font-size: 1.1rem;
-        font-weight: 600;
-        margin-top: 8px;
-        padding: 6px 12px;
-        border-radius: 6px;
-        display: inline-block;
-    }
-    .kpi-change.rise {
-        color: var(--rise-red);
-        background-color: rgba(255, 77, 79, 0.1);
-    }
-    .kpi-change.fall {
-        color: var(--fall-green);
-        background-color: rgba(82, 196, 26, 0.1);
-    }
-    
-    /* 管理层关注区域 */
-    .attention-box {
-        background: linear-gradient(135deg, #fff9e6 0%, #fffbf0 100%);
-        padding: 24px;
-        border-radius: 12px;
-        border-left: 4px solid #faad14;
-        box-shadow: 0 2px 8px rgba(250, 173, 20, 0.1);
-    }
-    .attention-title {
-        font-size: 1.1rem;
-        font-weight: 700;
-        color: #d46b08;
-        margin-bottom: 12px;
-    }
-    
-    /* 分区标题 */
-    .section-title {
-        font-size: 1.4rem;
-        font-weight: 700;
-        color: var(--primary-blue);
-        margin: 32px 0 20px 0;
-        padding-bottom: 12px;
-        border-bottom: 3px solid var(--primary-blue);
-    }
-    
-    /* 小结区域 */
-    .summary-box {
-        background: linear-gradient(135deg, var(--light-blue-bg) 0%, #f0f5ff 100%);
-        padding: 28px;
-        border-radius: 12px;
-        border: 1px solid #adc6ff;
-        box-shadow: 0 2px 8px rgba(0, 82, 204, 0.08);
-    }
-    .summary-title {
-        font-size: 1.4rem;
-        font-weight: 700;
-        color: var(--primary-blue);
-        margin-bottom: 16px;
-    }
-    .summary-content {
-        font-size: 1.15rem;
-        line-height: 2;
-        color: var(--text-dark);
-    }
-    
-    /* Streamlit原生组件优化 */
-    [data-testid="stMetricValue"] {
-        font-size: 2rem !important;
-        font-weight: 700 !important;
-        color: var(--primary-blue) !important;
-    }
-    [data-testid="stMetricLabel"] {
-        font-size: 1rem !important;
-        color: var(--text-gray) !important;
-        font-weight: 500 !important;
-    }
-    
-    /* 侧边栏优化 */
-    [data-testid="stSidebar"] {
-        background-color: #fafafa;
-    }
-    .sidebar .sidebar-content {
-        background-color: #fafafa;
-    }
-    
-    /* 通用文本样式 */
-    .metric-unit {
-        font-size: 0.9rem;
-        color: var(--text-gray);
-        font-weight: 400;
-    }
-    
-    /* 树形表格样式 */
-    .tree-table {
-        width: 100%;
-        border-collapse: collapse;
-        font-size: 1.1rem;
-        background: white;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-        border-radius: 8px;
-        overflow: hidden;
-    }
-    .tree-table th {
-        background: linear-gradient(135deg, #0052cc 0%, #0066ff 100%);
-        color: white;
-        padding: 16px 12px;
-        text-align: left;
-        font-weight: 600;
-        font-size: 1.15rem;
-        border-bottom: 3px solid #003d99;
-    }
-    .tree-table td {
-        padding: 14px 12px;
-        border-bottom: 1px solid #e8e8e8;
-    }
-    .tree-row-root {
-        background: #f0f5ff;
-        font-weight: 700;
-        font-size: 1.2rem;
-        color: #0052cc;
-    }
-    .tree-row-parent {
-        background: #fff9e6;
-        font-weight: 600;
-        color: #d46b08;
-    }
-    .tree-row-child {
-        background: white;
-        color: #333;
-    }
-    .tree-row-normal {
-        background: white;
-        color: #333;
-    }
-    .tree-row:hover {
-        background: #f5f5f5 !important;
-    }
-    .tree-indent-0 { padding-left: 12px; }
-    .tree-indent-1 { padding-left: 32px; }
-    .tree-indent-2 { padding-left: 52px; }
-    .tree-icon {
-        display: inline-block;
-        width: 16px;
-        margin-right: 8px;
-        font-weight: bold;
-    }
-    .progress-bar-container {
-        width: 100%;
-        background: #e8e8e8;
-        border-radius: 4px;
-        height: 24px;
-        position: relative;
-        overflow: hidden;
-    }
-    .progress-bar {
-        height: 100%;
-        border-radius: 4px;
-        transition: width 0.3s ease;
-        display: flex;
-        align-items: center;
-        justify-content: flex-end;
-        padding-right: 8px;
-        color: white;
-        font-weight: 600;
-        font-size: 0.95rem;
-    }
-    .progress-bar-high { background: linear-gradient(90deg, #0052cc 0%, #0066ff 100%); }
-    .progress-bar-medium { background: linear-gradient(90deg, #4a90e2 0%, #74b9ff 100%); }
-    .progress-bar-low { background: linear-gradient(90deg, #95a5a6 0%, #b0bec5 100%); }
-    .amount-cell {
-        font-family: 'Consolas', 'Monaco', monospace;
-        font-weight: 600;
-        text-align: right;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-def clean_header(df):
-    """
-    处理Excel的多级表头（合并单元格），将其展平为单层列名
-    """
-    new_columns = []
-    for col in df.columns:
-        # col 是一个元组，例如 ('2025年度收入按季度分', '1Q25') 或 ('2026年\n营业收入', 'Unnamed: 5_level_1')
-        c1 = str(col[0]).strip()
-        c2 = str(col[1]).strip()
-        
-        # 逻辑：如果第二行是 Unnamed（即没有子标题），就用第一行
-        # 如果第二行有实意（例如 1Q25），就优先用第二行
-        if 'Unnamed' in c2 or c2 == 'nan':
-            final_col = c1
-        else:
-            final_col = c2
-            
-        # 清理换行符和多余空格
-        final_col = final_col.replace('\n', '').replace('\r', '').replace(' ', '')
-        new_columns.append(final_col)
-    
-    df.columns = new_columns
-    return df
-
-def format_text_list(text, color='inherit'):
-    """
-    将 '1、xxx 2、xxx' 格式的文本转换为换行显示的HTML
-    按"1、""2、""3、"等数字顿号分段，支持自定义颜色
-    """
-    if pd.isna(text) or text == 0 or text == '' or str(text).strip() == '':
-        return "无"
-    
-    text = str(text).strip()
-    
-    # 检查是否包含数字顿号格式
-    if not re.search(r'\d+、', text):
-        # 如果没有数字顿号，直接返回原文本
-        return f'<div style="color:{color}; line-height:2;">{text}</div>'
-    
-    # 按照数字顿号分割文本
-    parts = re.split(r'(\d+、)', text)
-    
-    result = '<div style="line-height:2;">'
-    i = 0
-    while i < len(parts):
-        if re.match(r'\d+、', parts[i]):
-            # 这是一个编号
-            number = parts[i]
-            content = parts[i+1] if i+1 < len(parts) else ''
-            result += f'<div style="margin-top:8px; color:{color};"><b>{number}</b>{content.strip()}</div>'
-            i += 2
-        else:
-            # 这是第一段文本（在第一个编号之前）
-            if parts[i].strip():
-                result += f'<div style="color:{color};">{parts[i].strip()}</div>'
-            i += 1
-    
-    result += '</div>'
-    return result
-
-def load_data(uploaded_file):
-    try:
-        # 关键修改：header=[11, 12] 读取两行作为表头（处理合并单元格）
-        df = pd.read_excel(uploaded_file, header=[11, 12], engine='openpyxl')
-        
-        # 展平列名
-        df = clean_header(df)
-        
-        # 显示成功信息
-        st.sidebar.success(f" 文件读取成功：{len(df)} 行数据")
-        
-        # 过滤掉空行
-        if '公司简称' in df.columns:
-            df = df[df['公司简称'].notna()]
-            st.sidebar.info(f" 共 {len(df)} 个公司主体")
-            return df
-        else:
-            st.error("未找到'公司简称'列，请检查表头格式是否变动。")
-            return None
-    except Exception as e:
-        st.error(f"文件读取失败: {str(e)}")
-        return None
-
-# --- 侧边栏 ---
-st.sidebar.header("控制面板")
-uploaded_file = st.sidebar.file_uploader("📂 上传2026预算小结 (Excel)", type=["xlsx"])
-
-if uploaded_file is not None:
-    df = load_data(uploaded_file)
-    
-    if df is not None:
-        companies = df['公司简称'].unique().tolist()
-        selected_company = st.sidebar.selectbox("选择公司主体", companies)
-        
-        # 获取选中行数据
-        row = df[df['公司简称'] == selected_company].iloc[0]
-        
-        # --- 顶部标题区 ---
-        st.title(f"{selected_company}")
-        st.markdown("2026年全面预算概览")
-        
-        # --- 第一部分：核心指标 ---
-        # 数据提取
-        rev_26 = pd.to_numeric(row.get('2026年营业收入'), errors='coerce')
-        rev_25 = pd.to_numeric(row.get('2025年营业收入'), errors='coerce')
-        prof_26 = pd.to_numeric(row.get('2026净利润'), errors='coerce')
-        prof_25 = pd.to_numeric(row.get('2025净利润'), errors='coerce')
-        margin_26 = row.get('2026毛利率', 0)
-        margin_25 = row.get('2025毛利率', 0)
-        
-        # 格式化 - 使用文字显示变化
-        rev_26_str = f"**{rev_26:,.0f}**" if pd.notna(rev_26) else "-"
-        rev_25_str = f"**{rev_25:,.0f}**" if pd.notna(rev_25) else "-"
-        
-        if pd.notna(rev_26) and pd.notna(rev_25):
-            delta = rev_26 - rev_25
-            if delta > 0:
-                rev_change = f'<span class="metric-change increase">同比增加 {delta:,.0f} 万元</span>'
-            elif delta < 0:
-                rev_change = f'<span class="metric-change decrease">同比减少 {abs(delta):,.0f} 万元</span>'
-            else:
-                rev_change = '<span class="metric-change">与去年持平</span>'
-        else:
-            rev_change = "-"
-        
-        prof_26_str = f"**{prof_26:,.0f}**" if pd.notna(prof_26) else "-"
-        prof_25_str = f"**{prof_25:,.0f}**" if pd.notna(prof_25) else "-"
-        
-        if pd.notna(prof_26) and pd.notna(prof_25):
-            delta = prof_26 - prof_25
-            if delta > 0:
-                prof_change = f'<span class="metric-change increase">同比增加 {delta:,.0f} 万元</span>'
-            elif delta < 0:
-                prof_change = f'<span class="metric-change decrease">同比减少 {abs(delta):,.0f} 万元</span>'
-            else:
-                prof_change = '<span class="metric-change">与去年持平</span>'
-        else:
-            prof_change = "-"
-        
-        try:
-            m_val_26 = float(margin_26) * 100 if float(margin_26) < 5 else float(margin_26)
-            margin_26_str = f"{m_val_26:.0f}%"  # 整数位
-        except:
-            margin_26_str = str(margin_26)
-        
-        try:
-            m_val_25 = float(margin_25) * 100 if float(margin_25) < 5 else float(margin_25)
-            margin_25_str = f"{m_val_25:.0f}%"  # 整数位
-        except:
-            margin_25_str = str(margin_25)
-
-        # 显示指标
-        k1, k2, k3 = st.columns(3)
-        
-        with k1:
-            st.markdown(f"###  2026年营业收入")
-            st.markdown(f"<div style='font-size:1.8rem; font-weight:bold; margin:10px 0; color:#0052cc;'>{rev_26:,.0f} 万元</div>", unsafe_allow_html=True)
-            st.markdown(f"<div style='font-size:1.1rem; color:#666; margin-bottom:5px;'>2025年：{rev_25:,.0f} 万元</div>", unsafe_allow_html=True)
-            st.markdown(rev_change, unsafe_allow_html=True)
-        
-        with k2:
-            st.markdown(f"###  2026年净利润")
-            st.markdown(f"<div style='font-size:1.8rem; font-weight:bold; margin:10px 0; color:#0052cc;'>{prof_26:,.0f} 万元</div>", unsafe_allow_html=True)
-            st.markdown(f"<div style='font-size:1.1rem; color:#666; margin-bottom:5px;'>2025年：{prof_25:,.0f} 万元</div>", unsafe_allow_html=True)
-            st.markdown(prof_change, unsafe_allow_html=True)
-        
-        with k3:
-            st.markdown(f"###  2026年综合毛利率") 
-            st.markdown(f"<div style='font-size:1.8rem; font-weight:bold; margin:10px 0; color:#0052cc;'>{margin_26_str}</div>", unsafe_allow_html=True)
-            st.markdown(f"<div style='font-size:1.1rem; font-weight:bold; color:#333; margin-bottom:5px;'>2025年：{margin_25_str}</div>", unsafe_allow_html=True)
-
-        st.markdown("---")
-
-        # --- 第二部分：收入分析 ---
-        st.markdown('<div class="section-title"> 收入分析</div>', unsafe_allow_html=True)
-        
-        # 收入折线图 - 独占整行
-        st.markdown("#####  季度收入趋势对比")
-        quarters = ['1Q', '2Q', '3Q', '4Q']
-        y25 = [pd.to_numeric(row.get(f'{q}25'), errors='coerce') for q in quarters]
-        y26 = [pd.to_numeric(row.get(f'{q}26'), errors='coerce') for q in quarters]
-        # 填充0
-        y25 = [x if pd.notna(x) else 0 for x in y25]
-        y26 = [x if pd.notna(x) else 0 for x in y26]
-
-        fig = go.Figure()
-        # 2025灰色线条
-        fig.add_trace(go.Scatter(
-            x=quarters, y=y25, 
-            name='2025年 (预估)', 
-            mode='lines+markers+text',
-            line=dict(color='#95a5a6', width=4),
-            marker=dict(size=12, color='#95a5a6'),
-            text=[f'{v:,.0f} 万元' for v in y25],
-            textposition='top center',
-            textfont=dict(size=14, color='#666')
-        ))
-        # 2026蓝色线条
-        fig.add_trace(go.Scatter(
-            x=quarters, y=y26, 
-            name='2026年 (预算)', 
-            mode='lines+markers+text',
-            line=dict(color='#0052cc', width=4),
-            marker=dict(size=12, color='#0052cc'),
-            text=[f'{v:,.0f} 万元' for v in y26],
-            textposition='top center',
-            textfont=dict(size=16, color='#0052cc')
-        ))
-        fig.update_layout(
-            height=400, 
-            margin=dict(l=60, r=60, t=60, b=60),
-            legend=dict(
-                orientation="h", 
-                yanchor="bottom", 
-                y=1.02, 
-                xanchor="center", 
-                x=0.5,
-                font=dict(size=14)
-            ),
-            xaxis=dict(
-                title=dict(text="季度", font=dict(size=16)),
-                tickfont=dict(size=14)
-            ),
-            yaxis=dict(
-                title=dict(text="收入 (万元)", font=dict(size=16)),
-                tickfont=dict(size=14)
-            ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)'
-        )
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # 备注和集团内外占比放在折线图下方
-        col_remark, col_pie = st.columns([1, 1])
-        
-        with col_remark:
-            st.markdown("#####  收入变动备注")
-            remark_text = row.get('备注1：收入环比变动原因', '无')
-            st.info(f"**环比变动原因：**\n\n{remark_text}")
-        
-        with col_pie:
-            st.markdown("#####  集团内外收入分布")
-            in_group = pd.to_numeric(row.get('集团内'), errors='coerce')
-            out_group = pd.to_numeric(row.get('集团外'), errors='coerce')
-            
-            if pd.notna(in_group) and pd.notna(out_group) and (in_group + out_group) > 0:
-                group_df = pd.DataFrame({
-                    '类型': ['集团内', '集团外'],
-                    '金额': [in_group, out_group]
-                })
-                fig_group = px.pie(
-                    group_df, 
-                    values='金额', 
-                    names='类型',
-                    color_discrete_sequence=['#0052cc', '#95a5a6']
-                )
-                fig_group.update_traces(
-                    textposition='inside',
-                    textinfo='label+value+percent',
-                    texttemplate='<b>%{label}</b><br>%{value:,.0f} 万元<br>(%{percent})',
-                    textfont_size=14
-                )
-                fig_group.update_layout(
-                    height=320, 
-                    margin=dict(l=10, r=10, t=10, b=10), 
-                    showlegend=False
-                )
-                st.plotly_chart(fig_group, use_container_width=True)
-            else:
-                st.info("暂无集团内外数据")
-
-        # --- 第三部分：费用分析 (左图右文) ---
-        st.markdown("---")
-        st.markdown('<div class="section-title"> 费用与成本</div>', unsafe_allow_html=True)
-        col_exp_chart, col_exp_text = st.columns([1, 1])
-
-        with col_exp_chart:
-            # 准备费用数据
-            sale = pd.to_numeric(row.get('2026销售费用'), errors='coerce') or 0
-            admin = pd.to_numeric(row.get('2026管理费用'), errors='coerce') or 0
-            rd = pd.to_numeric(row.get('2026研发费用'), errors='coerce') or 0
-            
-            exp_df = pd.DataFrame({
-                'Type': ['销售', '管理', '研发'],
-                'Value': [sale, admin, rd]
-            })
-            
-            if exp_df['Value'].sum() > 0:
-                fig_pie = px.pie(
-                    exp_df, 
-                    values='Value', 
-                    names='Type', 
-                    title="2026年期间费用结构",
-                    color_discrete_sequence=['#0052cc', '#4a90e2', '#74b9ff']
-                )
-                fig_pie.update_traces(
-                    textposition='inside', 
-                    textinfo='label+value+percent',
-                    texttemplate='<b>%{label}</b><br>%{value:,.0f} 万元<br>(%{percent})',
-                    textfont_size=14
-                )
-                fig_pie.update_layout(
-                    height=380, 
-                    margin=dict(l=20, r=20, t=50, b=20),
-                    title_font_size=16
-                )
-                st.plotly_chart(fig_pie, use_container_width=True)
-            else:
-                st.write("暂无费用数据")
-
-        with col_exp_text:
-            st.markdown("#####  费用明细说明")
-            tab1, tab2, tab3, tab4 = st.tabs(["销售", "管理", "研发", "毛利备注"])
-            
-            # 使用模糊匹配查找备注列（因为列名太长，直接用包含匹配）
-            def get_col_contains(df_row, keyword):
-                for c in df_row.index:
-                    if keyword in str(c):
-                        return df_row[c]
-                return "无"
-
-            with tab1:
-                sale_rate = row.get('2026年销售费用率', 0)
-                try:
-                    rate_val = float(sale_rate) * 100 if float(sale_rate) < 5 else float(sale_rate)
-                    rate_str = f"{rate_val:.0f}%"  # 整数位
-                except:
-                    rate_str = str(sale_rate)
-                st.write(f"**金额:** {sale:,.0f} 万元 | **费率:** {rate_str}")
-                note = get_col_contains(row, "备注3")
-                st.markdown(format_text_list(note), unsafe_allow_html=True)
-            
-            with tab2:
-                admin_rate = row.get('2026年管理费用率', 0)
-                try:
-                    rate_val = float(admin_rate) * 100 if float(admin_rate) < 5 else float(admin_rate)
-                    rate_str = f"{rate_val:.0f}%"  # 整数位
-                except:
-                    rate_str = str(admin_rate)
-                st.write(f"**金额:** {admin:,.0f} 万元 | **费率:** {rate_str}")
-                note = get_col_contains(row, "备注4")
-                st.markdown(format_text_list(note), unsafe_allow_html=True)
-
-            with tab3:
-                rd_rate = row.get('2026年研发费用率', 0)
-                try:
-                    rate_val = float(rd_rate) * 100 if float(rd_rate) < 5 else float(rd_rate)
-                    rate_str = f"{rate_val:.0f}%"  # 整数位
-                except:
-                    rate_str = str(rd_rate)
-                st.write(f"**金额:** {rd:,.0f} 万元 | **费率:** {rate_str}")
-                note = get_col_contains(row, "备注5（请填写")
-                st.markdown(format_text_list(note), unsafe_allow_html=True)
-                
-            with tab4:
-                note = get_col_contains(row, "备注2")
-                st.markdown(format_text_list(note), unsafe_allow_html=True)
-        
-        # --- 固定成本费用部分 (树形表格) ---
-        st.markdown("---")
-        st.markdown('<div class="section-title">固定成本费用</div>', unsafe_allow_html=True)
-        
-        # 提取固定成本数据
-        fixed_cost_total = pd.to_numeric(row.get('固定成本费用合计', 0), errors='coerce')
-        fixed_cost_total = 0 if pd.isna(fixed_cost_total) else fixed_cost_total
-        
-        # 各项固定成本数据
-        salary_total = pd.to_numeric(row.get('职工薪酬-小计', 0), errors='coerce')
-        salary_total = 0 if pd.isna(salary_total) else salary_total
-        
-        salary_sales = pd.to_numeric(row.get('职工薪酬-销售', 0), errors='coerce')
-        salary_sales = 0 if pd.isna(salary_sales) else salary_sales
-        
-        salary_admin = pd.to_numeric(row.get('职工薪酬-管理', 0), errors='coerce')
-        salary_admin = 0 if pd.isna(salary_admin) else salary_admin
-        
-        salary_production = pd.to_numeric(row.get('职工薪酬-生产', 0), errors='coerce')
-        salary_production = 0 if pd.isna(salary_production) else salary_production
-        
-        salary_rd = pd.to_numeric(row.get('职工薪酬-研发', 0), errors='coerce')
-        salary_rd = 0 if pd.isna(salary_rd) else salary_rd
-        
-        depreciation = pd.to_numeric(row.get('折旧费', 0), errors='coerce')
-        depreciation = 0 if pd.isna(depreciation) else depreciation
-        
-        rent = pd.to_numeric(row.get('房租物业费', 0), errors='coerce')
-        rent = 0 if pd.isna(rent) else rent
-        
-        other_cost = pd.to_numeric(row.get('其他', 0), errors='coerce')
-        other_cost = 0 if pd.isna(other_cost) else other_cost
-        
-        long_term_deferred = pd.to_numeric(row.get('长期待摊费用', 0), errors='coerce')
-        long_term_deferred = 0 if pd.isna(long_term_deferred) else long_term_deferred
-        
-        amortization = pd.to_numeric(row.get('无形资产摊销', 0), errors='coerce')
-        amortization = 0 if pd.isna(amortization) else amortization
-        
-        # 树形表格CSS样式
-        tree_table_css = """
-        <style>
-            .tree-table {
-                width: 100%;
-                border-collapse: collapse;
-                font-size: 1.1rem;
-                background: white;
-                box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-                border-radius: 8px;
-                overflow: hidden;
-            }
-            .tree-table th {
-                background: linear-gradient(135deg, #0052cc 0%, #0066ff 100%);
-                color: white;
-                padding: 16px 12px;
-                text-align: left;
-                font-weight: 600;
-                font-size: 1.15rem;
-                border-bottom: 3px solid #003d99;
-            }
-            .tree-table td {
-                padding: 14px 12px;
-                border-bottom: 1px solid #e8e8e8;
-            }
-            .tree-row-root {
-                background: #f0f5ff;
-                font-weight: 700;
-                font-size: 1.2rem;
-                color: #0052cc;
-            }
-            .tree-row-parent {
-                background: #fff9e6;
-                font-weight: 600;
-                color: #d46b08;
-            }
-            .tree-row-child {
-                background: white;
-                color: #333;
-            }
-            .tree-row-normal {
-                background: white;
-                color: #333;
-            }
-            .tree-row:hover {
-                background: #f5f5f5 !important;
-            }
-            .tree-indent-0 { padding-left: 12px; }
-            .tree-indent-1 { padding-left: 32px; }
-            .tree-indent-2 { padding-left: 52px; }
-            .tree-icon {
-                display: inline-block;
-                width: 16px;
-                margin-right: 8px;
-                font-weight: bold;
-            }
-            .progress-bar-container {
-                width: 100%;
-                background: #e8e8e8;
-                border-radius: 4px;
-                height: 24px;
-                position: relative;
-                overflow: hidden;
-            }
-            .progress-bar {
-                height: 100%;
-                border-radius: 4px;
-                transition: width 0.3s ease;
-                display: flex;
-                align-items: center;
-                justify-content: flex-end;
-                padding-right: 8px;
-                color: white;
-                font-weight: 600;
-                font-size: 0.95rem;
-            }
-            .progress-bar-high { background: linear-gradient(90deg, #0052cc 0%, #0066ff 100%); }
-            .progress-bar-medium { background: linear-gradient(90deg, #4a90e2 0%, #74b9ff 100%); }
-            .progress-bar-low { background: linear-gradient(90deg, #95a5a6 0%, #b0bec5 100%); }
-            .amount-cell {
-                font-family: 'Consolas', 'Monaco', monospace;
-                font-weight: 600;
-                text-align: right;
-            }
-        </style>
-        """
-        st.markdown(tree_table_css, unsafe_allow_html=True)
-        
-        # 定义辅助函数
-        def format_amount(value):
-            if value == 0:
-                return ""
-            return f"{value:,.0f}"
-        
-        def get_percentage(value, total):
-            if total == 0:
-                return 0
-            return (value / total) * 100
-        
-        def render_progress_bar(percentage):
-            if percentage >= 50:
-                bar_class = "progress-bar-high"
-            elif percentage >= 20:
-                bar_class = "progress-bar-medium"
-            else:
-                bar_class = "progress-bar-low"
-            
-            bar_html = f'<div class="progress-bar-container"><div class="progress-bar {bar_class}" style="width: {percentage}%;">{percentage:.0f}%</div></div>'
-            return bar_html
-        
-        # 生成表格HTML
-        table_html = '<table class="tree-table"><thead><tr><th style="width: 45%;">成本项目</th><th style="width: 25%; text-align: right;">金额(万元)</th><th style="width: 30%;">占比结构</th></tr></thead><tbody>'
-        
-        # 根节点
-        total_pct = 100
-        table_html += f'<tr class="tree-row tree-row-root"><td class="tree-indent-0"><span class="tree-icon">▼</span>固定成本费用合计</td><td class="amount-cell">{format_amount(fixed_cost_total)}</td><td>{render_progress_bar(total_pct)}</td></tr>'
-        
-        # 职工薪酬小计
-        salary_pct = get_percentage(salary_total, fixed_cost_total)
-        table_html += f'<tr class="tree-row tree-row-parent"><td class="tree-indent-1"><span class="tree-icon">▶</span>职工薪酬-小计</td><td class="amount-cell">{format_amount(salary_total)}</td><td>{render_progress_bar(salary_pct)}</td></tr>'
-        
-        # 职工薪酬子项
-        salary_items = [
-            ('├── 职工薪酬-销售', salary_sales),
-            ('├── 职工薪酬-管理', salary_admin),
-            ('├── 职工薪酬-生产', salary_production),
-            ('└── 职工薪酬-研发', salary_rd)
-        ]
-        
-        for item_name, item_value in salary_items:
-            item_pct = get_percentage(item_value, fixed_cost_total)
-            table_html += f'<tr class="tree-row tree-row-child"><td class="tree-indent-2">{item_name}</td><td class="amount-cell">{format_amount(item_value)}</td><td>{render_progress_bar(item_pct)}</td></tr>'
-        
-        # 其他固定成本项目
-        other_items = [
-            ('折旧费', depreciation),
-            ('房租物业费', rent),
-            ('其他', other_cost),
-            ('长期待摊费用', long_term_deferred),
-            ('无形资产摊销', amortization)
-        ]
-        
-        for item_name, item_value in other_items:
-            item_pct = get_percentage(item_value, fixed_cost_total)
-            table_html += f'<tr class="tree-row tree-row-normal"><td class="tree-indent-1">{item_name}</td><td class="amount-cell">{format_amount(item_value)}</td><td>{render_progress_bar(item_pct)}</td></tr>'
-        
-        table_html += '</tbody></table>'
-        
-        st.markdown(table_html, unsafe_allow_html=True)
-        
-        # --- 资金缺口部分（费用后面）结合现金流量情况 ---
-        st.markdown("---")
-        st.markdown('<div class="section-title"> 资金投入与现金流量情况</div>', unsafe_allow_html=True)
-        
-        # 第一行：现金流量指标
-        cash_col1, cash_col2, cash_col3, cash_col4 = st.columns(4)
-        
-        operating_cash = pd.to_numeric(row.get('经营活动产生的现金流量净额', 0), errors='coerce')
-        operating_cash = 0 if pd.isna(operating_cash) else operating_cash
-        
-        investing_cash = pd.to_numeric(row.get('投资活动产生的现金流量净额', 0), errors='coerce')
-        investing_cash = 0 if pd.isna(investing_cash) else investing_cash
-        
-        financing_cash = pd.to_numeric(row.get('筹资活动产生的现金流量净额', 0), errors='coerce')
-        financing_cash = 0 if pd.isna(financing_cash) else financing_cash
-        
-        cash_gap_raw = row.get('资金投入（缺口）', 0)
-        # 处理NaN值
-        if pd.isna(cash_gap_raw) or cash_gap_raw == '' or str(cash_gap_raw).lower() == 'nan':
-            cash_gap = 0
-        else:
-            try:
-                cash_gap = pd.to_numeric(cash_gap_raw, errors='coerce')
-                cash_gap = 0 if pd.isna(cash_gap) else cash_gap
-            except:
-                cash_gap = 0
-        
-        with cash_col1:
-            st.markdown("#####  经营活动现金流")
-            color = '#52c41a' if operating_cash >= 0 else '#ff4d4f'
-            st.markdown(f"<div style='font-size:1.6rem; font-weight:bold; color:{color};'>{operating_cash:,.0f} 万元</div>", unsafe_allow_html=True)
-        
-        with cash_col2:
-            st.markdown("#####  投资活动现金流")
-            color = '#52c41a' if investing_cash >= 0 else '#ff4d4f'
-            st.markdown(f"<div style='font-size:1.6rem; font-weight:bold; color:{color};'>{investing_cash:,.0f} 万元</div>", unsafe_allow_html=True)
-        
-        with cash_col3:
-            st.markdown("#####  筹资活动现金流")
-            color = '#52c41a' if financing_cash >= 0 else '#ff4d4f'
-            st.markdown(f"<div style='font-size:1.6rem; font-weight:bold; color:{color};'>{financing_cash:,.0f} 万元</div>", unsafe_allow_html=True)
-        
-        with cash_col4:
-            st.markdown("#####  资金缺口/投入")
-            st.markdown(f"<div style='font-size:1.6rem; font-weight:bold; color:#0052cc;'>{cash_gap:,.0f} 万元</div>", unsafe_allow_html=True)
-        
-        # 第二行：资金缺口说明
-        st.markdown("#####  资金缺口说明")
-        fund_note = get_col_contains(row, "备注5：")
-        if fund_note == "无":
-            fund_note = get_col_contains(row, "资金缺口")
-        # 资金缺口说明使用黑色字体
-        st.markdown(f"<div style='color:#1f1f1f; font-size:1rem; background:#f0f5ff; padding:20px; border-radius:8px;'>{format_text_list(fund_note, color='#1f1f1f')}</div>", unsafe_allow_html=True)
-
-        # --- 第四部分：底部小结 ---
-        st.markdown("---")
-        st.markdown("<h3 style='font-size:1.5rem; font-weight:bold;'> 2026年预算执行小结</h3>", unsafe_allow_html=True)
-        summary_text = row.get('小结', '暂无小结')
-        # 小结部分使用黑色字体，按"1、2、3、"分段
-        st.markdown(f"<div style='font-size:1.1rem; line-height:1.8; color:#1f1f1f;'>{format_text_list(summary_text, color='#1f1f1f')}</div>", unsafe_allow_html=True)
-        
-        # --- 提请管理层关注 (放在预算小结下方) ---
-        st.markdown("---")
-        st.markdown("<h3 style='font-size:1.5rem; font-weight:bold;'> 提请管理层关注</h3>", unsafe_allow_html=True)
-        attention_text = row.get('提请管理层关注', '无')
-        st.markdown(f"<div class='attention-box'>{format_text_list(attention_text, color='#d46b08')}</div>", unsafe_allow_html=True)
-
-else:
-    st.info("请在左侧上传 Excel 文件 (2026预算小结.xlsx)")
+import streamlit as st
+import pandas as pd
+import functools
+import html
+import io
+import os
+import time
+from budget_cache import WorkbookCache, CachedWorkbook, LRUCache, content_hash, approx_nbytes
+from budget_core import load_budget_frame, company_metrics, format_percent, CompanyIndex, ColumnSchema
+from budget_core import build_group_rollup, row_fingerprints, GROUP_ROLLUP_NAME, QUARTERS, EXPENSE_ITEMS, CASH_FLOW_ITEMS, PARENT_COLUMN
+from budget_diff import diff_frames
+from budget_checks import check_consistency, tolerance_from_env
+from budget_search import SearchIndex
+from budget_rank import CompanyRanking, RANKING_METRICS
+from budget_compare import comparison_frame, filter_comparison, COLUMN_GROUPS, LABEL_COLUMNS
+from budget_ingest import load_submissions, list_submissions
+from budget_hierarchy import CompanyTree, has_hierarchy
+from budget_scenario import SCENARIO_PARAMETERS, apply_scenario, scenario_key, scenario_label, scenario_table
+from budget_snapshot import SnapshotStore
+from budget_timing import TimingLog, timed
+from budget_charts import build_company_figures
+from budget_report import DASHBOARD_CSS, format_text_list, format_change, format_wan, cash_color, fixed_cost_table_html
+from budget_report import format_value, revision_tag, scenario_tag, highlight_snippet, entity_tree_table_html
+
+# 解析方式：stream 为流式只读并只保留看板用到的列；full 为 pandas 完整读取全部列
+LOADER_MODE = os.environ.get('BUDGET_LOADER', 'stream')
+
+# 诊断模式默认是否开启（BUDGET_DIAGNOSTICS=1），以及每个会话保留的运行次数
+DIAGNOSTICS_DEFAULT = os.environ.get('BUDGET_DIAGNOSTICS', '') not in ('', '0')
+DIAGNOSTICS_RUNS = int(os.environ.get('BUDGET_DIAGNOSTICS_RUNS', 200))
+
+# 查看范围中的单个公司、集团层级、数据校验、全文搜索、排名和对比表格页面
+COMPANY_VIEW = '单个公司'
+HIERARCHY_VIEW = '集团层级'
+COMPARE_VIEW = '对比表格'
+CHECK_VIEW = '数据校验'
+SEARCH_VIEW = '全文搜索'
+RANK_VIEW = '公司排名'
+
+# 服务器本地的子公司提交目录：只能由部署者通过环境变量指定，看板上不提供路径输入，
+# 使用者无法让服务器读取其他位置的文件
+SUBMISSION_DIR = os.environ.get('BUDGET_SUBMISSION_DIR', '').strip()
+
+# 全文搜索每次最多显示的结果条数
+SEARCH_RESULT_LIMIT = int(os.environ.get('BUDGET_SEARCH_LIMIT', 200))
+
+# 页面设置
+st.set_page_config(page_title="2026预算可视化看板", layout="wide")
+
+# CSS样式美化：全部样式（含树形表格）集中在 DASHBOARD_CSS 中，每次整页运行只输出一次
+# 各部分以 fragment 局部重跑时不会再次发送
+st.markdown(f"<style>{DASHBOARD_CSS}</style>", unsafe_allow_html=True)
+
+@st.cache_resource
+def get_workbook_cache():
+    """
+    进程内唯一的工作簿缓存，所有会话共享同一份解析结果
+    """
+    return WorkbookCache.from_env()
+
+@st.cache_resource
+def get_figure_cache():
+    """
+    按公司行指纹缓存指标、Plotly 图表和表格 HTML，切换回看过的公司或重新上传修订版时不再重建
+    容量由环境变量 BUDGET_FIGURE_CACHE_ENTRIES 控制
+    """
+    return LRUCache(max_entries=int(os.environ.get('BUDGET_FIGURE_CACHE_ENTRIES', 512)))
+
+@st.cache_resource
+def get_snapshot_store():
+    """
+    本地列式快照目录，服务重启后已解析过的文件无需重新解析
+    """
+    return SnapshotStore.from_env()
+
+@st.cache_resource
+def get_scenario_cache():
+    """
+    情景模拟结果：按 (工作簿, 情景参数) 缓存情景数据帧的公司索引和集团合并
+    容量由环境变量 BUDGET_SCENARIO_CACHE_ENTRIES 控制
+    """
+    return LRUCache(max_entries=int(os.environ.get('BUDGET_SCENARIO_CACHE_ENTRIES', 16)))
+
+def parse_workbook(key, data):
+    """
+    解析上传文件的字节内容，返回可放入缓存的 CachedWorkbook
+    """
+    loaded = load_budget_frame(io.BytesIO(data), LOADER_MODE)
+    
+    # 缺少'公司简称'列时返回 None，不写入缓存
+    if loaded is None:
+        return None
+    df, schema, source_rows = loaded
+    return CachedWorkbook(key, df, source_rows=source_rows, schema=schema)
+
+def get_file_key(uploaded_file):
+    """
+    计算上传文件的内容哈希；同一会话中同一个上传文件只计算一次
+    """
+    file_id = getattr(uploaded_file, 'file_id', None)
+    cached = st.session_state.setdefault('_workbook_keys', {})
+    if file_id is not None and file_id in cached:
+        return cached[file_id]
+    key = content_hash(uploaded_file.getvalue())
+    if file_id is not None:
+        cached[file_id] = key
+    return key
+
+def get_files_key(uploaded_files):
+    """
+    多个上传文件合并后的内容键：各文件的内容哈希按文件名排序后再哈希，与选择文件的顺序无关
+    """
+    keys = sorted((f.name, get_file_key(f)) for f in uploaded_files)
+    return content_hash("\n".join(f"{name}:{key}" for name, key in keys).encode('utf-8'))
+
+def get_directory_key(paths):
+    """
+    本地目录按文件路径、大小和修改时间计算内容键，不必每次运行都读取全部文件
+    """
+    parts = []
+    for path in paths:
+        info = os.stat(path)
+        parts.append(f"{path}:{info.st_size}:{info.st_mtime_ns}")
+    return content_hash("\n".join(parts).encode('utf-8'))
+
+def open_snapshot(key):
+    """
+    从本地快照恢复工作簿；快照不存在或已失效时返回 None
+    """
+    with timed('load/snapshot'):
+        snapshot = get_snapshot_store().load(key)
+    if snapshot is None:
+        return None
+    df, meta = snapshot
+    derived = {'schema': ColumnSchema(meta['raw_columns'])}
+    if 'ingest_report' in meta:
+        derived['ingest_report'] = pd.DataFrame(meta['ingest_report'])
+    return CachedWorkbook(key, df, source_rows=meta.get('source_rows'), **derived)
+
+def restore_or_parse(key, uploaded_file):
+    """
+    优先读取快照；没有快照时解析 Excel，并把结果写入快照供下次使用
+    """
+    workbook = open_snapshot(key)
+    if workbook is not None:
+        return workbook
+    workbook = parse_workbook(key, uploaded_file.getvalue())
+    if workbook is not None:
+        try:
+            get_snapshot_store().save(
+                key, workbook.frame,
+                filename=uploaded_file.name,
+                source_rows=workbook.source_rows,
+                raw_columns=workbook.derived('schema', lambda df: ColumnSchema(df.columns)).raw_columns,
+            )
+        except Exception as e:
+            st.sidebar.warning(f"快照保存失败，下次打开需重新解析：{str(e)}")
+    return workbook
+
+def load_data(uploaded_file):
+    try:
+        key = f"{get_file_key(uploaded_file)}:{LOADER_MODE}"
+        workbook = get_workbook_cache().get_or_load(key, lambda: restore_or_parse(key, uploaded_file))
+        if workbook is None:
+            st.error("未找到'公司简称'列，请检查表头格式是否变动。")
+            return None
+        
+        # 显示成功信息
+        st.sidebar.success(f" 文件读取成功：{workbook.source_rows} 行数据")
+        st.sidebar.info(f" 共 {len(workbook.frame)} 个公司主体")
+        return workbook
+    except Exception as e:
+        st.error(f"文件读取失败: {str(e)}")
+        return None
+
+def combine_submissions(key, sources, label, reports):
+    """
+    多个提交文件在进程池中并行解析后合并；优先读取快照，合并结果同样写入快照
+    逐文件的读取结果随工作簿保存，全部失败时追加到 reports 供调用方显示
+    """
+    workbook = open_snapshot(key)
+    if workbook is not None:
+        return workbook
+    frame, raw_columns, source_rows, report = load_submissions(sources(), LOADER_MODE)
+    reports.append(report)
+    if frame is None:
+        return None
+    workbook = CachedWorkbook(
+        key, frame, source_rows=source_rows, schema=ColumnSchema(raw_columns), ingest_report=report
+    )
+    try:
+        get_snapshot_store().save(
+            key, frame, filename=label, source_rows=source_rows, raw_columns=raw_columns,
+            ingest_report=report.astype(object).where(report.notna(), None).to_dict('records'),
+        )
+    except Exception as e:
+        st.sidebar.warning(f"快照保存失败，下次打开需重新解析：{str(e)}")
+    return workbook
+
+def render_ingest_report(report):
+    failed = int((report['状态'] == '失败').sum())
+    with st.sidebar.expander(f"📑 逐文件读取结果：{len(report) - failed} 个成功，{failed} 个失败", expanded=failed > 0):
+        st.dataframe(report, use_container_width=True, hide_index=True)
+
+def load_submissions_data(key, sources, label):
+    """
+    多个子公司分别提交的文件合并为一个工作簿，sources() 返回文件路径或 (文件名, 字节内容) 列表
+    与单个文件一样经过工作簿缓存和本地快照
+    """
+    reports = []
+    try:
+        key = f"{key}:{LOADER_MODE}"
+        workbook = get_workbook_cache().get_or_load(key, lambda: combine_submissions(key, sources, label, reports))
+    except Exception as e:
+        st.error(f"文件读取失败: {str(e)}")
+        return None
+    if workbook is None:
+        if reports:
+            render_ingest_report(reports[0])
+        st.error("全部文件读取失败，请查看逐文件读取结果。")
+        return None
+
+    report = workbook.derived('ingest_report', lambda df: None)
+    st.sidebar.success(f" {label} 合并读取成功：{workbook.source_rows} 行数据")
+    st.sidebar.info(f" 共 {len(workbook.frame)} 个公司主体")
+    if report is not None:
+        render_ingest_report(report)
+    return workbook
+
+def recent_snapshot_labels(exclude=None):
+    """
+    当前解析方式下的最近快照：{缓存键: 显示名称}，按最近使用排序
+    """
+    return {
+        m['key']: f"{m.get('filename') or '未命名'} · {m['rows']} 个主体 · "
+                  f"{time.strftime('%m-%d %H:%M', time.localtime(m['saved_at']))}"
+        for m in get_snapshot_store().recent()
+        if m['key'].endswith(f":{LOADER_MODE}") and m['key'] != exclude
+    }
+
+def open_recent_snapshot():
+    """
+    未上传文件时，在侧边栏列出最近的快照供直接打开
+    """
+    labels = recent_snapshot_labels()
+    if not labels:
+        return None
+    key = st.sidebar.selectbox(
+        "🕘 或打开最近的快照", [None] + list(labels),
+        format_func=lambda k: "（不打开）" if k is None else labels[k],
+    )
+    if key is None:
+        return None
+    try:
+        workbook = get_workbook_cache().get_or_load(key, lambda: open_snapshot(key))
+    except Exception as e:
+        st.error(f"快照读取失败: {str(e)}")
+        return None
+    if workbook is None:
+        st.sidebar.error("快照已失效，请重新上传文件")
+        return None
+    st.sidebar.info(f" 已从快照打开：共 {len(workbook.frame)} 个公司主体")
+    return workbook
+
+def choose_base_version(workbook):
+    """
+    在侧边栏选择一个历史版本（本地快照）作为对比基准，返回 (差异, 基准名称)；未选择时返回 None
+    差异结果随当前工作簿缓存，同一对版本只比较一次
+    """
+    labels = recent_snapshot_labels(exclude=workbook.key)
+    if not labels:
+        return None
+    key = st.sidebar.selectbox(
+        "🔀 与历史版本对比", [None] + list(labels),
+        format_func=lambda k: "（不对比）" if k is None else labels[k],
+    )
+    if key is None:
+        return None
+    try:
+        base = get_workbook_cache().get_or_load(key, lambda: open_snapshot(key))
+    except Exception as e:
+        st.sidebar.error(f"历史版本读取失败: {str(e)}")
+        return None
+    if base is None:
+        st.sidebar.error("历史版本快照已失效")
+        return None
+    diff = workbook.derived_latest('diff', key, lambda df: diff_frames(base.frame, df))
+    return diff, labels[key]
+
+def changes_table(changes):
+    """
+    变动明细的显示形式：原值/新值统一转为文本，避免混合类型列无法传给前端
+    """
+    return changes.assign(原值=changes['原值'].map(format_value), 新值=changes['新值'].map(format_value))
+
+def render_diff_overview(diff, base_label):
+    companies = diff.changed_companies()
+    with st.expander(f"🔀 与「{base_label}」相比：{len(companies)} 个公司、{len(diff)} 处变动", expanded=False):
+        if diff.added_companies:
+            st.caption("新增公司：" + "、".join(map(str, diff.added_companies)))
+        if diff.removed_companies:
+            st.caption("删除公司：" + "、".join(map(str, diff.removed_companies)))
+        if diff.added_columns or diff.removed_columns:
+            st.caption("列变动：新增 " + ("、".join(diff.added_columns) or "无") + "；删除 " + ("、".join(diff.removed_columns) or "无"))
+        col_companies, col_fields = st.columns([1, 1])
+        with col_companies:
+            st.dataframe(companies.rename('变动单元格数'), use_container_width=True)
+        with col_fields:
+            st.dataframe(diff.changed_fields().rename('涉及公司数'), use_container_width=True)
+        st.dataframe(changes_table(diff.changes()), use_container_width=True, hide_index=True)
+
+def render_revisions(revisions, *columns):
+    """
+    在数值下方标出本公司相对基准版本被修订的字段及原值
+    """
+    for column in columns:
+        if revisions and column in revisions:
+            st.markdown(revision_tag(column, revisions[column][0]), unsafe_allow_html=True)
+
+def build_company_results(row):
+    """
+    一个公司的全部派生结果：指标、图表和固定成本表格 HTML，只依赖该公司的一行数据
+    """
+    with timed('results/metrics'):
+        metrics = company_metrics(row)
+    with timed('results/figures'):
+        figures = build_company_figures(row)
+    with timed('results/html'):
+        fixed_cost_html = fixed_cost_table_html(metrics['fixed_costs'])
+    return {'metrics': metrics, 'figures': figures, 'fixed_cost_html': fixed_cost_html}
+
+def company_results_key(workbook, view_mode, selected_company):
+    """
+    单个公司的结果按行指纹缓存，不同版本中未变动的公司共用同一份结果；
+    集团合并和层级节点的子树合计随任一公司变化，按工作簿缓存
+    """
+    if view_mode == GROUP_ROLLUP_NAME:
+        return (workbook.key, GROUP_ROLLUP_NAME)
+    if view_mode == HIERARCHY_VIEW:
+        return (workbook.key, 'subtree', selected_company)
+    return ('company', workbook.derived('fingerprints', row_fingerprints)[selected_company])
+
+def choose_scenario():
+    """
+    侧边栏的情景参数；返回不为 0 的参数，全部为 0 时为空字典（即基准）
+    """
+    scenario = {}
+    with st.sidebar.expander("🧪 情景模拟", expanded=False):
+        for name, (label, unit, low, high, step) in SCENARIO_PARAMETERS.items():
+            scenario[name] = st.number_input(
+                f"{label}（{unit}）", min_value=low, max_value=high, value=0.0, step=step, key=f'scenario:{name}'
+            )
+    return {name: value for name, value in scenario.items() if value}
+
+def scenario_index(workbook, scenario):
+    """
+    情景数据帧的公司索引，按工作簿和情景参数只计算一次
+    """
+    return get_scenario_cache().get_or_create(
+        (workbook.key, scenario_key(scenario)), lambda: CompanyIndex(apply_scenario(workbook.frame, scenario))
+    )
+
+def build_scenario_results(workbook, view_mode, selected_company, scenario):
+    """
+    当前公司（或集团合并、层级节点）在情景下的指标和图表：情景数据帧和层级树按工作簿和参数只计算一次，
+    单个公司的结果与基准一样按行指纹缓存
+    """
+    key = scenario_key(scenario)
+    index = scenario_index(workbook, scenario)
+    if view_mode == GROUP_ROLLUP_NAME:
+        row = get_scenario_cache().get_or_create(
+            (workbook.key, key, GROUP_ROLLUP_NAME), lambda: build_group_rollup(index.frame)
+        )
+    elif view_mode == HIERARCHY_VIEW:
+        tree = get_scenario_cache().get_or_create((workbook.key, key, 'tree'), lambda: CompanyTree(index.frame))
+        row = tree.subtree_row(selected_company)
+    else:
+        row = index.record(selected_company)
+    return get_figure_cache().get_or_create(
+        ('scenario', key) + company_results_key(workbook, view_mode, selected_company),
+        lambda: build_company_results(row),
+    )
+
+def render_scenario_table(workbook, scenario):
+    """
+    全部公司在情景下的收入、净利润、经营现金流和资金缺口（基准、情景、变动），可导出 CSV
+    """
+    index = scenario_index(workbook, scenario)
+    table = get_scenario_cache().get_or_create(
+        (workbook.key, scenario_key(scenario), 'table'), lambda: scenario_table(workbook.frame, index.frame)
+    )
+    with st.expander(f"📋 全部 {len(table)} 个公司的情景结果", expanded=False):
+        st.dataframe(
+            table, use_container_width=True, hide_index=True,
+            column_config={column: st.column_config.NumberColumn(format="%.0f") for column in table.columns[1:]},
+        )
+        st.download_button(
+            "导出 CSV", table.to_csv(index=False).encode('utf-8-sig'),
+            file_name="budget_scenario.csv", mime="text/csv", key='scenario_csv',
+        )
+
+def scenario_amount_tag(value, base):
+    delta = None if value is None or base is None else value - base
+    return scenario_tag(format_wan(value), None if delta is None else f"{delta:+,.0f} 万元")
+
+def scenario_rate_tag(value, base):
+    delta = None if value is None or base is None else value - base
+    return scenario_tag(format_percent(value), None if delta is None else f"{delta:+.1f} 个百分点")
+
+def invalidate_revised_companies(workbook):
+    """
+    同一会话换成修订后的工作簿时，按公司比较行指纹：
+    只清除有变动或已删除的公司旧版本的缓存结果，未变动的公司继续命中缓存
+    """
+    fingerprints = workbook.derived('fingerprints', row_fingerprints)
+    previous = st.session_state.get('_previous_fingerprints')
+    if previous is not None and previous['key'] != workbook.key:
+        old = previous['fingerprints']
+        stale = [fp for name, fp in old.items() if fingerprints.get(name) != fp]
+        get_figure_cache().invalidate([('company', fp) for fp in stale])
+        changed = sum(1 for name, fp in fingerprints.items() if old.get(name) != fp)
+        note = f"与上一版本相比：{changed} 个公司有变动，{len(fingerprints) - changed} 个公司沿用已缓存的结果"
+    else:
+        note = previous['note'] if previous is not None else None
+    st.session_state['_previous_fingerprints'] = {'key': workbook.key, 'fingerprints': fingerprints, 'note': note}
+    if note:
+        st.sidebar.caption(note)
+
+def render_schema_report(schema):
+    if not (schema.ambiguous or schema.missing_fields or schema.missing_columns):
+        return
+    with st.sidebar.expander("⚠️ 表头检查", expanded=False):
+        for field, candidates in schema.ambiguous.items():
+            st.caption(f"{field} 匹配到多列，使用「{schema[field]}」：" + "、".join(candidates))
+        if schema.missing_fields:
+            st.caption("未找到的备注/文本字段：" + "、".join(schema.missing_fields))
+        if schema.missing_columns:
+            st.caption("未找到的数据列（按空值/0 显示）：" + "、".join(schema.missing_columns))
+
+def format_bytes(nbytes):
+    return f"{nbytes / 1024 / 1024:.1f} MB" if nbytes >= 1024 * 1024 else f"{nbytes / 1024:.0f} KB"
+
+def render_cache_stats(workbook):
+    stats = get_workbook_cache().stats()
+    st.sidebar.caption(
+        f"解析缓存：命中 {stats['hits']} 次 / 未命中 {stats['misses']} 次 · "
+        f"{stats['entries']}/{stats['max_entries']} 个工作簿 · "
+        f"{stats['bytes'] / 1024 / 1024:.1f}/{stats['max_bytes'] / 1024 / 1024:.0f} MB"
+    )
+    fig_stats = get_figure_cache().stats()
+    st.sidebar.caption(
+        f"公司结果缓存：命中 {fig_stats['hits']} 次 / 未命中 {fig_stats['misses']} 次 · "
+        f"{fig_stats['entries']}/{fig_stats['max_entries']} 个公司 · 因修订清除 {fig_stats['invalidations']} 个"
+    )
+    # 工作簿由所有会话共享，会话自身只保存控件状态、指纹等少量数据
+    session_bytes = approx_nbytes({key: st.session_state[key] for key in st.session_state})
+    st.sidebar.caption(
+        f"内存：当前工作簿 {format_bytes(workbook.nbytes)}（所有会话共享）· 本会话 {format_bytes(session_bytes)}"
+    )
+
+def get_timing_log():
+    """
+    当前会话的耗时记录；未开启诊断模式时返回 None
+    """
+    if not st.session_state.get('diagnostics'):
+        return None
+    if '_timing_log' not in st.session_state:
+        st.session_state['_timing_log'] = TimingLog(max_runs=DIAGNOSTICS_RUNS)
+    return st.session_state['_timing_log']
+
+def timed_section(name):
+    """
+    为看板的一个部分计时；fragment 单独重跑时记为一次局部运行
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            log = get_timing_log()
+            if log is None:
+                return fn(*args, **kwargs)
+            with log.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def render_diagnostics(log):
+    """
+    侧边栏诊断面板：本次运行的分阶段耗时、各阶段分位数、总耗时分布，以及原始数据导出
+    只能测量服务端脚本的执行时间，浏览器接收和渲染的时间不在其中
+    """
+    if not log.runs:
+        return
+    last = next((run for run in reversed(log.runs) if run['label'] != 'partial'), log.runs[-1])
+    with st.sidebar.expander("🩺 耗时诊断", expanded=True):
+        total = last['stages'].get('total')
+        st.caption(f"最近 {len(log.runs)} 次运行" + (f"；本次脚本 {total * 1000:,.0f} 毫秒" if total else ""))
+        # 只画顶层阶段，子阶段（含 "/"）已包含在其所属阶段中
+        breakdown = pd.Series({
+            stage: seconds * 1000 for stage, seconds in last['stages'].items()
+            if '/' not in stage and stage != 'total'
+        }, name='毫秒', dtype='float64')
+        st.bar_chart(breakdown, horizontal=True)
+        st.dataframe(log.summary().round(1), use_container_width=True)
+        st.caption("整页运行总耗时分布（毫秒）")
+        st.bar_chart(log.histogram('total'))
+        col_csv, col_json = st.columns(2)
+        col_csv.download_button("导出 CSV", log.to_csv(), file_name="budget_timings.csv", mime="text/csv")
+        col_json.download_button("导出 JSON", log.to_json(), file_name="budget_timings.json", mime="application/json")
+
+@st.fragment
+@timed_section('section:核心指标')
+def render_kpis(metrics, revisions=None, scenario=None):
+    """
+    核心指标：营业收入、净利润、综合毛利率；scenario 为情景结果时在基准值下方并列情景值
+    """
+    # --- 第一部分：核心指标 ---
+    # 指标计算在 budget_core.company_metrics 中完成，这里只负责展示
+    revenue = metrics['revenue']
+    net_profit = metrics['net_profit']
+    
+    # 格式化 - 使用文字显示变化
+    rev_change = format_change(revenue['2026'], revenue['2025'])
+    prof_change = format_change(net_profit['2026'], net_profit['2025'])
+    
+    margin_26_str = metrics['gross_margin_text']['2026']
+    margin_25_str = metrics['gross_margin_text']['2025']
+
+    # 显示指标
+    k1, k2, k3 = st.columns(3)
+    
+    with k1:
+        st.markdown(f"###  2026年营业收入")
+        st.markdown(f"<div style='font-size:1.8rem; font-weight:bold; margin:10px 0; color:#0052cc;'>{format_wan(revenue['2026'])}</div>", unsafe_allow_html=True)
+        st.markdown(f"<div style='font-size:1.1rem; color:#666; margin-bottom:5px;'>2025年：{format_wan(revenue['2025'])}</div>", unsafe_allow_html=True)
+        st.markdown(rev_change, unsafe_allow_html=True)
+        if scenario is not None:
+            st.markdown(scenario_amount_tag(scenario['metrics']['revenue']['2026'], revenue['2026']), unsafe_allow_html=True)
+        render_revisions(revisions, '2026年营业收入', '2025年营业收入')
+    
+    with k2:
+        st.markdown(f"###  2026年净利润")
+        st.markdown(f"<div style='font-size:1.8rem; font-weight:bold; margin:10px 0; color:#0052cc;'>{format_wan(net_profit['2026'])}</div>", unsafe_allow_html=True)
+        st.markdown(f"<div style='font-size:1.1rem; color:#666; margin-bottom:5px;'>2025年：{format_wan(net_profit['2025'])}</div>", unsafe_allow_html=True)
+        st.markdown(prof_change, unsafe_allow_html=True)
+        if scenario is not None:
+            st.markdown(scenario_amount_tag(scenario['metrics']['net_profit']['2026'], net_profit['2026']), unsafe_allow_html=True)
+        render_revisions(revisions, '2026净利润', '2025净利润')
+    
+    with k3:
+        st.markdown(f"###  2026年综合毛利率") 
+        st.markdown(f"<div style='font-size:1.8rem; font-weight:bold; margin:10px 0; color:#0052cc;'>{margin_26_str}</div>", unsafe_allow_html=True)
+        st.markdown(f"<div style='font-size:1.1rem; font-weight:bold; color:#333; margin-bottom:5px;'>2025年：{margin_25_str}</div>", unsafe_allow_html=True)
+        if scenario is not None:
+            st.markdown(scenario_rate_tag(scenario['metrics']['gross_margin']['2026'], metrics['gross_margin']['2026']), unsafe_allow_html=True)
+        render_revisions(revisions, '2026毛利率', '2025毛利率')
+
+@st.fragment
+@timed_section('section:收入分析')
+def render_revenue_section(row, schema, figures, revisions=None, scenario=None):
+    """
+    收入分析：季度趋势、收入变动备注、集团内外分布；情景模拟时季度趋势图左右并列基准和情景
+    """
+    # --- 第二部分：收入分析 ---
+    st.markdown('<div class="section-title"> 收入分析</div>', unsafe_allow_html=True)
+    
+    # 收入折线图 - 独占整行
+    st.markdown("#####  季度收入趋势对比")
+    if scenario is None:
+        st.plotly_chart(figures['quarterly'], use_container_width=True)
+    else:
+        col_base, col_scenario = st.columns(2)
+        with col_base:
+            st.caption("基准")
+            st.plotly_chart(figures['quarterly'], use_container_width=True, key='quarterly_base')
+        with col_scenario:
+            st.caption("🧪 情景")
+            st.plotly_chart(scenario['figures']['quarterly'], use_container_width=True, key='quarterly_scenario')
+    render_revisions(revisions, *[f'{q}{y}' for y in ('25', '26') for q in QUARTERS])
+    
+    # 备注和集团内外占比放在折线图下方
+    col_remark, col_pie = st.columns([1, 1])
+    
+    with col_remark:
+        st.markdown("#####  收入变动备注")
+        remark_text = schema.get(row, 'revenue_remark')
+        st.info(f"**环比变动原因：**\n\n{remark_text}")
+        render_revisions(revisions, schema['revenue_remark'])
+    
+    with col_pie:
+        st.markdown("#####  集团内外收入分布")
+        fig_group = figures['group_pie']
+        if fig_group is not None:
+            st.plotly_chart(fig_group, use_container_width=True)
+        else:
+            st.info("暂无集团内外数据")
+        render_revisions(revisions, '集团内', '集团外')
+
+@st.fragment
+@timed_section('section:费用与成本')
+def render_expense_section(row, schema, metrics, figures, revisions=None, scenario=None):
+    """
+    费用与成本：费用结构饼图和各项费用说明；情景模拟时并列情景下的费用结构和费率
+    """
+    # --- 第三部分：费用分析 (左图右文) ---
+    st.markdown('<div class="section-title"> 费用与成本</div>', unsafe_allow_html=True)
+    col_exp_chart, col_exp_text = st.columns([1, 1])
+
+    with col_exp_chart:
+        fig_pie = figures['expense_pie']
+        if fig_pie is not None:
+            st.plotly_chart(fig_pie, use_container_width=True)
+        else:
+            st.write("暂无费用数据")
+        if scenario is not None and scenario['figures']['expense_pie'] is not None:
+            st.caption("🧪 情景下的费用结构")
+            st.plotly_chart(scenario['figures']['expense_pie'], use_container_width=True, key='expense_pie_scenario')
+
+    with col_exp_text:
+        st.markdown("#####  费用明细说明")
+        tab1, tab2, tab3, tab4 = st.tabs(["销售", "管理", "研发", "毛利备注"])
+        
+        # 备注列名较长，实际列名在加载时已由 ColumnSchema 解析
+        scenario_items = scenario['metrics']['expenses'] if scenario is not None else [None] * len(EXPENSE_ITEMS)
+        for tab, item, scenario_item, (_, amount_col, rate_col, _) in zip(
+            (tab1, tab2, tab3), metrics['expenses'], scenario_items, EXPENSE_ITEMS
+        ):
+            with tab:
+                st.write(f"**金额:** {format_wan(item['amount'])} | **费率:** {item['rate_text']}")
+                if scenario_item is not None:
+                    st.markdown(
+                        scenario_amount_tag(scenario_item['amount'], item['amount']) + " "
+                        + scenario_rate_tag(scenario_item['rate'], item['rate']),
+                        unsafe_allow_html=True,
+                    )
+                render_revisions(revisions, amount_col, rate_col, schema[item['remark_field']])
+                note = schema.get(row, item['remark_field'])
+                st.markdown(format_text_list(note), unsafe_allow_html=True)
+            
+        with tab4:
+            render_revisions(revisions, schema['margin_remark'])
+            note = schema.get(row, 'margin_remark')
+            st.markdown(format_text_list(note), unsafe_allow_html=True)
+
+@st.fragment
+@timed_section('section:固定成本费用')
+def render_fixed_cost_section(metrics, table_html, revisions=None):
+    """
+    固定成本费用树形表格
+    """
+    # --- 固定成本费用部分 (树形表格) ---
+    st.markdown('<div class="section-title">固定成本费用</div>', unsafe_allow_html=True)
+    
+    st.markdown(table_html, unsafe_allow_html=True)
+    render_revisions(revisions, *[item['name'] for item in metrics['fixed_costs']])
+
+@st.fragment
+@timed_section('section:现金流量')
+def render_cash_flow_section(row, schema, metrics, revisions=None, scenario=None):
+    """
+    资金投入与现金流量情况；情景模拟时在经营活动现金流和资金缺口下方并列情景值
+    """
+    # --- 资金缺口部分（费用后面）结合现金流量情况 ---
+    st.markdown('<div class="section-title"> 资金投入与现金流量情况</div>', unsafe_allow_html=True)
+    
+    # 第一行：现金流量指标
+    *cash_items, cash_gap = metrics['cash_flow']
+    scenario_cash = scenario['metrics']['cash_flow'] if scenario is not None else None
+    cash_cols = st.columns(4)
+    
+    for i, (cash_col, item, (_, column)) in enumerate(zip(cash_cols, cash_items, CASH_FLOW_ITEMS)):
+        with cash_col:
+            st.markdown(f"#####  {item['name']}")
+            color = cash_color(item['amount'])
+            st.markdown(f"<div style='font-size:1.6rem; font-weight:bold; color:{color};'>{format_wan(item['amount'])}</div>", unsafe_allow_html=True)
+            # 情景只影响经营活动现金流
+            if scenario_cash is not None and i == 0:
+                st.markdown(scenario_amount_tag(scenario_cash[i]['amount'], item['amount']), unsafe_allow_html=True)
+            render_revisions(revisions, column)
+    
+    with cash_cols[3]:
+        st.markdown(f"#####  {cash_gap['name']}")
+        st.markdown(f"<div style='font-size:1.6rem; font-weight:bold; color:#0052cc;'>{format_wan(cash_gap['amount'])}</div>", unsafe_allow_html=True)
+        if scenario_cash is not None:
+            st.markdown(scenario_amount_tag(scenario_cash[-1]['amount'], cash_gap['amount']), unsafe_allow_html=True)
+        render_revisions(revisions, CASH_FLOW_ITEMS[-1][1])
+    
+    # 第二行：资金缺口说明
+    st.markdown("#####  资金缺口说明")
+    render_revisions(revisions, schema['funding_remark'])
+    fund_note = schema.get(row, 'funding_remark')
+    # 资金缺口说明使用黑色字体
+    st.markdown(f"<div style='color:#1f1f1f; font-size:1rem; background:#f0f5ff; padding:20px; border-radius:8px;'>{format_text_list(fund_note, color='#1f1f1f')}</div>", unsafe_allow_html=True)
+
+@st.fragment
+@timed_section('section:小结与关注')
+def render_summary_section(row, schema, revisions=None):
+    """
+    预算执行小结与提请管理层关注
+    """
+    # --- 第四部分：底部小结 ---
+    st.markdown("<h3 style='font-size:1.5rem; font-weight:bold;'> 2026年预算执行小结</h3>", unsafe_allow_html=True)
+    render_revisions(revisions, schema['summary'])
+    summary_text = schema.get(row, 'summary', '暂无小结')
+    # 小结部分使用黑色字体，按"1、2、3、"分段
+    st.markdown(f"<div style='font-size:1.1rem; line-height:1.8; color:#1f1f1f;'>{format_text_list(summary_text, color='#1f1f1f')}</div>", unsafe_allow_html=True)
+    
+    # --- 提请管理层关注 (放在预算小结下方) ---
+    st.markdown("---")
+    st.markdown("<h3 style='font-size:1.5rem; font-weight:bold;'> 提请管理层关注</h3>", unsafe_allow_html=True)
+    render_revisions(revisions, schema['attention'])
+    attention_text = schema.get(row, 'attention')
+    st.markdown(f"<div class='attention-box'>{format_text_list(attention_text, color='#d46b08')}</div>", unsafe_allow_html=True)
+
+def default_checks(workbook):
+    """
+    按默认容差检查全部公司的勾稽关系，结果随工作簿缓存
+    """
+    tolerance, relative = tolerance_from_env()
+    return workbook.derived('default_checks', lambda df: check_consistency(df, tolerance, relative))
+
+def render_company_checks(workbook, company):
+    """
+    单个公司视图顶部提示本公司未通过的勾稽检查
+    """
+    exceptions = default_checks(workbook)
+    rows = exceptions[exceptions['公司简称'] == company]
+    if len(rows):
+        st.warning("勾稽检查未通过：" + "；".join(
+            f"{r['检查项']}（差额 {r['差额']:,.2f} 万元）" for _, r in rows.iterrows()
+        ))
+
+def render_check_view(workbook):
+    """
+    数据校验页面：全部公司的勾稽关系不符记录，可按任意列排序
+    """
+    st.title("数据校验")
+    st.markdown("合计与明细之和不符的记录（差额 = 填报值 - 明细合计）")
+    default_tolerance, default_relative = tolerance_from_env()
+    col_abs, col_rel = st.columns(2)
+    tolerance = col_abs.number_input("绝对容差（万元）", min_value=0.0, value=default_tolerance, step=0.5)
+    relative = col_rel.number_input("相对容差（%）", min_value=0.0, value=default_relative, step=0.1)
+
+    with timed('checks'):
+        exceptions = workbook.derived_latest(
+            'checks', (tolerance, relative), lambda df: check_consistency(df, tolerance, relative)
+        )
+    if exceptions.empty:
+        st.success(f"全部 {len(workbook.frame)} 个公司均通过勾稽检查")
+        return
+
+    k1, k2 = st.columns(2)
+    k1.metric("不符记录", f"{len(exceptions)} 条")
+    k2.metric("涉及公司", f"{exceptions['公司简称'].nunique()} 个")
+    st.dataframe(
+        exceptions['检查项'].value_counts().rename('不符公司数'), use_container_width=True
+    )
+    st.dataframe(
+        exceptions, use_container_width=True, hide_index=True,
+        column_config={
+            col: st.column_config.NumberColumn(format="%.2f") for col in ['填报值', '明细合计', '差额', '差额占比(%)']
+        },
+    )
+
+def search_index(workbook):
+    """
+    工作簿文本字段的倒排索引，随工作簿缓存，每个版本只构建一次
+    """
+    schema = workbook.derived('schema', lambda df: ColumnSchema(df.columns))
+    return workbook.derived('search_index', lambda df: SearchIndex(df, schema))
+
+def render_search_view(workbook):
+    """
+    全文搜索页面：在当前工作簿和选中的历史版本中搜索备注、小结和提请管理层关注
+    """
+    st.title("全文搜索")
+    st.markdown("搜索各公司的备注、小结和提请管理层关注，多个词以空格分隔时需同时出现")
+    col_query, col_versions = st.columns([2, 3])
+    query = col_query.text_input("关键词", placeholder="例如：应收账款 风险")
+    labels = recent_snapshot_labels(exclude=workbook.key)
+    base_keys = col_versions.multiselect(
+        "同时搜索历史版本", list(labels), format_func=lambda k: labels[k]
+    ) if labels else []
+
+    sources = [("当前版本", workbook)]
+    for key in base_keys:
+        try:
+            base = get_workbook_cache().get_or_load(key, lambda: open_snapshot(key))
+        except Exception as e:
+            st.warning(f"历史版本读取失败: {str(e)}")
+            continue
+        if base is not None:
+            sources.append((labels[key], base))
+
+    with timed('search/index'):
+        indexes = [(label, search_index(source)) for label, source in sources]
+    if not query.strip():
+        st.caption(f"已建立索引：{sum(len(index) for _, index in indexes)} 段文本")
+        return
+
+    start = time.perf_counter()
+    with timed('search/query'):
+        hits = [(label, hit) for label, index in indexes for hit in index.search(query)]
+    elapsed = (time.perf_counter() - start) * 1000
+    st.caption(f"共 {len(hits)} 条结果，涉及 {len({hit['company'] for _, hit in hits})} 个公司（{elapsed:.1f} 毫秒）")
+    if len(hits) > SEARCH_RESULT_LIMIT:
+        st.caption(f"仅显示前 {SEARCH_RESULT_LIMIT} 条，请增加关键词缩小范围")
+
+    blocks = []
+    for label, hit in hits[:SEARCH_RESULT_LIMIT]:
+        version = f" · {label}" if len(sources) > 1 else ""
+        blocks.append(
+            f'<div class="search-hit"><div class="search-meta"><b>{html.escape(str(hit["company"]))}</b>'
+            f' · {hit["field"]}{version}</div>{highlight_snippet(hit["text"], hit["spans"])}</div>'
+        )
+    st.markdown("".join(blocks), unsafe_allow_html=True)
+
+def open_company(table_key, table):
+    """
+    排名或对比表格选中一行时切换到该公司的单个公司页面（在下次运行、控件创建之前修改其状态）
+    """
+    rows = st.session_state[table_key].selection.rows
+    if rows:
+        st.session_state['view_mode'] = COMPANY_VIEW
+        st.session_state['company'] = table.iloc[rows[0]]['公司简称']
+
+def render_rank_view(workbook):
+    """
+    公司排名页面：按所选指标列出前 N 名和后 N 名，点击表格中的公司进入单个公司页面
+    """
+    st.title("公司排名")
+    col_metric, col_n = st.columns([3, 1])
+    metric = col_metric.selectbox(
+        "排名指标", list(RANKING_METRICS), format_func=lambda m: RANKING_METRICS[m][0]
+    )
+    n = col_n.number_input("显示名次数", min_value=1, max_value=100, value=10, step=1)
+
+    with timed('ranking'):
+        ranking = workbook.derived('ranking', CompanyRanking)
+        tables = [("前", ranking.top(metric, n)), ("后", ranking.top(metric, n, largest=False))]
+    st.caption(f"共 {ranking.count(metric)} 个公司参与排名（指标缺失的公司不参与）；点击表格中的行查看该公司")
+
+    for column, (side, table) in zip(st.columns(2), tables):
+        with column:
+            st.markdown(f"#### {RANKING_METRICS[metric][0]} {side} {n} 名")
+            table_key = f'rank_{side}_{metric}'
+            st.dataframe(
+                table, use_container_width=True, hide_index=True, key=table_key,
+                on_select=functools.partial(open_company, table_key, table), selection_mode='single-row',
+                column_config={table.columns[-1]: st.column_config.NumberColumn(format="%.2f")},
+            )
+
+def compare_column_config(columns):
+    config = {}
+    for column in columns:
+        if column in COLUMN_GROUPS['占比']:
+            config[column] = st.column_config.ProgressColumn(format="%.0f%%", min_value=0, max_value=100)
+        elif column in COLUMN_GROUPS['费用率']:
+            config[column] = st.column_config.NumberColumn(format="%.1f%%")
+        elif column in COLUMN_GROUPS['金额']:
+            config[column] = st.column_config.NumberColumn(format="%.0f")
+    return config
+
+def render_compare_view(workbook):
+    """
+    对比表格页面：全部公司的固定成本主要项目、占比和期间费用率
+    数值表以 Arrow 格式整表发送，前端表格按需渲染可见行，点击表头排序；点击行查看该公司
+    """
+    st.title("公司对比")
+    with timed('compare'):
+        frame = workbook.derived('comparison', comparison_frame)
+    col_name, col_groups = st.columns([1, 2])
+    name = col_name.text_input("按公司简称筛选", key='compare_name').strip()
+    groups = col_groups.multiselect("显示的列", list(COLUMN_GROUPS), default=list(COLUMN_GROUPS), key='compare_groups')
+    parents = None
+    if has_hierarchy(frame):
+        parents = st.multiselect("上级公司", frame[PARENT_COLUMN].cat.categories.tolist(), key='compare_parents')
+
+    with timed('compare/filter'):
+        table = filter_comparison(frame, name, parents)
+        labels = [column for column in LABEL_COLUMNS if column in table.columns]
+        columns = ['公司简称', *labels, *[column for group in groups for column in COLUMN_GROUPS[group]]]
+        table = table[columns]
+    st.caption(
+        f"共 {len(table)} / {len(frame)} 个公司 · 表格数据 {format_bytes(table.memory_usage(deep=True).sum())}；"
+        "点击表头排序，点击行查看该公司"
+    )
+    st.dataframe(
+        table, use_container_width=True, hide_index=True, height=640, key='compare_table',
+        on_select=functools.partial(open_company, 'compare_table', table), selection_mode='single-row',
+        column_config=compare_column_config(columns),
+    )
+
+def render_company_view(workbook, company_index, schema, view_mode):
+    """
+    单个公司、集团合并或集团层级中某一节点的看板页面
+    """
+    tree = None
+    if view_mode == GROUP_ROLLUP_NAME:
+        # 集团合并：全部公司整列汇总一次，结果随工作簿缓存；列名与单个公司一致，下方渲染逻辑共用
+        selected_company = GROUP_ROLLUP_NAME
+        row = workbook.derived('group_rollup', build_group_rollup)
+    elif view_mode == HIERARCHY_VIEW:
+        # 集团层级：层级树和全部子树的前缀和随工作簿构建一次，任一节点的合计直接由前缀和相减得到
+        with timed('hierarchy'):
+            tree = workbook.derived('tree', CompanyTree)
+        if st.session_state.get('tree_node') not in tree:
+            st.session_state.pop('tree_node', None)
+        selected_company = st.sidebar.selectbox("选择层级节点", tree.nodes, format_func=tree.label, key='tree_node')
+        row = tree.subtree_row(selected_company)
+    else:
+        # 从排名等页面跳转时已在 session_state 中指定公司；换了工作簿后不存在的公司不再保留
+        if st.session_state.get('company') not in company_index:
+            st.session_state.pop('company', None)
+        selected_company = st.sidebar.selectbox("选择公司主体", company_index.companies, key='company')
+
+        # 获取选中行数据
+        row = company_index.record(selected_company)
+    with timed('diff'):
+        comparison = choose_base_version(workbook)
+    scenario = choose_scenario()
+
+    # --- 顶部标题区 ---
+    st.title(f"{selected_company}")
+    st.markdown("2026年全面预算概览")
+    if view_mode == GROUP_ROLLUP_NAME:
+        st.caption(f"合并口径：{row['公司数量']} 个公司主体数值直接加总，未做内部交易抵销；毛利率按收入加权，费用率按合计重新计算")
+    elif view_mode == HIERARCHY_VIEW:
+        st.caption(f"子树合计：本级及全部下级共 {row['公司数量']} 个公司主体数值直接加总，未做内部交易抵销；毛利率按收入加权，费用率按合计重新计算")
+        if tree.cycles:
+            st.warning("以下公司的上级关系形成循环，已作为顶层节点显示：" + "、".join(map(str, tree.cycles)))
+        st.markdown(entity_tree_table_html(tree.table_rows(selected_company)), unsafe_allow_html=True)
+    else:
+        render_company_checks(workbook, selected_company)
+
+    # 指标、图表和表格按公司行指纹缓存，st.plotly_chart 不会修改传入的图表
+    with timed('results'):
+        results = get_figure_cache().get_or_create(
+            company_results_key(workbook, view_mode, selected_company), lambda: build_company_results(row)
+        )
+    metrics = results['metrics']
+    figures = results['figures']
+
+    # 情景模拟：各部分在基准值旁并列显示情景值
+    scenario_results = None
+    if scenario:
+        with timed('scenario'):
+            scenario_results = build_scenario_results(workbook, view_mode, selected_company, scenario)
+        st.info(f"🧪 情景模拟：{scenario_label(scenario)}。毛利和费用的变动全额计入净利润（税前口径），并同额计入经营活动现金流和资金缺口")
+        render_scenario_table(workbook, scenario)
+
+    # 版本对比：全部公司的变动概览；单个公司视图中标出本公司被修订的数值
+    revisions = None
+    if comparison is not None:
+        diff, base_label = comparison
+        render_diff_overview(diff, base_label)
+        if view_mode == COMPANY_VIEW:
+            revisions = diff.company_changes(selected_company)
+            if revisions:
+                with st.expander(f"✎ 本公司有 {len(revisions)} 处修订", expanded=True):
+                    st.dataframe(changes_table(diff.changes([selected_company])), use_container_width=True, hide_index=True)
+
+    # 各部分是独立的 fragment：部分内部的交互只重新执行该部分，不重跑整个页面
+    render_kpis(metrics, revisions, scenario_results)
+    st.markdown("---")
+    render_revenue_section(row, schema, figures, revisions, scenario_results)
+    st.markdown("---")
+    render_expense_section(row, schema, metrics, figures, revisions, scenario_results)
+    st.markdown("---")
+    render_fixed_cost_section(metrics, results['fixed_cost_html'], revisions)
+    st.markdown("---")
+    render_cash_flow_section(row, schema, metrics, revisions, scenario_results)
+    st.markdown("---")
+    render_summary_section(row, schema, revisions)
+
+# --- 侧边栏 ---
+st.sidebar.header("控制面板")
+st.sidebar.toggle("🩺 诊断模式", value=DIAGNOSTICS_DEFAULT, key='diagnostics', help="记录每次运行各阶段的耗时")
+timing_log = get_timing_log()
+if timing_log is not None:
+    timing_log.start_run()
+uploaded_files = st.sidebar.file_uploader(
+    "📂 上传2026预算小结 (Excel，可同时选择各子公司的文件)", type=["xlsx"], accept_multiple_files=True
+)
+submission_dir = None
+if SUBMISSION_DIR:
+    dir_name = os.path.basename(os.path.normpath(SUBMISSION_DIR))
+    if st.sidebar.toggle(f"📁 或读取提交目录「{dir_name}」中的全部 xlsx", value=True, key='use_submission_dir'):
+        submission_dir = SUBMISSION_DIR
+
+with timed('load'):
+    if len(uploaded_files) == 1:
+        workbook = load_data(uploaded_files[0])
+    elif uploaded_files:
+        workbook = load_submissions_data(
+            get_files_key(uploaded_files),
+            lambda: [(f.name, f.getvalue()) for f in uploaded_files],
+            f"{uploaded_files[0].name} 等 {len(uploaded_files)} 个文件",
+        )
+    elif submission_dir:
+        paths = list_submissions(submission_dir) if os.path.isdir(submission_dir) else []
+        if paths:
+            label = f"{os.path.basename(os.path.normpath(submission_dir))} 目录 {len(paths)} 个文件"
+            workbook = load_submissions_data(get_directory_key(paths), lambda: paths, label)
+        else:
+            st.sidebar.error("目录不存在或其中没有 xlsx 文件")
+            workbook = None
+    else:
+        workbook = open_recent_snapshot()
+
+if workbook is not None or uploaded_files or submission_dir:
+    if workbook is not None:
+        # 公司索引随工作簿缓存，切换公司时直接按位置取行
+        company_index = workbook.derived('company_index', CompanyIndex)
+        schema = workbook.derived('schema', lambda df: ColumnSchema(df.columns))
+        render_schema_report(schema)
+        invalidate_revised_companies(workbook)
+        if company_index.duplicates:
+            st.sidebar.warning(
+                "以下公司简称重复出现，仅显示第一行数据：" + "、".join(map(str, company_index.duplicates))
+            )
+        # 有上级公司列（或层级工作表）的工作簿才显示集团层级；换了没有层级的工作簿后回到默认页面
+        views = [COMPANY_VIEW, GROUP_ROLLUP_NAME, RANK_VIEW, COMPARE_VIEW, CHECK_VIEW, SEARCH_VIEW]
+        if workbook.derived('has_hierarchy', has_hierarchy):
+            views.insert(2, HIERARCHY_VIEW)
+        if st.session_state.get('view_mode') not in views:
+            st.session_state.pop('view_mode', None)
+        view_mode = st.sidebar.radio("查看范围", views, horizontal=True, key='view_mode')
+        
+        if view_mode == CHECK_VIEW:
+            render_check_view(workbook)
+        elif view_mode == SEARCH_VIEW:
+            render_search_view(workbook)
+        elif view_mode == RANK_VIEW:
+            render_rank_view(workbook)
+        elif view_mode == COMPARE_VIEW:
+            render_compare_view(workbook)
+        else:
+            render_company_view(workbook, company_index, schema, view_mode)
+
+else:
+    st.info("请在左侧上传 Excel 文件 (2026预算小结.xlsx)")
+
+# 缓存统计放在最后渲染，包含本次运行的命中情况
+if workbook is not None:
+    render_cache_stats(workbook)
+
+# 诊断面板最后渲染，包含本次运行的全部阶段
+if timing_log is not None:
+    timing_log.finish_run()
+    render_diagnostics(timing_log)
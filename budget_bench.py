@@ -0,0 +1,173 @@
+"""
+看板数据层的性能基准：按不同规模生成模拟工作簿，测量解析耗时、峰值内存和逐公司计算耗时
+
+用法：
+    python budget_bench.py --sizes 20,200,1000 --extra-columns 100 --json bench.json
+
+每个规模报告以下阶段：
+    parse:<loader>   load_budget_frame() 读取并规整整个工作簿（与看板上传后的 load_data() 相同）
+    clean_header     两行表头展平（pandas 读取的原始表头）
+    metrics          company_metrics() 逐公司计算
+    text             format_text_list() 处理全部备注/文本字段
+    html             render_company_body() 生成单个公司的报告正文（不含图表）
+    figures          build_company_figures() 构建 Plotly 图表（--figures 时）
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from budget_core import HEADER_ROWS, TEXT_FIELDS, load_budget_frame, clean_header, company_metrics, CompanyIndex
+from budget_report import format_text_list, render_company_body
+from budget_sample import write_sample_workbook, sample_columns
+
+RESULT_FIELDS = ['companies', 'columns', 'stage', 'seconds', 'per_company_ms', 'peak_mb']
+
+
+def best_time(fn, repeat=1):
+    """
+    重复执行取最短耗时（秒），同时返回最后一次的结果
+    """
+    best, result = float('inf'), None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(fn):
+    """
+    单独执行一次并记录 Python 层（含 numpy/pandas 缓冲区）分配的峰值内存，单位 MB
+    计时和测内存分开执行，避免 tracemalloc 的开销计入耗时
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def bench_workbook(path, companies, columns, loaders=('stream', 'full'), repeat=1, figures=False, sample=None):
+    """
+    对一个工作簿执行全部阶段，返回结果字典列表（字段见 RESULT_FIELDS）
+    sample 指定时逐公司阶段只取前 sample 个公司
+    """
+    results = []
+
+    def record(stage, seconds, count=None, peak=None):
+        results.append({
+            'companies': companies,
+            'columns': columns,
+            'stage': stage,
+            'seconds': round(seconds, 4),
+            'per_company_ms': round(seconds / count * 1000, 3) if count else None,
+            'peak_mb': round(peak, 1) if peak is not None else None,
+        })
+
+    loaded = None
+    for loader in loaders:
+        seconds, loaded = best_time(lambda: load_budget_frame(path, loader), repeat)
+        record(f'parse:{loader}', seconds, companies, peak_memory(lambda: load_budget_frame(path, loader)))
+    if loaded is None:
+        loaded = load_budget_frame(path)
+    df, schema, _ = loaded
+
+    raw = pd.read_excel(path, header=list(HEADER_ROWS), engine='openpyxl')
+    seconds, _ = best_time(lambda: clean_header(raw.copy(deep=False)), repeat)
+    record('clean_header', seconds)
+
+    index = CompanyIndex(df)
+    names = index.companies[:sample] if sample else index.companies
+    records = [index.record(name) for name in names]
+
+    seconds, _ = best_time(lambda: [company_metrics(r) for r in records], repeat)
+    record('metrics', seconds, len(records))
+
+    def format_texts():
+        for r in records:
+            for field in TEXT_FIELDS:
+                format_text_list(schema.get(r, field))
+    seconds, _ = best_time(format_texts, repeat)
+    record('text', seconds, len(records))
+
+    seconds, _ = best_time(lambda: [render_company_body(r, schema, r.name, {}) for r in records], repeat)
+    record('html', seconds, len(records))
+
+    if figures:
+        from budget_charts import build_company_figures
+        seconds, _ = best_time(lambda: [build_company_figures(r) for r in records], repeat)
+        record('figures', seconds, len(records))
+    return results
+
+
+def run_benchmark(sizes, extra_columns=0, workdir=None, **options):
+    """
+    依次生成各规模的工作簿并测量，返回全部结果
+    workdir 为空时使用临时目录，结束后删除生成的文件
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for companies in sizes:
+            path = os.path.join(workdir, f'bench_{companies}x{extra_columns}.xlsx')
+            if not os.path.exists(path):
+                write_sample_workbook(path, companies=companies, extra_columns=extra_columns)
+            columns = len(sample_columns(extra_columns))
+            results += bench_workbook(path, companies, columns, **options)
+            print(f"  {companies} 个公司 × {columns} 列 完成")
+    return results
+
+
+def format_results(results):
+    lines = [f"{'公司数':>8} {'列数':>6}  {'阶段':<14} {'耗时(秒)':>10} {'每公司(毫秒)':>12} {'峰值内存(MB)':>12}"]
+    for r in results:
+        per_company = '' if r['per_company_ms'] is None else f"{r['per_company_ms']:.3f}"
+        peak = '' if r['peak_mb'] is None else f"{r['peak_mb']:.1f}"
+        lines.append(
+            f"{r['companies']:>8} {r['columns']:>6}  {r['stage']:<14} {r['seconds']:>10.4f} {per_company:>12} {peak:>12}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='预算看板数据层性能基准')
+    parser.add_argument('--sizes', default='20,200,1000', help='公司数量，逗号分隔（默认 20,200,1000）')
+    parser.add_argument('--extra-columns', type=int, default=0, help='每个工作簿追加的数值列数量（默认 0）')
+    parser.add_argument('--loaders', default='stream,full', help='参与测量的读取方式，逗号分隔（默认 stream,full）')
+    parser.add_argument('--repeat', type=int, default=1, help='每个阶段重复次数，取最短耗时（默认 1）')
+    parser.add_argument('--sample', type=int, default=None, help='逐公司阶段最多测量的公司数（默认全部）')
+    parser.add_argument('--figures', action='store_true', help='同时测量 Plotly 图表构建')
+    parser.add_argument('--workdir', default=None, help='保留生成的工作簿的目录（默认使用临时目录）')
+    parser.add_argument('--json', default=None, help='结果写入 JSON 文件')
+    parser.add_argument('--csv', default=None, help='结果写入 CSV 文件')
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    loaders = [s.strip() for s in args.loaders.split(',') if s.strip()]
+    results = run_benchmark(
+        sizes, extra_columns=args.extra_columns, workdir=args.workdir,
+        loaders=loaders, repeat=args.repeat, figures=args.figures, sample=args.sample,
+    )
+    print(format_results(results))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.csv:
+        with open(args.csv, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == '__main__':
+    main()
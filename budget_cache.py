@@ -0,0 +1,237 @@
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict, deque
+
+import pandas as pd
+
+
+def content_hash(data):
+    """
+    计算上传文件内容的 SHA-256，作为工作簿缓存的键
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def approx_nbytes(value, _seen=None):
+    """
+    会话状态等对象占用内存的粗略估计（字节）：数据帧按 memory_usage(deep=True) 计，容器和普通对象递归累加
+    共享缓存中的 CachedWorkbook 不属于任何会话，不计入
+    """
+    seen = set() if _seen is None else _seen
+    if id(value) in seen or isinstance(value, CachedWorkbook):
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_nbytes(k, seen) + approx_nbytes(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        size += sum(approx_nbytes(v, seen) for v in value)
+    elif hasattr(value, '__dict__'):
+        size += approx_nbytes(vars(value), seen)
+    return size
+
+
+class CachedWorkbook:
+    """
+    缓存中的一个已解析工作簿：数据帧 + 按需构建的派生结果
+    所有会话共享同一个对象，调用方不得原地修改 frame
+    """
+
+    def __init__(self, key, frame, source_rows=None, **derived):
+        self.key = key
+        self.frame = frame
+        self.source_rows = len(frame) if source_rows is None else source_rows
+        self._frame_nbytes = int(frame.memory_usage(deep=True).sum())
+        # 解析阶段已经得到的派生结果可以直接传入，例如原始表头的字段映射
+        self._derived = {}
+        self._derived_nbytes = {}
+        self._lock = threading.RLock()
+        for name, value in derived.items():
+            self._store(name, value)
+
+    @property
+    def nbytes(self):
+        """
+        数据帧和全部派生结果的内存占用（字节），派生结果在构建时估计一次
+        """
+        return self._frame_nbytes + sum(self._derived_nbytes.values())
+
+    def _store(self, name, value):
+        # 调用方需持有 self._lock；派生结果中引用的数据帧本身不重复计入
+        self._derived[name] = value
+        self._derived_nbytes[name] = approx_nbytes(value, {id(self.frame)})
+
+    def derived(self, name, builder):
+        """
+        同一工作簿的派生结果只构建一次，builder 接收数据帧作为参数
+        """
+        with self._lock:
+            if name not in self._derived:
+                self._store(name, builder(self.frame))
+            return self._derived[name]
+
+    def derived_latest(self, name, params, builder):
+        """
+        随页面参数变化的派生结果（对比的历史版本、检查容差等）：每个名称只保留最近一组参数的结果，
+        参数变化时重新构建并替换旧结果，来回切换参数不会让缓存无限增长
+        """
+        with self._lock:
+            cached = self._derived.get(name)
+            if cached is None or cached[0] != params:
+                self._store(name, (params, builder(self.frame)))
+            return self._derived[name][1]
+
+
+class WorkbookCache:
+    """
+    按内容哈希索引的进程级 LRU 缓存
+    同时受条目数和内存预算约束，超出时淘汰最久未使用的工作簿
+    """
+
+    def __init__(self, max_entries=8, max_bytes=1024 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    @classmethod
+    def from_env(cls):
+        """
+        从环境变量读取缓存预算：BUDGET_CACHE_MAX_ENTRIES、BUDGET_CACHE_MAX_MB
+        """
+        max_entries = int(os.environ.get('BUDGET_CACHE_MAX_ENTRIES', 8))
+        max_mb = float(os.environ.get('BUDGET_CACHE_MAX_MB', 1024))
+        return cls(max_entries=max_entries, max_bytes=int(max_mb * 1024 * 1024))
+
+    def get_or_load(self, key, loader):
+        """
+        命中则直接返回缓存的工作簿；未命中时调用 loader() 构建 CachedWorkbook
+        同一个键的并发请求只解析一次，其余请求等待结果
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry
+                self.misses += 1
+            try:
+                entry = loader()
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+            if entry is not None:
+                self.put(entry)
+            return entry
+
+    def put(self, entry):
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            self._evict()
+
+    def _lookup(self, key):
+        # 调用方需持有 self._lock
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def _evict(self):
+        # 至少保留最新放入的一个条目，即使它本身超出内存预算
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self.total_bytes() > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def total_bytes(self):
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.total_bytes(),
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+
+class LRUCache:
+    """
+    通用的有界 LRU 缓存（线程安全），用于按 (工作簿, 公司) 缓存图表等派生结果
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        """
+        命中则返回缓存值，否则调用 factory() 构建并放入缓存
+        构建过程不持有锁，并发未命中时可能重复构建，以最后放入的结果为准
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = factory()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, keys):
+        """
+        删除指定的键（不存在的键忽略），返回实际删除的条目数
+        """
+        removed = 0
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    del self._entries[key]
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+            }
@@ -0,0 +1,141 @@
+"""
+看板图表：各函数返回 Plotly 图表对象，数据缺失时返回 None
+plotly 在首次构建图表时才导入，只读取数据或计算指标的脚本不会加载它
+"""
+import pandas as pd
+
+from budget_core import QUARTERS
+
+
+def _go():
+    import plotly.graph_objects as go
+    return go
+
+
+def quarterly_figure(row):
+    """
+    季度收入趋势对比折线图：2025 年预估与 2026 年预算
+    """
+    go = _go()
+    quarters = QUARTERS
+    y25 = [row[f'{q}25'] for q in quarters]
+    y26 = [row[f'{q}26'] for q in quarters]
+
+    fig = go.Figure()
+    # 2025灰色线条
+    fig.add_trace(go.Scatter(
+        x=quarters, y=y25,
+        name='2025年 (预估)',
+        mode='lines+markers+text',
+        line=dict(color='#95a5a6', width=4),
+        marker=dict(size=12, color='#95a5a6'),
+        text=[f'{v:,.0f} 万元' for v in y25],
+        textposition='top center',
+        textfont=dict(size=14, color='#666')
+    ))
+    # 2026蓝色线条
+    fig.add_trace(go.Scatter(
+        x=quarters, y=y26,
+        name='2026年 (预算)',
+        mode='lines+markers+text',
+        line=dict(color='#0052cc', width=4),
+        marker=dict(size=12, color='#0052cc'),
+        text=[f'{v:,.0f} 万元' for v in y26],
+        textposition='top center',
+        textfont=dict(size=16, color='#0052cc')
+    ))
+    fig.update_layout(
+        height=400,
+        margin=dict(l=60, r=60, t=60, b=60),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5,
+            font=dict(size=14)
+        ),
+        xaxis=dict(
+            title=dict(text="季度", font=dict(size=16)),
+            tickfont=dict(size=14)
+        ),
+        yaxis=dict(
+            title=dict(text="收入 (万元)", font=dict(size=16)),
+            tickfont=dict(size=14)
+        ),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+
+def group_pie_figure(row):
+    """
+    集团内外收入分布饼图；缺少数据时返回 None
+    """
+    in_group = row['集团内']
+    out_group = row['集团外']
+    if not (pd.notna(in_group) and pd.notna(out_group) and (in_group + out_group) > 0):
+        return None
+
+    go = _go()
+    # 直接构造 go.Pie，比 px.pie 省去数据帧整理和列映射，外观一致
+    fig_group = go.Figure(go.Pie(
+        labels=['集团内', '集团外'],
+        values=[in_group, out_group],
+        marker=dict(colors=['#0052cc', '#95a5a6']),
+        hovertemplate='类型=%{label}<br>金额=%{value}<extra></extra>'
+    ))
+    fig_group.update_traces(
+        textposition='inside',
+        textinfo='label+value+percent',
+        texttemplate='<b>%{label}</b><br>%{value:,.0f} 万元<br>(%{percent})',
+        textfont_size=14
+    )
+    fig_group.update_layout(
+        height=320,
+        margin=dict(l=10, r=10, t=10, b=10),
+        showlegend=False
+    )
+    return fig_group
+
+
+def expense_pie_figure(row):
+    """
+    2026 年期间费用结构饼图；费用合计不为正时返回 None
+    """
+    values = [row['2026销售费用'], row['2026管理费用'], row['2026研发费用']]
+    if not sum(v for v in values if pd.notna(v)) > 0:
+        return None
+
+    go = _go()
+    fig_pie = go.Figure(go.Pie(
+        labels=['销售', '管理', '研发'],
+        values=values,
+        marker=dict(colors=['#0052cc', '#4a90e2', '#74b9ff']),
+        hovertemplate='Type=%{label}<br>Value=%{value}<extra></extra>'
+    ))
+    fig_pie.update_traces(
+        textposition='inside',
+        textinfo='label+value+percent',
+        texttemplate='<b>%{label}</b><br>%{value:,.0f} 万元<br>(%{percent})',
+        textfont_size=14
+    )
+    fig_pie.update_layout(
+        title="2026年期间费用结构",
+        height=380,
+        margin=dict(l=20, r=20, t=50, b=20),
+        title_font_size=16
+    )
+    return fig_pie
+
+
+def build_company_figures(row):
+    """
+    一个公司看板上的全部图表；缺少数据的图表为 None
+    """
+    return {
+        'quarterly': quarterly_figure(row),
+        'group_pie': group_pie_figure(row),
+        'expense_pie': expense_pie_figure(row),
+    }
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from budget_core import QUARTERS, SALARY_COLUMNS, OTHER_FIXED_COLUMNS, blank_cells, unique_columns
+
+# 勾稽关系：(检查项, 合计列, 明细列)；合计应等于明细之和
+CONSISTENCY_RULES = (
+    ('固定成本费用合计 = 职工薪酬小计 + 其他固定成本', '固定成本费用合计', ('职工薪酬-小计', *OTHER_FIXED_COLUMNS)),
+    ('职工薪酬小计 = 四项职工薪酬', '职工薪酬-小计', SALARY_COLUMNS),
+    ('2026年营业收入 = 四个季度之和', '2026年营业收入', tuple(f'{q}26' for q in QUARTERS)),
+    ('2025年营业收入 = 四个季度之和', '2025年营业收入', tuple(f'{q}25' for q in QUARTERS)),
+    ('2026年营业收入 = 集团内 + 集团外', '2026年营业收入', ('集团内', '集团外')),
+)
+
+EXCEPTION_COLUMNS = ['公司简称', '检查项', '合计列', '填报值', '明细合计', '差额', '差额占比(%)']
+
+
+def tolerance_from_env():
+    """
+    默认容差：BUDGET_CHECK_TOLERANCE 为绝对容差（万元，默认 1），
+    BUDGET_CHECK_REL_TOLERANCE 为相对填报值的容差（百分比，默认 0）
+    """
+    return (
+        float(os.environ.get('BUDGET_CHECK_TOLERANCE', 1.0)),
+        float(os.environ.get('BUDGET_CHECK_REL_TOLERANCE', 0.0)),
+    )
+
+
+def check_consistency(df, tolerance=1.0, relative=0.0, rules=CONSISTENCY_RULES, key_column='公司简称'):
+    """
+    对全部公司一次性做整列运算，检查各项勾稽关系，返回不符的记录（每个公司每个检查项一行）
+    差额超过 max(tolerance, 填报值绝对值 × relative%) 才视为不符；
+    合计或明细在工作簿中全部为空（含整列缺失）时不检查，部分明细为空按 0 计；
+    规整时明细补了 0，是否为空按 blank_cells() 判断
+    """
+    frame = unique_columns(df)
+    names = frame[key_column].to_numpy()
+    pieces = []
+    for label, total_col, part_cols in rules:
+        if total_col not in frame.columns or not all(c in frame.columns for c in part_cols):
+            continue
+        total = frame[total_col].to_numpy(np.float64)
+        parts = frame[list(part_cols)].to_numpy(np.float64)
+        has_total = ~blank_cells(frame, [total_col])[:, 0]
+        has_parts = ~blank_cells(frame, part_cols).all(axis=1)
+        parts_sum = np.where(has_parts, np.nansum(parts, axis=1), np.nan)
+
+        diff = total - parts_sum
+        limit = np.maximum(tolerance, np.abs(total) * relative / 100)
+        checked = has_total & has_parts
+        bad = checked & (np.abs(diff) > limit)
+        if not bad.any():
+            continue
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            share = np.where(total[bad] != 0, diff[bad] / np.abs(total[bad]) * 100, np.nan)
+        pieces.append(pd.DataFrame({
+            '公司简称': names[bad],
+            '检查项': label,
+            '合计列': total_col,
+            '填报值': total[bad],
+            '明细合计': parts_sum[bad],
+            '差额': diff[bad],
+            '差额占比(%)': share,
+        }))
+
+    if not pieces:
+        return pd.DataFrame(columns=EXCEPTION_COLUMNS)
+    exceptions = pd.concat(pieces, ignore_index=True)
+    order = np.argsort(-np.abs(exceptions['差额'].to_numpy()), kind='stable')
+    return exceptions.iloc[order].reset_index(drop=True)
@@ -0,0 +1,73 @@
+"""
+跨公司对比表：固定成本主要项目和期间费用率，每个公司一行、每个项目一列
+整表为数值列（float32），由看板以 Arrow 格式整表发送给前端表格，排序、滚动在浏览器中完成：
+
+    frame = comparison_frame(数据帧)
+    filter_comparison(frame, name='子公司', parents=['公司0001'])
+"""
+import numpy as np
+import pandas as pd
+
+from budget_core import PARENT_COLUMN, company_rows
+
+# 固定成本对比项目：金额列，以及占固定成本费用合计的百分比列（列名加 "占比"）
+FIXED_COST_ITEMS = ('职工薪酬-小计', '折旧费', '房租物业费', '无形资产摊销')
+
+# 期间费用率
+EXPENSE_RATE_ITEMS = ('2026年销售费用率', '2026年管理费用率', '2026年研发费用率')
+
+# 每行的说明列：存在时一并带出，用于筛选
+LABEL_COLUMNS = (PARENT_COLUMN, '来源文件')
+
+# 列组：{组名: 列名}，对比页面可按组选择显示的列
+COLUMN_GROUPS = {
+    '金额': ('2026年营业收入', '固定成本费用合计', *FIXED_COST_ITEMS),
+    '占比': tuple(f'{item}占比' for item in FIXED_COST_ITEMS),
+    '费用率': EXPENSE_RATE_ITEMS,
+}
+
+
+def comparison_frame(df, key_column='公司简称'):
+    """
+    每个公司一行的对比数据：公司简称、说明列和 COLUMN_GROUPS 中的全部数值列
+    重复的公司简称取第一次出现的行，与 CompanyIndex 一致；固定成本费用合计为 0 或缺失时占比为缺失
+    """
+    frame = company_rows(df, key_column)
+
+    def column(name):
+        return frame[name].to_numpy(np.float64)
+
+    out = {key_column: frame[key_column].astype(object).astype(str).to_numpy()}
+    for name in LABEL_COLUMNS:
+        if name in frame.columns:
+            out[name] = frame[name].to_numpy()
+
+    total = column('固定成本费用合计')
+    for name in COLUMN_GROUPS['金额']:
+        out[name] = column(name)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for item in FIXED_COST_ITEMS:
+            out[f'{item}占比'] = np.where(total != 0, column(item) / total * 100, np.nan)
+    for name in EXPENSE_RATE_ITEMS:
+        out[name] = column(name)
+
+    result = pd.DataFrame(out)
+    # 数值列统一为 float32：发送给前端的 Arrow 数据量减半，显示精度足够
+    numeric = [name for group in COLUMN_GROUPS.values() for name in group]
+    result[numeric] = result[numeric].astype(np.float32)
+    for name in LABEL_COLUMNS:
+        if name in result.columns:
+            result[name] = result[name].astype('category')
+    return result
+
+
+def filter_comparison(frame, name='', parents=None, key_column='公司简称'):
+    """
+    按公司简称（包含 name，不区分大小写）和上级公司筛选；条件为空时不筛选，返回原数据帧
+    """
+    mask = np.ones(len(frame), dtype=bool)
+    if name:
+        mask &= frame[key_column].str.contains(name, case=False, regex=False).to_numpy()
+    if parents and PARENT_COLUMN in frame.columns:
+        mask &= frame[PARENT_COLUMN].isin(parents).to_numpy()
+    return frame if mask.all() else frame[mask]
@@ -0,0 +1,755 @@
+import functools
+import hashlib
+import zipfile
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+
+from budget_timing import timed
+
+# 表头位于第 12、13 行（0 起始为 11、12），之前是说明性的前言行
+HEADER_ROWS = (11, 12)
+
+QUARTERS = ['1Q', '2Q', '3Q', '4Q']
+
+# 看板各视图读取的列（clean_header 之后的列名）
+VIEW_COLUMNS = (
+    '公司简称',
+    '2025年营业收入', '2026年营业收入',
+    '2025净利润', '2026净利润',
+    '2025毛利率', '2026毛利率',
+    *[f'{q}25' for q in QUARTERS],
+    *[f'{q}26' for q in QUARTERS],
+    '集团内', '集团外',
+    '2026销售费用', '2026管理费用', '2026研发费用',
+    '2026年销售费用率', '2026年管理费用率', '2026年研发费用率',
+    '固定成本费用合计',
+    '职工薪酬-小计', '职工薪酬-销售', '职工薪酬-管理', '职工薪酬-生产', '职工薪酬-研发',
+    '折旧费', '房租物业费', '其他', '长期待摊费用', '无形资产摊销',
+    '经营活动产生的现金流量净额', '投资活动产生的现金流量净额', '筹资活动产生的现金流量净额',
+    '资金投入（缺口）',
+    '小结', '提请管理层关注',
+)
+
+# 文本字段的逻辑名 → 候选列名，按顺序尝试：先找完全同名的列，再找包含该关键字的列
+TEXT_FIELDS = {
+    'revenue_remark': ('备注1：收入环比变动原因', '备注1'),
+    'margin_remark': ('备注2',),
+    'sales_remark': ('备注3',),
+    'admin_remark': ('备注4',),
+    'rd_remark': ('备注5（请填写',),
+    'funding_remark': ('备注5：', '资金缺口'),
+    'summary': ('小结',),
+    'attention': ('提请管理层关注',),
+}
+
+# 核心指标金额：缺失时保留 NaN，由界面显示为 "-"
+AMOUNT_COLUMNS = (
+    '2025年营业收入', '2026年营业收入',
+    '2025净利润', '2026净利润',
+    '集团内', '集团外',
+)
+
+# 明细金额：缺失按 0 处理
+ZERO_FILL_COLUMNS = (
+    *[f'{q}25' for q in QUARTERS],
+    *[f'{q}26' for q in QUARTERS],
+    '2026销售费用', '2026管理费用', '2026研发费用',
+    '固定成本费用合计',
+    '职工薪酬-小计', '职工薪酬-销售', '职工薪酬-管理', '职工薪酬-生产', '职工薪酬-研发',
+    '折旧费', '房租物业费', '其他', '长期待摊费用', '无形资产摊销',
+    '经营活动产生的现金流量净额', '投资活动产生的现金流量净额', '筹资活动产生的现金流量净额',
+    '资金投入（缺口）',
+)
+
+# 规整时补 0 的明细金额中原本为空的单元格：按 ZERO_FILL_COLUMNS 的顺序逐位记录的整数标记，
+# 勾稽检查据此区分"填报为 0"和"未填报"；不是工作簿中的数据，版本对比时不参与比较
+BLANK_DETAIL_COLUMN = '明细空白标记'
+
+# 比率列：统一换算为百分数（23.5 表示 23.5%）
+RATE_COLUMNS = (
+    '2025毛利率', '2026毛利率',
+    '2026年销售费用率', '2026年管理费用率', '2026年研发费用率',
+)
+
+# 比率列中绝对值小于该阈值的数视为小数形式（0.235），否则视为已是百分数
+FRACTION_THRESHOLD = 5
+
+# 备注列名较长且各版本模板略有差异，按关键字包含匹配；上级公司列用于层级结构
+VIEW_COLUMN_KEYWORDS = ('备注', '资金缺口', '上级', '母公司')
+
+# 层级结构：每个公司的上级公司统一放在 PARENT_COLUMN 列中
+# 来源为主表中的上级公司列（按 PARENT_ALIASES 依次匹配），或名称包含 HIERARCHY_SHEETS 之一的工作表
+PARENT_COLUMN = '上级公司'
+PARENT_ALIASES = ('上级公司', '上级单位', '母公司')
+HIERARCHY_SHEETS = ('层级', '组织架构')
+
+# 金额列转为 float32 的条件：全部取值的误差都在该范围内（万元，即 10 元）
+COMPACT_TOLERANCE = 1e-3
+
+# 文本列中不同取值占比低于该比例时转为分类类型，重复的文本只保存一份
+CATEGORY_RATIO = 0.5
+
+
+def flatten_header_name(c1, c2):
+    """
+    将两行表头的一列合并为单个列名，规则见 clean_header()
+    """
+    c1 = str(c1).strip()
+    c2 = str(c2).strip()
+
+    # 逻辑：如果第二行是 Unnamed（即没有子标题），就用第一行
+    # 如果第二行有实意（例如 1Q25），就优先用第二行
+    if 'Unnamed' in c2 or c2 == 'nan':
+        final_col = c1
+    else:
+        final_col = c2
+
+    # 清理换行符和多余空格
+    return final_col.replace('\n', '').replace('\r', '').replace(' ', '')
+
+
+def clean_header(df):
+    """
+    处理Excel的多级表头（合并单元格），将其展平为单层列名
+    """
+    # col 是一个元组，例如 ('2025年度收入按季度分', '1Q25') 或 ('2026年\n营业收入', 'Unnamed: 5_level_1')
+    df.columns = [flatten_header_name(col[0], col[1]) for col in df.columns]
+    return df
+
+
+def read_workbook(source):
+    """
+    用 pandas 完整读取工作簿的全部列，并展平表头
+    """
+    # 关键修改：header=[11, 12] 读取两行作为表头（处理合并单元格）
+    df = pd.read_excel(source, header=list(HEADER_ROWS), engine='openpyxl')
+    return clean_header(df)
+
+
+def is_view_column(name, columns=VIEW_COLUMNS, keywords=VIEW_COLUMN_KEYWORDS):
+    return name in columns or any(k in name for k in keywords)
+
+
+def load_budget_frame(source, loader='stream'):
+    """
+    读取并规整工作簿，返回 (数据帧, 字段映射, 原始行数)；缺少'公司简称'列时返回 None
+    loader 为 stream 时流式读取看板用到的列，为 full 时用 pandas 读取全部列
+    """
+    with timed('load/read'):
+        if loader == 'full':
+            df = read_workbook(source)
+        else:
+            df = read_workbook_streaming(source)
+    source_rows = len(df)
+
+    # 过滤掉空行
+    if '公司简称' not in df.columns:
+        return None
+    with timed('load/hierarchy'):
+        df = attach_hierarchy(df, source)
+    # 字段映射基于规整前的原始列解析，缺失的看板列能够如实报告
+    schema = ColumnSchema(df.columns)
+    with timed('load/normalize'):
+        df = normalize_frame(df[df['公司简称'].notna()])
+    with timed('load/compact'):
+        df = compact_frame(df)
+    return df, schema, source_rows
+
+
+def workbook_sheet_names(source):
+    """
+    工作表名称列表：只读取压缩包中的 xl/workbook.xml，不解析共享字符串和工作表内容
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    with zipfile.ZipFile(source) as archive:
+        root = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    return [sheet.get('name') for sheet in root.iter() if sheet.tag.rsplit('}', 1)[-1] == 'sheet']
+
+
+def read_hierarchy_sheet(source, sheets=HIERARCHY_SHEETS):
+    """
+    读取层级工作表，返回 {公司简称: 上级公司}；工作表中表头行需含"公司简称"和上级公司列（或其别名）
+    工作簿中没有层级工作表时返回空字典；只有存在层级工作表时才用 openpyxl 打开工作簿
+    """
+    import openpyxl
+
+    name = next((n for n in workbook_sheet_names(source) if any(k in n for k in sheets)), None)
+    if name is None:
+        return {}
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        mapping = {}
+        columns = None
+        for row in wb[name].iter_rows(values_only=True):
+            if columns is None:
+                cells = ['' if c is None else str(c).strip() for c in row]
+                parent = next((cells.index(a) for a in PARENT_ALIASES if a in cells), None)
+                if '公司简称' in cells and parent is not None:
+                    columns = (cells.index('公司简称'), parent)
+                continue
+            key, parent = (row[i] if i < len(row) else None for i in columns)
+            if key is not None and parent is not None and str(parent).strip():
+                mapping.setdefault(str(key).strip(), str(parent).strip())
+        return mapping
+    finally:
+        wb.close()
+
+
+def attach_hierarchy(df, source):
+    """
+    层级映射统一为 PARENT_COLUMN 列：主表已有上级公司列（或别名）时直接使用，
+    否则从同一工作簿的层级工作表中按公司简称补上；两者都没有时原样返回
+    """
+    for alias in PARENT_ALIASES:
+        if alias in df.columns:
+            return df if alias == PARENT_COLUMN else df.rename(columns={alias: PARENT_COLUMN})
+    mapping = read_hierarchy_sheet(source)
+    if not mapping:
+        return df
+    return df.assign(**{PARENT_COLUMN: df['公司简称'].map(lambda name: mapping.get(str(name).strip()))})
+
+
+def _fill_header_row(row, control_row):
+    """
+    与 pandas 读取多行表头时的处理一致：合并单元格只在左上角有值，
+    空白单元格向右沿用前一个值，但不跨越上一行已经分段的位置
+    """
+    row = list(row)
+    if not row:
+        return row, control_row
+    last = row[0]
+    for i in range(1, len(row)):
+        if not control_row[i]:
+            last = row[i]
+        if row[i] == '' or row[i] is None:
+            row[i] = last
+        else:
+            control_row[i] = False
+            last = row[i]
+    return row, control_row
+
+
+def resolve_header(top, bottom):
+    """
+    由两行原始表头单元格得到展平后的列名列表
+    """
+    width = max(len(top), len(bottom))
+    top = list(top) + [None] * (width - len(top))
+    bottom = list(bottom) + [None] * (width - len(bottom))
+
+    control_row = [True] * width
+    top, control_row = _fill_header_row(top, control_row)
+    bottom, control_row = _fill_header_row(bottom, control_row)
+
+    names = []
+    for i, (c1, c2) in enumerate(zip(top, bottom)):
+        if c1 is None or c1 == '':
+            c1 = f'Unnamed: {i}_level_0'
+        if c2 is None or c2 == '':
+            c2 = f'Unnamed: {i}_level_1'
+        names.append(flatten_header_name(c1, c2))
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def _projected_parser_class():
+    """
+    按需构建只转换选中列单元格的工作表解析器类；openpyxl 内部结构变动时返回 None，退回公开接口
+    openpyxl 在首次读取工作簿时才导入，只做计算的脚本不需要加载它
+    """
+    try:
+        from openpyxl.worksheet._reader import WorkSheetParser
+    except ImportError:
+        return None
+
+    class _ProjectedSheetParser(WorkSheetParser):
+        """
+        只转换选中列单元格的工作表解析器
+        未选中的单元格仅读取坐标即跳过，省去类型转换和字典构造
+        """
+        selected = None
+
+        def parse_row(self, row):
+            r = row.get('r')
+            self.row_counter = int(r) if r else self.row_counter + 1
+            self.col_counter = 0
+            selected = self.selected
+            cells = []
+            for el in row:
+                coordinate = el.get('r')
+                if selected is not None and coordinate is not None \
+                        and coordinate.rstrip('0123456789') not in selected:
+                    continue
+                cells.append(self.parse_cell(el))
+            return self.row_counter, cells
+
+    return _ProjectedSheetParser
+
+
+def _iter_projected_rows(wb, ws, parser_class):
+    with ws._get_source() as src:
+        parser = parser_class(
+            src, ws._shared_strings, data_only=True, epoch=wb.epoch,
+            date_formats=wb._date_formats, timedelta_formats=wb._timedelta_formats,
+        )
+        for idx, cells in parser.parse():
+            yield idx, parser, {c['column']: c['value'] for c in cells}
+
+
+def _iter_sheet_rows(wb, ws):
+    """
+    逐行产出 (行号, 解析器, {列号: 值})；行号从 1 开始，空行不会产出
+    openpyxl 内部接口（私有属性、解析器构造参数）与预期不符而在产出第一行之前出错时，
+    退回公开的 iter_rows()，此时解析器为 None
+    """
+    parser_class = _projected_parser_class()
+    if parser_class is not None:
+        rows = _iter_projected_rows(wb, ws, parser_class)
+        try:
+            first = next(rows, None)
+        except (TypeError, AttributeError):
+            first = rows = None
+        if rows is not None:
+            if first is not None:
+                yield first
+                yield from rows
+            return
+
+    for idx, row in enumerate(ws.iter_rows(values_only=True), start=1):
+        yield idx, None, {i: v for i, v in enumerate(row, start=1) if v is not None}
+
+
+def read_workbook_streaming(source, columns=VIEW_COLUMNS, keywords=VIEW_COLUMN_KEYWORDS):
+    """
+    以 openpyxl 只读模式逐行读取工作簿，跳过前言行，只保留看板用到的列
+    表头解析规则与 read_workbook() 一致；columns 为 None 时保留全部列
+    """
+    import openpyxl
+    from openpyxl.utils import get_column_letter
+
+    top_row, bottom_row = HEADER_ROWS[0] + 1, HEADER_ROWS[1] + 1
+    wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        header = {}
+        names = positions = None
+        records = []
+
+        for idx, parser, cells in _iter_sheet_rows(wb, ws):
+            if idx < top_row:
+                continue
+            if idx <= bottom_row:
+                header[idx] = cells
+                continue
+
+            if names is None:
+                names, positions = _select_columns(header, top_row, bottom_row, columns, keywords)
+                if parser is not None and columns is not None:
+                    parser.selected = frozenset(get_column_letter(p) for p in positions)
+
+            values = [cells.get(p) for p in positions]
+            if any(v is not None for v in values):
+                records.append(values)
+    finally:
+        wb.close()
+
+    if names is None:
+        names, positions = _select_columns(header, top_row, bottom_row, columns, keywords)
+    return pd.DataFrame(records, columns=names)
+
+
+def _select_columns(header, top_row, bottom_row, columns, keywords):
+    top_cells = header.get(top_row, {})
+    bottom_cells = header.get(bottom_row, {})
+    width = max([*top_cells, *bottom_cells, 0])
+    top = [top_cells.get(i) for i in range(1, width + 1)]
+    bottom = [bottom_cells.get(i) for i in range(1, width + 1)]
+
+    names, positions = [], []
+    for i, name in enumerate(resolve_header(top, bottom), start=1):
+        if columns is None or name == '公司简称' or is_view_column(name, columns, keywords):
+            names.append(name)
+            positions.append(i)
+    return names, positions
+
+
+def _rate_to_percent(values):
+    """
+    将一整列比率换算为百分数；按整列中位数一次性判断是小数还是百分数，
+    不再逐个单元格判断。文本形式的 "15%" 按百分数读取
+    """
+    numeric = pd.to_numeric(values, errors='coerce')
+    if not pd.api.types.is_numeric_dtype(values):
+        text = values.where(numeric.isna()).astype('string').str.strip()
+        percent = pd.to_numeric(text.str.rstrip('%'), errors='coerce').where(text.str.endswith('%', na=False))
+    else:
+        percent = None
+
+    valid = numeric.dropna()
+    if len(valid) and valid.abs().median() < FRACTION_THRESHOLD:
+        numeric = numeric * 100
+    if percent is not None:
+        numeric = numeric.fillna(percent)
+    return numeric.astype(np.float32)
+
+
+def normalize_frame(df):
+    """
+    加载后的一次性类型规整：数值列整列转换为 float，比率列换算为百分数，
+    看板读取的数值列即使工作簿中缺失也会补齐，渲染时只需直接取值
+    明细金额补 0 之前原本为空（或整列缺失）的单元格记录在 BLANK_DETAIL_COLUMN 中
+    """
+    df = df.copy()
+    blank = np.zeros(len(df), dtype=np.int64)
+    seen = set()
+    targets = {}
+    for col in AMOUNT_COLUMNS:
+        targets[col] = 'amount'
+    for col in ZERO_FILL_COLUMNS:
+        targets[col] = 'zero'
+    for col in RATE_COLUMNS:
+        targets[col] = 'rate'
+
+    # 按位置赋值，重名列（例如多个"其他"）也能逐列处理
+    for i, name in enumerate(df.columns):
+        kind = targets.get(name)
+        if kind is None:
+            continue
+        values = df.iloc[:, i]
+        if kind == 'rate':
+            converted = _rate_to_percent(values)
+        else:
+            converted = pd.to_numeric(values, errors='coerce').astype(np.float64)
+            if kind == 'zero':
+                # 重名列只记录第一列，与 CompanyRecord 的取值规则一致
+                if name not in seen:
+                    seen.add(name)
+                    blank |= converted.isna().to_numpy().astype(np.int64) << ZERO_FILL_COLUMNS.index(name)
+                converted = converted.fillna(0.0)
+        df.isetitem(i, converted)
+
+    for name, kind in targets.items():
+        if name not in df.columns:
+            df[name] = 0.0 if kind == 'zero' else np.nan
+            if kind == 'rate':
+                df[name] = df[name].astype(np.float32)
+            if kind == 'zero':
+                blank |= 1 << ZERO_FILL_COLUMNS.index(name)
+    df[BLANK_DETAIL_COLUMN] = blank
+    return df
+
+
+def unique_columns(df):
+    """
+    重名列（例如多个"其他"）只保留第一列，与 CompanyRecord 按列名取值的规则一致
+    """
+    return df.loc[:, ~df.columns.duplicated()]
+
+
+def company_rows(df, key_column='公司简称'):
+    """
+    每个公司一行：重名列只保留第一列，去掉公司简称为空的行，重复的公司简称取第一次出现的行，与 CompanyIndex 一致
+    """
+    frame = unique_columns(df)
+    return frame[frame[key_column].notna() & ~frame[key_column].duplicated()]
+
+
+def blank_cells(df, columns):
+    """
+    各列在工作簿中是否为空：公司 × 列 的布尔矩阵
+    明细金额列按 BLANK_DETAIL_COLUMN 判断（规整时已补 0），其余列按当前值是否缺失判断
+    """
+    marks = df[BLANK_DETAIL_COLUMN].to_numpy(np.int64) if BLANK_DETAIL_COLUMN in df.columns else None
+    result = np.empty((len(df), len(columns)), dtype=bool)
+    for i, name in enumerate(columns):
+        if marks is not None and name in ZERO_FILL_COLUMNS:
+            result[:, i] = (marks >> ZERO_FILL_COLUMNS.index(name)) & 1 == 1
+        else:
+            result[:, i] = df[name].isna().to_numpy()
+    return result
+
+
+def compact_frame(df, key_column='公司简称'):
+    """
+    工作簿放入共享缓存前压缩内存，所有会话引用同一份压缩后的数据帧：
+    公司简称和重复较多的文本列转为分类类型；整数列缩小到能容纳的最小类型；
+    float64 列在 float32 能把全部取值表示到 COMPACT_TOLERANCE 以内时转为 float32，否则保持不变
+    """
+    df = df.copy(deep=False)
+    for i, name in enumerate(df.columns):
+        values = df.iloc[:, i]
+        if values.dtype == np.float64:
+            array = values.to_numpy()
+            compact = array.astype(np.float32)
+            error = np.abs(compact - array)
+            if not np.any(error[~np.isnan(array)] > COMPACT_TOLERANCE):
+                df.isetitem(i, pd.Series(compact, index=values.index))
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_extension_array_dtype(values):
+            df.isetitem(i, pd.to_numeric(values, downcast='integer'))
+        elif pd.api.types.infer_dtype(values, skipna=True) == 'string':
+            # 混有数字的文本列保持原样，快照写入时另行处理
+            if name == key_column or values.nunique() < len(values) * CATEGORY_RATIO:
+                df.isetitem(i, values.astype('category'))
+    return df
+
+
+def format_percent(value):
+    """
+    百分数显示为整数位，缺失显示 "-"
+    """
+    return f"{value:.0f}%" if pd.notna(value) else "-"
+
+
+class CompanyIndex:
+    """
+    公司简称 → 行位置的索引，每个工作簿只构建一次
+    重复的公司简称记录在 duplicates 中，查询时取第一次出现的行
+    """
+
+    def __init__(self, df, key_column='公司简称'):
+        self.frame = df
+        names = df[key_column].reset_index(drop=True)
+        first = ~names.duplicated()
+        self.companies = names[first].tolist()
+        self.positions = dict(zip(self.companies, np.flatnonzero(first.to_numpy()).tolist()))
+
+        repeated = names[names.duplicated(keep=False)]
+        self.duplicates = {
+            name: group.index.tolist() for name, group in repeated.groupby(repeated, sort=False)
+        }
+
+        # 重名列只取第一次出现的位置，与按列名取值的习惯保持一致
+        self.column_positions = {}
+        for i, name in enumerate(df.columns):
+            self.column_positions.setdefault(name, i)
+
+    def __len__(self):
+        return len(self.companies)
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def record(self, name):
+        return CompanyRecord(self, self.positions[name], name)
+
+
+def row_fingerprints(df, key_column='公司简称'):
+    """
+    每个公司一行规整后数据的指纹：{公司简称: 指纹}，整表一次向量化哈希
+    数值或文本任一单元格变化指纹即不同；列名也参与计算，模板列变动时全部公司都视为已变
+    重复的公司简称取第一次出现的行，与 CompanyIndex 一致
+    """
+    frame = unique_columns(df)
+    columns = hashlib.sha1('\x1f'.join(map(str, frame.columns)).encode('utf-8')).hexdigest()[:12]
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    fingerprints = {}
+    for name, value in zip(frame[key_column].tolist(), hashes.tolist()):
+        fingerprints.setdefault(name, f'{columns}-{value:016x}')
+    return fingerprints
+
+
+class CompanyRecord:
+    """
+    单个公司的只读行视图：按列名直接读取底层数据帧的单元格，不复制整行
+    """
+    __slots__ = ('_index', 'position', 'name')
+
+    def __init__(self, index, position, name):
+        self._index = index
+        self.position = position
+        self.name = name
+
+    @property
+    def index(self):
+        return self._index.frame.columns
+
+    def __getitem__(self, column):
+        return self._index.frame.iat[self.position, self._index.column_positions[column]]
+
+    def __contains__(self, column):
+        return column in self._index.column_positions
+
+    def get(self, column, default=None):
+        if column not in self._index.column_positions:
+            return default
+        return self[column]
+
+
+class ColumnSchema:
+    """
+    逻辑字段到实际列名的映射，每个工作簿在 clean_header() 之后解析一次
+    同时记录缺失的看板列和匹配到多个候选列的字段，便于排查模板变动
+    """
+
+    def __init__(self, columns, fields=TEXT_FIELDS, view_columns=VIEW_COLUMNS):
+        columns = [str(c) for c in columns]
+        present = set(columns)
+        self.raw_columns = columns
+        self.columns = {}
+        self.ambiguous = {}
+        for field, aliases in fields.items():
+            column, candidates = self._resolve(columns, present, aliases)
+            if column is not None:
+                self.columns[field] = column
+            if len(candidates) > 1:
+                self.ambiguous[field] = candidates
+
+        self.missing_fields = [f for f in fields if f not in self.columns]
+        self.missing_columns = [c for c in view_columns if c not in present]
+
+    @staticmethod
+    def _resolve(columns, present, aliases):
+        for alias in aliases:
+            if alias in present:
+                return alias, [alias]
+        for alias in aliases:
+            candidates = [c for c in columns if alias in c]
+            if candidates:
+                # 多个候选时取表中靠前的一列，并在 ambiguous 中报告
+                return candidates[0], candidates
+        return None, []
+
+    def __getitem__(self, field):
+        return self.columns.get(field)
+
+    def get(self, record, field, default='无'):
+        """
+        从公司记录中读取逻辑字段的值；字段未匹配到任何列时返回 default
+        """
+        column = self.columns.get(field)
+        if column is None:
+            return default
+        return record.get(column, default)
+
+
+GROUP_ROLLUP_NAME = '集团合并'
+
+# 比率列合并时所依据的金额列：毛利率按收入加权，费用率按费用合计 / 收入合计
+RATE_BASES = {
+    '2025毛利率': ('2025年营业收入', None),
+    '2026毛利率': ('2026年营业收入', None),
+    '2026年销售费用率': ('2026年营业收入', '2026销售费用'),
+    '2026年管理费用率': ('2026年营业收入', '2026管理费用'),
+    '2026年研发费用率': ('2026年营业收入', '2026研发费用'),
+}
+
+
+def build_group_rollup(df):
+    """
+    对全部公司做一次整列汇总，得到与单个公司相同列名的集团合并记录
+    金额直接加总（未做内部交易抵销）；比率由加总后的金额重新计算
+    """
+    frame = unique_columns(df)
+    # 压缩后的 float32 列按 float64 累加，避免大量公司相加时的精度损失
+    totals = pd.concat([
+        frame[list(AMOUNT_COLUMNS)].astype(np.float64).sum(min_count=1),
+        frame[list(ZERO_FILL_COLUMNS)].astype(np.float64).sum(),
+    ])
+
+    for rate_col, (revenue_col, expense_col) in RATE_BASES.items():
+        revenue = frame[revenue_col]
+        if expense_col is None:
+            weighted = frame[rate_col].astype(np.float64) * revenue
+            valid = weighted.notna()
+            base = revenue[valid].sum()
+            totals[rate_col] = weighted[valid].sum() / base if base else np.nan
+        else:
+            base = revenue.sum()
+            totals[rate_col] = totals[expense_col] / base * 100 if base else np.nan
+
+    totals['公司简称'] = GROUP_ROLLUP_NAME
+    totals['公司数量'] = len(df)
+    return totals
+
+
+# 期间费用：(名称, 金额列, 费率列, 备注字段)
+EXPENSE_ITEMS = (
+    ('销售', '2026销售费用', '2026年销售费用率', 'sales_remark'),
+    ('管理', '2026管理费用', '2026年管理费用率', 'admin_remark'),
+    ('研发', '2026研发费用', '2026年研发费用率', 'rd_remark'),
+)
+
+# 固定成本费用明细：职工薪酬子项挂在小计之下，其余项目直接挂在合计之下
+SALARY_COLUMNS = ('职工薪酬-销售', '职工薪酬-管理', '职工薪酬-生产', '职工薪酬-研发')
+OTHER_FIXED_COLUMNS = ('折旧费', '房租物业费', '其他', '长期待摊费用', '无形资产摊销')
+
+# 现金流量指标：(名称, 列名)
+CASH_FLOW_ITEMS = (
+    ('经营活动现金流', '经营活动产生的现金流量净额'),
+    ('投资活动现金流', '投资活动产生的现金流量净额'),
+    ('筹资活动现金流', '筹资活动产生的现金流量净额'),
+    ('资金缺口/投入', '资金投入（缺口）'),
+)
+
+
+def _number(value):
+    """
+    单元格数值转为 Python float，缺失为 None，便于直接序列化为 JSON
+    """
+    return None if pd.isna(value) else float(value)
+
+
+def _change(current, previous):
+    if current is None or previous is None:
+        return None
+    return current - previous
+
+
+def fixed_cost_breakdown(row):
+    """
+    固定成本费用树：[(层级, 列名, 金额, 占合计的百分比)]，层级 0 为合计、1 为小计及其他项目、2 为薪酬子项
+    """
+    total = row['固定成本费用合计']
+
+    def share(value):
+        return value / total * 100 if total else 0
+
+    items = [(0, '固定成本费用合计', total, 100), (1, '职工薪酬-小计', row['职工薪酬-小计'], share(row['职工薪酬-小计']))]
+    items += [(2, column, row[column], share(row[column])) for column in SALARY_COLUMNS]
+    items += [(1, column, row[column], share(row[column])) for column in OTHER_FIXED_COLUMNS]
+    return items
+
+
+def company_metrics(row):
+    """
+    单个公司（或集团合并记录）看板上展示的全部指标，只依赖 pandas，可在脚本和批处理中直接调用
+    row 为 CompanyRecord、pandas Series 或列名 → 值的字典；金额单位为万元，比率为百分数，缺失值为 None
+    """
+    revenue = {'2026': _number(row['2026年营业收入']), '2025': _number(row['2025年营业收入'])}
+    revenue['change'] = _change(revenue['2026'], revenue['2025'])
+    net_profit = {'2026': _number(row['2026净利润']), '2025': _number(row['2025净利润'])}
+    net_profit['change'] = _change(net_profit['2026'], net_profit['2025'])
+    gross_margin = {'2026': _number(row['2026毛利率']), '2025': _number(row['2025毛利率'])}
+
+    return {
+        'revenue': revenue,
+        'net_profit': net_profit,
+        'gross_margin': gross_margin,
+        'gross_margin_text': {year: format_percent(value) for year, value in gross_margin.items()},
+        'quarterly': {
+            'quarters': list(QUARTERS),
+            '2025': [_number(row[f'{q}25']) for q in QUARTERS],
+            '2026': [_number(row[f'{q}26']) for q in QUARTERS],
+        },
+        'revenue_mix': {'集团内': _number(row['集团内']), '集团外': _number(row['集团外'])},
+        'expenses': [
+            {
+                'name': name,
+                'amount': _number(row[amount_col]),
+                'rate': _number(row[rate_col]),
+                'rate_text': format_percent(row[rate_col]),
+                'remark_field': field,
+            }
+            for name, amount_col, rate_col, field in EXPENSE_ITEMS
+        ],
+        'fixed_costs': [
+            {'level': level, 'name': name, 'amount': _number(amount), 'share': _number(share)}
+            for level, name, amount, share in fixed_cost_breakdown(row)
+        ],
+        'cash_flow': [{'name': name, 'amount': _number(row[column])} for name, column in CASH_FLOW_ITEMS],
+    }
@@ -0,0 +1,154 @@
+"""
+同一预算小结不同版本之间的差异：按公司简称和列名对齐，一次整表比较得到单元格级变动
+不依赖界面，可在脚本中直接使用：
+
+    diff = diff_frames(旧版数据帧, 新版数据帧)
+    diff.changes()          # 每个变动单元格一行
+    diff.changed_companies() # 每个公司的变动单元格数
+"""
+import numpy as np
+import pandas as pd
+
+from budget_core import COMPACT_TOLERANCE, BLANK_DETAIL_COLUMN, company_rows
+
+# 数值列的比较容差：规整后的金额和百分数在此范围内视为未变；
+# 与压缩时 float32 的允许误差一致，同一数值在两个版本中精度不同也不算变动
+DEFAULT_TOLERANCE = COMPACT_TOLERANCE
+
+
+def _keyed(df, key):
+    """
+    以公司简称为索引；重名列和重复的公司简称都只保留第一次出现，与 CompanyIndex 的取值规则一致
+    规整时生成的空白标记列不是填报数据，不参与比较
+    """
+    frame = company_rows(df, key).drop(columns=BLANK_DETAIL_COLUMN, errors='ignore')
+    return frame.set_index(key)
+
+
+def _is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+class WorkbookDiff:
+    """
+    两个版本的对齐比较结果；changed 为 公司 × 列 的布尔矩阵，deltas 为数值列的差额（新 - 旧）
+    只在一个版本中出现的公司和列分别记录在 added_/removed_ 属性中，不参与单元格比较
+    """
+
+    def __init__(self, old, new, key='公司简称', tolerance=DEFAULT_TOLERANCE):
+        old = _keyed(old, key)
+        new = _keyed(new, key)
+        self.key = key
+
+        old_companies = set(old.index)
+        new_companies = set(new.index)
+        self.companies = pd.Index([c for c in new.index if c in old_companies], name=key)
+        self.added_companies = [c for c in new.index if c not in old_companies]
+        self.removed_companies = [c for c in old.index if c not in new_companies]
+
+        old_columns = set(old.columns)
+        new_columns = set(new.columns)
+        columns = [c for c in new.columns if c in old_columns]
+        self.added_columns = [c for c in new.columns if c not in old_columns]
+        self.removed_columns = [c for c in old.columns if c not in new_columns]
+
+        before = old.loc[self.companies, columns]
+        after = new.loc[self.companies, columns]
+        numeric = [c for c in columns if _is_numeric(before[c]) and _is_numeric(after[c])]
+        numeric_set = set(numeric)
+        other = [c for c in columns if c not in numeric_set]
+
+        # 数值列整块转为 float64 比较；两边都缺失视为未变
+        a = before[numeric].to_numpy(np.float64)
+        b = after[numeric].to_numpy(np.float64)
+        numeric_changed = ~np.isclose(a, b, rtol=0, atol=tolerance, equal_nan=True)
+
+        # 文本及混合类型列按对象逐元素比较
+        a_obj = before[other].to_numpy(object)
+        b_obj = after[other].to_numpy(object)
+        other_changed = (a_obj != b_obj) & ~(pd.isna(a_obj) & pd.isna(b_obj))
+
+        self.before = before
+        self.after = after
+        self.deltas = pd.DataFrame(b - a, index=self.companies, columns=numeric)
+        self.changed = pd.concat([
+            pd.DataFrame(numeric_changed, index=self.companies, columns=numeric),
+            pd.DataFrame(other_changed, index=self.companies, columns=other),
+        ], axis=1)[columns]
+
+    @property
+    def columns(self):
+        return self.changed.columns
+
+    def __len__(self):
+        """
+        变动单元格总数
+        """
+        return int(self.changed.to_numpy().sum())
+
+    def changed_companies(self):
+        """
+        有变动的公司及其变动单元格数，按变动数从多到少排列
+        """
+        counts = self.changed.sum(axis=1)
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def changed_fields(self):
+        """
+        有变动的列及涉及的公司数，按公司数从多到少排列
+        """
+        counts = self.changed.sum(axis=0)
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def changes(self, companies=None):
+        """
+        变动明细，每个变动单元格一行：公司简称、字段、原值、新值、变动（数值列为差额，文本列为空）
+        companies 指定时只列出这些公司
+        """
+        changed = self.changed if companies is None else self.changed.loc[companies]
+        rows, cols = np.nonzero(changed.to_numpy())
+
+        # 只把涉及变动的行转为对象数组取值
+        touched = np.unique(rows)
+        before = self.before.loc[changed.index[touched]].to_numpy(object)
+        after = self.after.loc[changed.index[touched]].to_numpy(object)
+        local = np.searchsorted(touched, rows)
+        deltas = self.deltas.loc[changed.index[touched]].to_numpy()
+        delta_cols = self.deltas.columns.get_indexer(changed.columns[cols])
+        delta = np.full(len(rows), np.nan)
+        numeric = delta_cols >= 0
+        delta[numeric] = deltas[local[numeric], delta_cols[numeric]]
+
+        return pd.DataFrame({
+            self.key: changed.index[rows],
+            '字段': changed.columns[cols],
+            '原值': before[local, cols],
+            '新值': after[local, cols],
+            '变动': delta,
+        })
+
+    def company_changes(self, name):
+        """
+        单个公司的变动：{列名: (原值, 新值)}；公司不在两个版本中同时出现时为空
+        """
+        if name not in self.companies:
+            return {}
+        row = self.changed.loc[name]
+        return {
+            column: (self.before.at[name, column], self.after.at[name, column])
+            for column in row.index[row.to_numpy()]
+        }
+
+
+def diff_frames(old, new, key='公司简称', tolerance=DEFAULT_TOLERANCE):
+    """
+    比较同一工作簿的两个版本（旧 → 新），返回 WorkbookDiff
+    """
+    return WorkbookDiff(old, new, key=key, tolerance=tolerance)
+
+
+def diff_versions(frames, key='公司简称', tolerance=DEFAULT_TOLERANCE):
+    """
+    按时间顺序排列的多个版本，逐个与前一版比较，返回 [WorkbookDiff]
+    """
+    return [diff_frames(old, new, key=key, tolerance=tolerance) for old, new in zip(frames, frames[1:])]
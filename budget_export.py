@@ -0,0 +1,339 @@
+"""
+批量导出每个公司的预算看板为静态 HTML（不需要启动 Streamlit）
+
+用法：
+    python budget_export.py 2026预算小结.xlsx -o export --workers 8 --zip
+
+输出目录是一个可离线打开的静态站点：index.html 为公司列表，每个公司一个 HTML 文件；
+样式表、plotly.js 和图表渲染脚本（含共用的图表模板）只在 assets 目录写一份，各页面共同引用，
+页面中只内嵌紧凑的图表数据 JSON。--zip 另外打包为一个 zip 文件，便于邮件发送
+"""
+import argparse
+import html
+import json
+import math
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from budget_core import load_budget_frame, CompanyIndex, build_group_rollup, row_fingerprints, GROUP_ROLLUP_NAME
+from budget_core import format_percent, unique_columns
+from budget_report import render_company_body, render_page, page_css, format_amount
+
+ASSETS_DIR = 'assets'
+PLOTLY_JS = f'{ASSETS_DIR}/plotly.min.js'
+SITE_CSS = f'{ASSETS_DIR}/dashboard.css'
+CHARTS_JS = f'{ASSETS_DIR}/charts.js'
+# 记录每个页面对应的公司行指纹，再次导出到同一目录时跳过未变动的公司
+MANIFEST = 'manifest.json'
+# 页面版式的版本，写入清单；版式变化后旧页面全部重新生成
+PAGE_FORMAT = 2
+
+# 图表数据中数值保留的小数位数（金额单位为万元）
+CHART_DIGITS = 2
+
+# 页面底部的脚本：plotly.js 和图表渲染脚本延迟执行，页面文字先显示
+PAGE_SCRIPTS = f'<script defer src="{PLOTLY_JS}"></script><script defer src="{CHARTS_JS}"></script>'
+
+# 图表渲染脚本：读取页面内嵌的图表数据，套用共用模板后绘制；模板在写出时替换 __TEMPLATE__
+CHARTS_SCRIPT = """(function () {
+  var TEMPLATE = __TEMPLATE__;
+  function render() {
+    var source = document.getElementById('chart-data');
+    if (!source || !window.Plotly) return;
+    var charts = JSON.parse(source.textContent);
+    document.querySelectorAll('.chart[data-chart]').forEach(function (el) {
+      var fig = charts[el.getAttribute('data-chart')];
+      if (!fig) return;
+      fig.layout.template = TEMPLATE;
+      Plotly.newPlot(el, fig.data, fig.layout, {displaylogo: false, responsive: true});
+    });
+  }
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', render);
+  } else {
+    render();
+  }
+})();
+"""
+
+# 公司列表页的筛选脚本：按输入的文字过滤表格行
+FILTER_SCRIPT = """<script>
+document.getElementById('filter').addEventListener('input', function () {
+  var q = this.value.trim().toLowerCase();
+  document.querySelectorAll('#companies tbody tr').forEach(function (tr) {
+    tr.style.display = !q || tr.dataset.name.indexOf(q) >= 0 ? '' : 'none';
+  });
+});
+</script>"""
+
+
+def safe_filename(name):
+    """
+    将公司简称转换为可用作文件名的字符串
+    """
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', str(name)).strip('_') or 'company'
+
+
+def page_filenames(names):
+    """
+    每个公司页面的文件名：只由公司简称决定，增删其他公司时不变，页面可以按行指纹沿用
+    转换后重名（不区分大小写，且不占用 index.html）时依次加 _2、_3 后缀
+    """
+    used = {'index'}
+    filenames = []
+    for name in names:
+        stem = base = safe_filename(name)
+        n = 1
+        while stem.lower() in used:
+            n += 1
+            stem = f'{base}_{n}'
+        used.add(stem.lower())
+        filenames.append(f'{stem}.html')
+    return filenames
+
+
+def compact_numbers(value, digits=CHART_DIGITS):
+    """
+    图表数据中的浮点数保留 digits 位小数，缺失值和无穷大改为 None（JSON 中为 null）
+    """
+    if isinstance(value, float):
+        return round(value, digits) if math.isfinite(value) else None
+    if isinstance(value, list):
+        return [compact_numbers(v, digits) for v in value]
+    if isinstance(value, dict):
+        return {k: compact_numbers(v, digits) for k, v in value.items()}
+    return value
+
+
+def figure_data(fig):
+    """
+    图表的 data 和 layout（去掉模板），模板由 charts.js 统一提供
+    """
+    import plotly.io as pio
+
+    figure = json.loads(pio.to_json(fig, validate=False))
+    figure['layout'].pop('template', None)
+    return compact_numbers(figure)
+
+
+def chart_data_script(charts):
+    """
+    页面内嵌的图表数据：紧凑 JSON，"</" 转义后放在 script 标签中不会提前结束
+    """
+    text = json.dumps(charts, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    return f'<script id="chart-data" type="application/json">{text}</script>'
+
+
+def export_company(task):
+    """
+    在进程池中执行：构建一个公司的图表数据和页面并写入文件，返回文件路径
+    """
+    # 图表库只在子进程中导入，主进程读取数据时不需要
+    from budget_charts import build_company_figures
+
+    name, record, schema, path = task
+    figures = {k: fig for k, fig in build_company_figures(record).items() if fig is not None}
+    charts = {k: f'<div class="chart" data-chart="{k}"></div>' for k in figures}
+    body = render_company_body(record, schema, name, charts)
+    body += chart_data_script({k: figure_data(fig) for k, fig in figures.items()})
+    page = render_page(name, body, head=PAGE_SCRIPTS, stylesheet=SITE_CSS)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return path
+
+
+def company_records(df, index):
+    """
+    按公司索引顺序取出每个公司的一行数据（字典形式，可跨进程传递）
+    """
+    records = unique_columns(df).to_dict('records')
+    return [(name, records[pos]) for name, pos in index.positions.items()]
+
+
+def _write_asset(out_dir, name, text):
+    """
+    写入共用资源；内容未变时不重写，再次导出时文件时间不变
+    """
+    path = os.path.join(out_dir, name)
+    data = text.encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return path
+    except OSError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def write_assets(out_dir):
+    """
+    写入各页面共用的样式表、plotly.js 和图表渲染脚本（含当前默认的图表模板）
+    """
+    import plotly.io as pio
+    from plotly.offline import get_plotlyjs
+
+    os.makedirs(os.path.join(out_dir, ASSETS_DIR), exist_ok=True)
+    template = pio.templates[pio.templates.default].to_plotly_json()
+    _write_asset(out_dir, SITE_CSS, page_css())
+    _write_asset(out_dir, PLOTLY_JS, get_plotlyjs())
+    _write_asset(out_dir, CHARTS_JS, CHARTS_SCRIPT.replace(
+        '__TEMPLATE__', json.dumps(template, ensure_ascii=False, separators=(',', ':'))
+    ))
+
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(out_dir, manifest):
+    with open(os.path.join(out_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+
+def _index_cell(value, formatter):
+    return formatter(value) if pd.notna(value) else "-"
+
+
+def write_index(out_dir, pages, records=None):
+    """
+    公司列表页：每个页面一行，附 2026 年营业收入、净利润和毛利率，可按名称筛选
+    records 为 {公司简称: 行数据}，未提供时只列出名称
+    """
+    records = records or {}
+    rows = []
+    for name, path in pages:
+        record = records.get(name, {})
+        rows.append(
+            f'<tr data-name="{html.escape(str(name).lower())}">'
+            f'<td><a href="{html.escape(os.path.basename(path))}">{html.escape(str(name))}</a></td>'
+            f'<td class="num">{_index_cell(record.get("2026年营业收入"), format_amount)}</td>'
+            f'<td class="num">{_index_cell(record.get("2026净利润"), format_amount)}</td>'
+            f'<td class="num">{_index_cell(record.get("2026毛利率"), format_percent)}</td></tr>'
+        )
+    body = (
+        f'<h1>2026年全面预算概览</h1><p>共 {len(pages)} 个页面</p>'
+        '<input id="filter" class="company-filter" type="search" placeholder="按公司简称筛选">'
+        '<table id="companies" class="company-table"><thead><tr><th>公司简称</th>'
+        '<th class="num">2026年营业收入(万元)</th><th class="num">2026净利润(万元)</th>'
+        f'<th class="num">2026毛利率</th></tr></thead><tbody>{"".join(rows)}</tbody></table>'
+        + FILTER_SCRIPT
+    )
+    path = os.path.join(out_dir, 'index.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_page('公司列表', body, stylesheet=SITE_CSS))
+    return path
+
+
+def remove_stale_pages(out_dir, previous, manifest):
+    """
+    删除上次清单中有、本次清单中没有的公司页面（本次工作簿中已没有的公司），返回删除的文件数
+    只删除本工具以前导出的页面，输出目录中其他来源的文件不受影响
+    """
+    removed = 0
+    for filename in previous:
+        if filename in manifest or os.path.basename(filename) != filename:
+            continue
+        try:
+            os.remove(os.path.join(out_dir, filename))
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def write_zip(out_dir, zip_path=None):
+    """
+    把站点打包为 zip，返回 zip 文件路径；plotly.js 压缩后约为原来的三分之一
+    只打包 index.html、共用资源和清单中列出的页面，目录中的其他文件不会混入
+    """
+    zip_path = zip_path or os.path.normpath(out_dir) + '.zip'
+    root = os.path.basename(os.path.normpath(out_dir))
+    files = ['index.html', SITE_CSS, PLOTLY_JS, CHARTS_JS, *read_manifest(out_dir)]
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for rel in files:
+            zf.write(os.path.join(out_dir, rel), f'{root}/{rel}')
+    return zip_path
+
+
+def export_workbook(source, out_dir, workers=None, loader='stream', include_group=True, force=False):
+    """
+    读取工作簿并用进程池导出全部公司页面，返回 ([(公司简称, 文件路径)], 重新生成的页面数)
+    目录中已有同一行指纹的页面时直接沿用，只重新生成有变动的公司；force 为 True 时全部重新生成
+    """
+    loaded = load_budget_frame(source, loader)
+    if loaded is None:
+        raise ValueError("未找到'公司简称'列，请检查表头格式是否变动。")
+    df, schema, _ = loaded
+    index = CompanyIndex(df)
+
+    os.makedirs(out_dir, exist_ok=True)
+    write_assets(out_dir)
+
+    entries = company_records(df, index)
+    fingerprints = row_fingerprints(df)
+    if include_group:
+        rollup = build_group_rollup(df)
+        entries.insert(0, (GROUP_ROLLUP_NAME, rollup.to_dict()))
+        fingerprints[GROUP_ROLLUP_NAME] = row_fingerprints(rollup.to_frame().T)[GROUP_ROLLUP_NAME]
+
+    exported = read_manifest(out_dir)
+    previous = {} if force else exported
+    manifest = {}
+    tasks = []
+    for (name, record), filename in zip(entries, page_filenames(name for name, _ in entries)):
+        manifest[filename] = f'{PAGE_FORMAT}:{fingerprints[name]}'
+        path = os.path.join(out_dir, filename)
+        if previous.get(filename) != manifest[filename] or not os.path.exists(path):
+            tasks.append((name, record, schema, path))
+
+    if tasks:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(export_company, tasks, chunksize=chunksize))
+
+    pages = [(name, os.path.join(out_dir, filename)) for (name, _), filename in zip(entries, manifest)]
+    write_index(out_dir, pages, dict(entries))
+    write_manifest(out_dir, manifest)
+    remove_stale_pages(out_dir, exported, manifest)
+    return pages, len(tasks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='把每个公司的预算看板导出为可离线打开的静态站点')
+    parser.add_argument('workbook', help='2026预算小结 Excel 文件路径')
+    parser.add_argument('-o', '--output', default='export', help='输出目录（默认 export）')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='并行进程数（默认 CPU 核数）')
+    parser.add_argument('--loader', choices=['stream', 'full'], default='stream', help='Excel 读取方式')
+    parser.add_argument('--no-group', action='store_true', help='不导出集团合并页面')
+    parser.add_argument('--force', action='store_true', help='忽略上次导出的记录，全部重新生成')
+    parser.add_argument('--zip', action='store_true', help='导出后另外打包为 <输出目录>.zip')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    pages, rendered = export_workbook(
+        args.workbook, args.output, workers=args.workers,
+        loader=args.loader, include_group=not args.no_group, force=args.force,
+    )
+    print(
+        f"已导出 {len(pages)} 个页面到 {args.output}（重新生成 {rendered} 个），"
+        f"用时 {time.perf_counter() - start:.1f} 秒"
+    )
+    if args.zip:
+        zip_path = write_zip(args.output)
+        print(f"已打包为 {zip_path}（{os.path.getsize(zip_path) / 1024 / 1024:.1f} MB）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+公司层级树：按上级公司列建立树形索引，并一次性计算全部子树的合计
+
+节点按先序（父节点在前、子节点依次在后）排列，每个节点的子树在先序中是一段连续区间，
+对先序排列的数值列做一次前缀和后，任意子树的合计都只是两行前缀和之差，不随公司数增长：
+
+    tree = CompanyTree(数据帧)
+    tree.subtree_row('某子集团')   # 与 build_group_rollup() 结果同列名的子树合计
+    tree.table_rows('某子集团')    # 逐层展开的实体树形表格数据
+"""
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from budget_core import AMOUNT_COLUMNS, ZERO_FILL_COLUMNS, RATE_BASES, PARENT_COLUMN, company_rows
+
+# 子树合计的数值列：核心金额（全部缺失时为缺失）和明细金额
+SUM_COLUMNS = (*AMOUNT_COLUMNS, *ZERO_FILL_COLUMNS)
+
+# 按收入加权合并的比率列（毛利率）
+WEIGHTED_RATES = tuple(rate for rate, (_, expense) in RATE_BASES.items() if expense is None)
+
+
+def has_hierarchy(df, parent_column=PARENT_COLUMN):
+    return parent_column in df.columns and bool(df[parent_column].notna().any())
+
+
+class CompanyTree:
+    """
+    公司层级的树形索引和子树合计
+    上级公司不在表中的名称作为虚拟节点（没有本级数据，例如未单独填报的集团本部）；
+    形成环的上级关系在环上断开，被断开的公司记录在 cycles 中并作为根节点
+    """
+
+    def __init__(self, df, key_column='公司简称', parent_column=PARENT_COLUMN):
+        frame = company_rows(df, key_column)
+        names = frame[key_column].to_numpy(object).tolist()
+        if parent_column in frame.columns:
+            parents = frame[parent_column].to_numpy(object).tolist()
+        else:
+            parents = [None] * len(names)
+
+        self.nodes = list(names)
+        position = {name: i for i, name in enumerate(names)}
+        self.parent = {}
+        for name, parent in zip(names, parents):
+            if pd.isna(parent) or not str(parent).strip() or parent == name:
+                continue
+            parent = str(parent).strip()
+            if parent not in position:
+                position[parent] = len(self.nodes)
+                self.nodes.append(parent)
+            self.parent[name] = parent
+        self.virtual = set(self.nodes[len(names):])
+
+        self.children = defaultdict(list)
+        for name in self.nodes:
+            if name in self.parent:
+                self.children[self.parent[name]].append(name)
+
+        self.order, self.depth, self.start, self.end = [], {}, {}, {}
+        self.roots = [name for name in self.nodes if name not in self.parent]
+        for root in self.roots:
+            self._visit(root)
+        # 环上的节点从任何根都到不了：断开它与上级的关系后作为根
+        self.cycles = []
+        for name in self.nodes:
+            if name not in self.start:
+                self.children[self.parent.pop(name)].remove(name)
+                self.cycles.append(name)
+                self.roots.append(name)
+                self._visit(name)
+
+        self._build_sums(frame, position, len(names))
+
+    def _visit(self, root):
+        """
+        迭代式先序遍历，记录每个节点的深度和子树区间 [start, end)
+        """
+        stack = [(root, 0, False)]
+        while stack:
+            name, depth, done = stack.pop()
+            if done:
+                self.end[name] = len(self.order)
+                continue
+            self.start[name] = len(self.order)
+            self.depth[name] = depth
+            self.order.append(name)
+            stack.append((name, depth, True))
+            for child in reversed(self.children.get(name, ())):
+                stack.append((child, depth + 1, False))
+
+    def _build_sums(self, frame, position, real_count):
+        """
+        按先序排列各节点本级的数值，计算前缀和；虚拟节点的本级数值为缺失
+        """
+        rows = np.array([position[name] for name in self.order], dtype=np.int64)
+        own = np.full((len(self.nodes), len(SUM_COLUMNS)), np.nan)
+        own[:real_count] = frame[list(SUM_COLUMNS)].to_numpy(np.float64)
+
+        # 毛利率按收入加权：只有毛利率和收入都不缺失的公司参与
+        weighted = np.full((len(self.nodes), 2 * len(WEIGHTED_RATES)), np.nan)
+        for i, rate in enumerate(WEIGHTED_RATES):
+            revenue = frame[RATE_BASES[rate][0]].to_numpy(np.float64)
+            product = frame[rate].to_numpy(np.float64) * revenue
+            weighted[:real_count, 2 * i] = product
+            weighted[:real_count, 2 * i + 1] = np.where(np.isnan(product), np.nan, revenue)
+
+        def prefix(values):
+            return np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values[rows], axis=0)])
+
+        self._sums = prefix(np.nan_to_num(own))
+        self._counts = prefix((~np.isnan(own)).astype(np.float64))
+        self._weighted = prefix(np.nan_to_num(weighted))
+        is_real = np.zeros((len(self.nodes), 1))
+        is_real[:real_count] = 1
+        self._companies = prefix(is_real)[:, 0]
+
+    def __contains__(self, name):
+        return name in self.start
+
+    def label(self, name):
+        """
+        选择框中的显示名称：按深度缩进，虚拟节点加注
+        """
+        suffix = "（未填报）" if name in self.virtual else ""
+        return "　" * self.depth[name] + str(name) + suffix
+
+    def company_count(self, name):
+        """
+        子树中（含本级）有数据的公司数
+        """
+        return int(self._companies[self.end[name]] - self._companies[self.start[name]])
+
+    def subtree_row(self, name):
+        """
+        子树合计：与 build_group_rollup() 同样的列和口径——金额直接加总，毛利率按收入加权，费用率按合计重新计算
+        """
+        s, e = self.start[name], self.end[name]
+        sums = self._sums[e] - self._sums[s]
+        counts = self._counts[e] - self._counts[s]
+        weighted = self._weighted[e] - self._weighted[s]
+        totals = dict(zip(SUM_COLUMNS, sums.tolist()))
+        for i, column in enumerate(AMOUNT_COLUMNS):
+            if counts[i] == 0:
+                totals[column] = np.nan
+
+        for rate_col, (revenue_col, expense_col) in RATE_BASES.items():
+            if expense_col is None:
+                i = WEIGHTED_RATES.index(rate_col)
+                base = weighted[2 * i + 1]
+                totals[rate_col] = weighted[2 * i] / base if base else np.nan
+            else:
+                base = totals[revenue_col]
+                totals[rate_col] = totals[expense_col] / base * 100 if base else np.nan
+
+        totals['公司简称'] = name
+        totals['公司数量'] = self.company_count(name)
+        return pd.Series(totals)
+
+    def table_rows(self, name, max_depth=2):
+        """
+        实体树形表格的数据：从 name 开始逐层展开到 max_depth 层（相对深度），每行为该实体的子树合计
+        [{'level', 'name', 'is_last', 'has_children', 'virtual', 'companies', 'revenue', 'net_profit',
+          'fixed_cost', 'operating_cash_flow'}]
+        """
+        # 只沿子节点列表展开到 max_depth 层，不遍历更深的节点
+        rows = []
+        stack = [(name, 0, True)]
+        while stack:
+            node, level, is_last = stack.pop()
+            children = self.children.get(node, ())
+            if level < max_depth:
+                for i, child in reversed(list(enumerate(children))):
+                    stack.append((child, level + 1, i == len(children) - 1))
+            row = self.subtree_row(node)
+            rows.append({
+                'level': level,
+                'name': node,
+                'is_last': is_last,
+                'has_children': bool(children),
+                'virtual': node in self.virtual,
+                'companies': row['公司数量'],
+                'revenue': row['2026年营业收入'],
+                'net_profit': row['2026净利润'],
+                'fixed_cost': row['固定成本费用合计'],
+                'operating_cash_flow': row['经营活动产生的现金流量净额'],
+            })
+        return rows
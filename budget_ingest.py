@@ -0,0 +1,107 @@
+"""
+多个子公司分别提交的预算小结合并读取：每个文件在独立进程中走 load_budget_frame() 的读取和规整流程，
+结果按列名对齐后合并为一张表，单个文件失败不影响其他文件
+
+    frame, raw_columns, source_rows, report = load_submissions(list_submissions('提交目录'))
+"""
+import glob
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from budget_core import load_budget_frame, compact_frame, ColumnSchema, unique_columns
+
+# 合并后记录每行来自哪个文件的列
+SOURCE_COLUMN = '来源文件'
+
+REPORT_COLUMNS = ['文件', '状态', '公司数', '缺少列数', '耗时(秒)', '说明']
+
+
+def list_submissions(directory):
+    """
+    目录中的全部 xlsx 文件路径，按文件名排序；跳过 Excel 打开文件时生成的 ~$ 临时文件
+    """
+    paths = glob.glob(os.path.join(directory, '*.xlsx'))
+    return sorted(p for p in paths if not os.path.basename(p).startswith('~$'))
+
+
+def load_submission(source, loader='stream'):
+    """
+    读取并规整一个提交文件，在子进程中执行；source 为文件路径或 (文件名, 字节内容)
+    返回 {'name', 'frame', 'raw_columns', 'source_rows', 'seconds', 'error'}，失败时 frame 为 None
+    """
+    if isinstance(source, tuple):
+        name, content = source
+        content = io.BytesIO(content)
+    else:
+        name, content = os.path.basename(source), source
+    result = {'name': name, 'frame': None, 'raw_columns': [], 'source_rows': 0, 'error': None}
+    start = time.perf_counter()
+    try:
+        loaded = load_budget_frame(content, loader)
+        if loaded is None:
+            result['error'] = "未找到'公司简称'列，请检查表头格式是否变动"
+        else:
+            df, schema, source_rows = loaded
+            result.update(frame=df, raw_columns=schema.raw_columns, source_rows=source_rows)
+    except Exception as e:
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def combine_frames(frames, names):
+    """
+    按列名对齐合并：全部文件的列取并集，按首次出现的顺序排列，某文件缺少的列为缺失值
+    单个文件内的重名列只保留第一列，与 CompanyIndex 的取值规则一致；
+    各文件的分类列类别不同，合并后重新压缩
+    """
+    aligned = [
+        unique_columns(df).assign(**{SOURCE_COLUMN: name})
+        for df, name in zip(frames, names)
+    ]
+    return compact_frame(pd.concat(aligned, ignore_index=True, sort=False))
+
+
+def load_submissions(sources, loader='stream', max_workers=None):
+    """
+    并行读取多个提交文件并合并，返回 (数据帧, 原始列名并集, 原始行数合计, 逐文件报告)
+    全部文件都失败时数据帧为 None；逐文件报告的列见 REPORT_COLUMNS
+    max_workers 默认取环境变量 BUDGET_INGEST_WORKERS，未设置时为 CPU 核数；只有一个文件或一个进程时不启动进程池
+    """
+    sources = list(sources)
+    if max_workers is None:
+        max_workers = int(os.environ.get('BUDGET_INGEST_WORKERS', os.cpu_count() or 1))
+    workers = max(1, min(max_workers, len(sources)))
+    if workers == 1:
+        results = [load_submission(source, loader) for source in sources]
+    else:
+        # spawn 启动的子进程不继承 Streamlit 的线程，各模块按需导入，启动开销较小
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            results = list(pool.map(load_submission, sources, [loader] * len(sources)))
+
+    raw_columns, report = [], []
+    for result in results:
+        for column in result['raw_columns']:
+            if column not in raw_columns:
+                raw_columns.append(column)
+        if result['error'] is not None:
+            report.append((result['name'], '失败', 0, None, result['seconds'], result['error']))
+        else:
+            missing = ColumnSchema(result['raw_columns']).missing_columns
+            report.append((
+                result['name'], '成功', len(result['frame']), len(missing), result['seconds'],
+                "、".join(missing[:5]) + ("等" if len(missing) > 5 else ""),
+            ))
+    report = pd.DataFrame(report, columns=REPORT_COLUMNS).astype({'缺少列数': 'Int64'})
+
+    loaded = [r for r in results if r['frame'] is not None]
+    if not loaded:
+        return None, raw_columns, 0, report
+    frame = combine_frames([r['frame'] for r in loaded], [r['name'] for r in loaded])
+    return frame, raw_columns, sum(r['source_rows'] for r in loaded), report
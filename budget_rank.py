@@ -0,0 +1,110 @@
+"""
+跨公司排名：按规整后的数值列一次性计算各排名指标，再用部分选择（np.argpartition）取前 N / 后 N 名，
+不对全部公司排序，几千个公司也能即时响应：
+
+    ranking = CompanyRanking(数据帧)
+    ranking.top('revenue_growth', 10)               # 收入增长率前 10 名
+    ranking.top('revenue_growth', 10, largest=False) # 后 10 名
+"""
+import numpy as np
+import pandas as pd
+
+from budget_core import company_rows
+
+# 排名指标：{指标: (显示名称, 单位)}
+RANKING_METRICS = {
+    'revenue_growth': ('收入增长率', '%'),
+    'revenue_2026': ('2026年营业收入', '万元'),
+    'net_profit_change': ('净利润变动', '万元'),
+    'net_profit_2026': ('2026净利润', '万元'),
+    'gross_margin': ('2026毛利率', '%'),
+    'sales_rate': ('销售费用率', '%'),
+    'admin_rate': ('管理费用率', '%'),
+    'rd_rate': ('研发费用率', '%'),
+    'operating_cash_flow': ('经营活动现金流量净额', '万元'),
+    'funding_gap': ('资金投入（缺口）', '万元'),
+}
+
+
+def ranking_frame(df, key_column='公司简称'):
+    """
+    每个公司一行、每个排名指标一列（float64），整列计算
+    重复的公司简称取第一次出现的行，与 CompanyIndex 一致；上年收入为 0 或缺失时收入增长率为缺失
+    """
+    frame = company_rows(df, key_column)
+
+    def column(name):
+        return frame[name].to_numpy(np.float64)
+
+    revenue_2025 = column('2025年营业收入')
+    revenue_2026 = column('2026年营业收入')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where(revenue_2025 != 0, (revenue_2026 - revenue_2025) / np.abs(revenue_2025) * 100, np.nan)
+
+    return pd.DataFrame({
+        'revenue_growth': growth,
+        'revenue_2026': revenue_2026,
+        'net_profit_change': column('2026净利润') - column('2025净利润'),
+        'net_profit_2026': column('2026净利润'),
+        'gross_margin': column('2026毛利率'),
+        'sales_rate': column('2026年销售费用率'),
+        'admin_rate': column('2026年管理费用率'),
+        'rd_rate': column('2026年研发费用率'),
+        'operating_cash_flow': column('经营活动产生的现金流量净额'),
+        'funding_gap': column('资金投入（缺口）'),
+    }, index=pd.Index(frame[key_column].to_numpy(object), name=key_column))
+
+
+def top_positions(values, n, largest=True):
+    """
+    数组中最大（或最小）的 n 个非缺失值的位置，按名次排列
+    先用 argpartition 在 O(公司数) 内选出 n 个，再只对这 n 个排序；并列时保持表中顺序
+    """
+    valid = np.flatnonzero(~np.isnan(values))
+    keys = -values[valid] if largest else values[valid]
+    n = min(n, len(valid))
+    if n <= 0:
+        return valid[:0]
+    if n < len(valid):
+        # 第 n 名的值；与它并列的公司按表中顺序补足 n 个，结果不随 argpartition 的实现而变
+        boundary = keys[np.argpartition(keys, n - 1)[n - 1]]
+        better = np.flatnonzero(keys < boundary)
+        tied = np.flatnonzero(keys == boundary)[:n - len(better)]
+        selected = np.concatenate([better, tied])
+    else:
+        selected = np.arange(len(valid))
+    selected = selected[np.lexsort((selected, keys[selected]))]
+    return valid[selected]
+
+
+class CompanyRanking:
+    """
+    一个工作簿的排名指标，每个工作簿构建一次；各指标的数值数组预先取出，查询时不再经过 pandas
+    """
+
+    def __init__(self, df, key_column='公司简称'):
+        self.frame = ranking_frame(df, key_column)
+        self.key_column = key_column
+        self.companies = self.frame.index.to_numpy(object)
+        self._values = {metric: self.frame[metric].to_numpy() for metric in self.frame.columns}
+
+    def __len__(self):
+        return len(self.companies)
+
+    def count(self, metric):
+        """
+        指标不为缺失、参与排名的公司数
+        """
+        return int((~np.isnan(self._values[metric])).sum())
+
+    def top(self, metric, n=10, largest=True):
+        """
+        前 n 名（largest=False 时为后 n 名）：名次、公司简称和指标值组成的数据帧
+        """
+        positions = top_positions(self._values[metric], n, largest)
+        label, unit = RANKING_METRICS[metric]
+        return pd.DataFrame({
+            '名次': np.arange(1, len(positions) + 1),
+            self.key_column: self.companies[positions],
+            f'{label}（{unit}）': self._values[metric][positions],
+        })
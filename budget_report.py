@@ -0,0 +1,610 @@
+import html
+import numbers
+import re
+
+import numpy as np
+import pandas as pd
+
+from budget_core import company_metrics
+
+# 看板全局样式：Streamlit 页面和静态导出共用
+DASHBOARD_CSS = """
+/* 全局配色方案 */
+:root {
+    --primary-blue: #0052cc;
+    --light-blue-bg: #e6f0ff;
+    --rise-red: #ff4d4f;
+    --fall-green: #52c41a;
+    --text-dark: #1f1f1f;
+    --text-gray: #666;
+    --border-light: #d9d9d9;
+}
+
+/* KPI卡片样式 */
+.kpi-card {
+    background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
+    padding: 24px;
+    border-radius: 12px;
+    border: 1px solid var(--border-light);
+    box-shadow: 0 4px 12px rgba(0, 82, 204, 0.08);
+    transition: all 0.3s ease;
+    margin-bottom: 16px;
+}
+.kpi-card:hover {
+    box-shadow: 0 6px 20px rgba(0, 82, 204, 0.15);
+    transform: translateY(-2px);
+}
+.kpi-title {
+    font-size: 0.95rem;
+    color: var(--text-gray);
+    font-weight: 500;
+    margin-bottom: 12px;
+    text-transform: uppercase;
+    letter-spacing: 0.5px;
+}
+.kpi-value-2026 {
+    font-size: 2.2rem;
+    font-weight: 700;
+    color: var(--primary-blue);
+    margin: 8px 0;
+    line-height: 1.2;
+}
+.kpi-value-2025 {
+    font-size: 1.3rem;
+    font-weight: 600;
+    color: var(--text-gray);
+    margin: 4px 0;
+}
+.kpi-change {
+    font-size: 1.1rem;
+    font-weight: 600;
+    margin-top: 8px;
+    padding: 6px 12px;
+    border-radius: 6px;
+    display: inline-block;
+}
+.kpi-change.rise {
+    color: var(--rise-red);
+    background-color: rgba(255, 77, 79, 0.1);
+}
+.kpi-change.fall {
+    color: var(--fall-green);
+    background-color: rgba(82, 196, 26, 0.1);
+}
+
+/* 管理层关注区域 */
+.attention-box {
+    background: linear-gradient(135deg, #fff9e6 0%, #fffbf0 100%);
+    padding: 24px;
+    border-radius: 12px;
+    border-left: 4px solid #faad14;
+    box-shadow: 0 2px 8px rgba(250, 173, 20, 0.1);
+}
+.attention-title {
+    font-size: 1.1rem;
+    font-weight: 700;
+    color: #d46b08;
+    margin-bottom: 12px;
+}
+
+/* 分区标题 */
+.section-title {
+    font-size: 1.4rem;
+    font-weight: 700;
+    color: var(--primary-blue);
+    margin: 32px 0 20px 0;
+    padding-bottom: 12px;
+    border-bottom: 3px solid var(--primary-blue);
+}
+
+/* 小结区域 */
+.summary-box {
+    background: linear-gradient(135deg, var(--light-blue-bg) 0%, #f0f5ff 100%);
+    padding: 28px;
+    border-radius: 12px;
+    border: 1px solid #adc6ff;
+    box-shadow: 0 2px 8px rgba(0, 82, 204, 0.08);
+}
+.summary-title {
+    font-size: 1.4rem;
+    font-weight: 700;
+    color: var(--primary-blue);
+    margin-bottom: 16px;
+}
+.summary-content {
+    font-size: 1.15rem;
+    line-height: 2;
+    color: var(--text-dark);
+}
+
+/* Streamlit原生组件优化 */
+[data-testid="stMetricValue"] {
+    font-size: 2rem !important;
+    font-weight: 700 !important;
+    color: var(--primary-blue) !important;
+}
+[data-testid="stMetricLabel"] {
+    font-size: 1rem !important;
+    color: var(--text-gray) !important;
+    font-weight: 500 !important;
+}
+
+/* 侧边栏优化 */
+[data-testid="stSidebar"] {
+    background-color: #fafafa;
+}
+.sidebar .sidebar-content {
+    background-color: #fafafa;
+}
+
+/* 通用文本样式 */
+.metric-unit {
+    font-size: 0.9rem;
+    color: var(--text-gray);
+    font-weight: 400;
+}
+
+/* 树形表格样式 */
+.tree-table {
+    width: 100%;
+    border-collapse: collapse;
+    font-size: 1.1rem;
+    background: white;
+    box-shadow: 0 2px 8px rgba(0,0,0,0.08);
+    border-radius: 8px;
+    overflow: hidden;
+}
+.tree-table th {
+    background: linear-gradient(135deg, #0052cc 0%, #0066ff 100%);
+    color: white;
+    padding: 16px 12px;
+    text-align: left;
+    font-weight: 600;
+    font-size: 1.15rem;
+    border-bottom: 3px solid #003d99;
+}
+.tree-table td {
+    padding: 14px 12px;
+    border-bottom: 1px solid #e8e8e8;
+}
+.tree-row-root {
+    background: #f0f5ff;
+    font-weight: 700;
+    font-size: 1.2rem;
+    color: #0052cc;
+}
+.tree-row-parent {
+    background: #fff9e6;
+    font-weight: 600;
+    color: #d46b08;
+}
+.tree-row-child {
+    background: white;
+    color: #333;
+}
+.tree-row-normal {
+    background: white;
+    color: #333;
+}
+.tree-row:hover {
+    background: #f5f5f5 !important;
+}
+.tree-indent-0 { padding-left: 12px; }
+.tree-indent-1 { padding-left: 32px; }
+.tree-indent-2 { padding-left: 52px; }
+.tree-icon {
+    display: inline-block;
+    width: 16px;
+    margin-right: 8px;
+    font-weight: bold;
+}
+.progress-bar-container {
+    width: 100%;
+    background: #e8e8e8;
+    border-radius: 4px;
+    height: 24px;
+    position: relative;
+    overflow: hidden;
+}
+.progress-bar {
+    height: 100%;
+    border-radius: 4px;
+    transition: width 0.3s ease;
+    display: flex;
+    align-items: center;
+    justify-content: flex-end;
+    padding-right: 8px;
+    color: white;
+    font-weight: 600;
+    font-size: 0.95rem;
+}
+.progress-bar-high { background: linear-gradient(90deg, #0052cc 0%, #0066ff 100%); }
+.progress-bar-medium { background: linear-gradient(90deg, #4a90e2 0%, #74b9ff 100%); }
+.progress-bar-low { background: linear-gradient(90deg, #95a5a6 0%, #b0bec5 100%); }
+.amount-cell {
+    font-family: 'Consolas', 'Monaco', monospace;
+    font-weight: 600;
+    text-align: right;
+}
+
+/* 版本对比中被修订的数值 */
+.revision-tag {
+    display: inline-block;
+    font-size: 0.9rem;
+    color: #d46b08;
+    background: #fff7e6;
+    border: 1px solid #ffd591;
+    border-radius: 4px;
+    padding: 2px 8px;
+    margin: 2px 0;
+}
+
+/* 情景模拟时与基准值并列显示的情景值 */
+.scenario-tag {
+    display: inline-block;
+    font-size: 0.95rem;
+    color: #531dab;
+    background: #f9f0ff;
+    border: 1px solid #d3adf7;
+    border-radius: 4px;
+    padding: 2px 8px;
+    margin: 2px 0;
+}
+
+/* 全文搜索结果 */
+.search-hit {
+    padding: 10px 14px;
+    margin-bottom: 8px;
+    border-left: 3px solid var(--primary-blue);
+    background: #fafafa;
+    line-height: 1.8;
+}
+.search-hit .search-meta { font-size: 0.9rem; color: var(--text-gray); }
+.search-hit mark { background: #fff1b8; color: inherit; padding: 0 1px; }
+"""
+
+
+def format_text_list(text, color='inherit'):
+    """
+    将 '1、xxx 2、xxx' 格式的文本转换为换行显示的HTML
+    按"1、""2、""3、"等数字顿号分段，支持自定义颜色
+    """
+    if pd.isna(text) or text == 0 or text == '' or str(text).strip() == '':
+        return "无"
+
+    text = str(text).strip()
+
+    # 检查是否包含数字顿号格式
+    if not re.search(r'\d+、', text):
+        # 如果没有数字顿号，直接返回原文本
+        return f'<div style="color:{color}; line-height:2;">{text}</div>'
+
+    # 按照数字顿号分割文本
+    parts = re.split(r'(\d+、)', text)
+
+    result = '<div style="line-height:2;">'
+    i = 0
+    while i < len(parts):
+        if re.match(r'\d+、', parts[i]):
+            # 这是一个编号
+            number = parts[i]
+            content = parts[i+1] if i+1 < len(parts) else ''
+            result += f'<div style="margin-top:8px; color:{color};"><b>{number}</b>{content.strip()}</div>'
+            i += 2
+        else:
+            # 这是第一段文本（在第一个编号之前）
+            if parts[i].strip():
+                result += f'<div style="color:{color};">{parts[i].strip()}</div>'
+            i += 1
+
+    result += '</div>'
+    return result
+
+
+def format_amount(value):
+    if value is None or value == 0:
+        return ""
+    return f"{value:,.0f}"
+
+
+def render_progress_bar(percentage):
+    if percentage >= 50:
+        bar_class = "progress-bar-high"
+    elif percentage >= 20:
+        bar_class = "progress-bar-medium"
+    else:
+        bar_class = "progress-bar-low"
+
+    bar_html = f'<div class="progress-bar-container"><div class="progress-bar {bar_class}" style="width: {percentage}%;">{percentage:.0f}%</div></div>'
+    return bar_html
+
+
+# 树形表格各层级的行样式
+TREE_ROW_CLASSES = {0: 'tree-row-root', 1: 'tree-row-normal', 2: 'tree-row-child'}
+
+
+def fixed_cost_table_html(items):
+    """
+    固定成本费用树形表格：合计 → 职工薪酬小计及子项 → 其他固定成本项目
+    items 为 company_metrics() 中的 fixed_costs 列表
+    """
+    # 生成表格HTML
+    table_html = '<table class="tree-table"><thead><tr><th style="width: 45%;">成本项目</th><th style="width: 25%; text-align: right;">金额(万元)</th><th style="width: 30%;">占比结构</th></tr></thead><tbody>'
+
+    last_child = max((i for i, item in enumerate(items) if item['level'] == 2), default=None)
+    for i, item in enumerate(items):
+        level, name = item['level'], item['name']
+        row_class = TREE_ROW_CLASSES[level]
+        if level == 0:
+            label = f'<span class="tree-icon">▼</span>{name}'
+        elif name == '职工薪酬-小计':
+            row_class = 'tree-row-parent'
+            label = f'<span class="tree-icon">▶</span>{name}'
+        elif level == 2:
+            label = f'{"└──" if i == last_child else "├──"} {name}'
+        else:
+            label = name
+        table_html += (
+            f'<tr class="tree-row {row_class}"><td class="tree-indent-{level}">{label}</td>'
+            f'<td class="amount-cell">{format_amount(item["amount"])}</td>'
+            f'<td>{render_progress_bar(item["share"] or 0)}</td></tr>'
+        )
+
+    table_html += '</tbody></table>'
+    return table_html
+
+
+def entity_tree_table_html(rows):
+    """
+    集团层级树形表格：所选节点 → 下级公司 → 再下一级公司，每行为该实体含下级的合计
+    rows 为 CompanyTree.table_rows() 的结果
+    """
+    table_html = (
+        '<table class="tree-table"><thead><tr><th style="width: 32%;">实体</th>'
+        '<th style="width: 8%; text-align: right;">公司数</th>'
+        '<th style="width: 15%; text-align: right;">2026年营业收入(万元)</th>'
+        '<th style="width: 15%; text-align: right;">2026净利润(万元)</th>'
+        '<th style="width: 15%; text-align: right;">固定成本费用(万元)</th>'
+        '<th style="width: 15%; text-align: right;">经营活动现金流(万元)</th></tr></thead><tbody>'
+    )
+
+    for row in rows:
+        level = row['level']
+        name = html.escape(str(row['name'])) + ("（未填报）" if row['virtual'] else "")
+        row_class = TREE_ROW_CLASSES[level]
+        if level == 0:
+            label = f'<span class="tree-icon">▼</span>{name}'
+        else:
+            branch = "└──" if row['is_last'] else "├──"
+            if row['has_children']:
+                row_class = 'tree-row-parent'
+                label = f'{branch} <span class="tree-icon">▶</span>{name}'
+            else:
+                label = f'{branch} {name}'
+        table_html += (
+            f'<tr class="tree-row {row_class}"><td class="tree-indent-{level}">{label}</td>'
+            f'<td class="amount-cell">{row["companies"]}</td>'
+            + ''.join(
+                f'<td class="amount-cell">{format_amount(row[key]) if pd.notna(row[key]) else "-"}</td>'
+                for key in ('revenue', 'net_profit', 'fixed_cost', 'operating_cash_flow')
+            )
+            + '</tr>'
+        )
+
+    table_html += '</tbody></table>'
+    return table_html
+
+
+def format_change(current, previous):
+    """
+    同比变动的文字描述（HTML）；任一年份缺失时返回 "-"
+    """
+    if not (pd.notna(current) and pd.notna(previous)):
+        return "-"
+    delta = current - previous
+    if delta > 0:
+        return f'<span class="metric-change increase">同比增加 {delta:,.0f} 万元</span>'
+    elif delta < 0:
+        return f'<span class="metric-change decrease">同比减少 {abs(delta):,.0f} 万元</span>'
+    return '<span class="metric-change">与去年持平</span>'
+
+
+def format_wan(value):
+    return f"{value:,.0f} 万元" if pd.notna(value) else "- 万元"
+
+
+def format_value(value):
+    """
+    任意单元格值的简短显示：数值保留两位小数，缺失显示 "-"
+    """
+    if pd.isna(value):
+        return "-"
+    if isinstance(value, numbers.Real) and not isinstance(value, (bool, np.bool_)):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def revision_tag(column, old):
+    """
+    版本对比时标出被修订的字段及其原值（HTML）
+    """
+    return f'<span class="revision-tag">✎ {html.escape(str(column))} 已修订，原值 {html.escape(format_value(old))}</span>'
+
+
+def scenario_tag(value_text, delta_text=None):
+    """
+    情景模拟时在基准值旁标出情景值及其相对基准的变动（HTML）
+    """
+    delta = f"（较基准 {delta_text}）" if delta_text else ""
+    return f'<span class="scenario-tag">🧪 情景：{html.escape(value_text)}{html.escape(delta)}</span>'
+
+
+def highlight_snippet(text, spans, context=40):
+    """
+    截取命中位置附近的片段并高亮命中的词（HTML）；spans 为 [(起, 止)] 字符位置
+    片段从第一个命中位置前 context 个字符开始，最长约 4 × context 个字符，超出部分的命中不再显示
+    """
+    spans = sorted(spans)
+    start = max(0, spans[0][0] - context)
+    end = min(len(text), max(spans[0][1] + context, start + 4 * context))
+    parts = ['…' if start > 0 else '']
+    cursor = start
+    for s, e in spans:
+        if s >= end:
+            break
+        if e <= cursor:
+            continue
+        s, e = max(s, cursor), min(e, end)
+        parts.append(html.escape(text[cursor:s]))
+        parts.append(f'<mark>{html.escape(text[s:e])}</mark>')
+        cursor = e
+    parts.append(html.escape(text[cursor:end]))
+    parts.append('…' if end < len(text) else '')
+    return ''.join(parts)
+
+
+# 静态报告页面自身的布局样式（看板中由 Streamlit 的 columns/tabs 负责）
+REPORT_CSS = """
+body {
+    font-family: -apple-system, "PingFang SC", "Microsoft YaHei", sans-serif;
+    color: var(--text-dark);
+    margin: 0;
+    background: #fff;
+}
+.page { max-width: 1280px; margin: 0 auto; padding: 24px 32px 64px; }
+.page h1 { font-size: 2.4rem; margin: 8px 0; }
+.page h3 { font-size: 1.5rem; margin: 24px 0 12px; }
+.page h5 { font-size: 1.1rem; margin: 16px 0 8px; }
+.grid { display: grid; gap: 24px; }
+.grid-2 { grid-template-columns: 1fr 1fr; }
+.grid-3 { grid-template-columns: repeat(3, 1fr); }
+.grid-4 { grid-template-columns: repeat(4, 1fr); }
+.kpi-big { font-size: 1.8rem; font-weight: bold; margin: 10px 0; color: #0052cc; }
+.kpi-prev { font-size: 1.1rem; color: #666; margin-bottom: 5px; }
+.info-box { background: #e8f4fd; color: #0b4f82; padding: 16px; border-radius: 8px; line-height: 1.8; }
+.note-box { color: #1f1f1f; font-size: 1rem; background: #f0f5ff; padding: 20px; border-radius: 8px; }
+hr { border: none; border-top: 1px solid #e8e8e8; margin: 24px 0; }
+.company-list { columns: 3; list-style: none; padding: 0; }
+.company-list li { padding: 4px 0; }
+.company-list a { color: #0052cc; text-decoration: none; }
+.company-table { width: 100%; border-collapse: collapse; }
+.company-table th, .company-table td { padding: 6px 12px; border-bottom: 1px solid #eee; }
+.company-table th { text-align: left; background: #f5f7fa; position: sticky; top: 0; }
+.company-table td.num, .company-table th.num { text-align: right; font-variant-numeric: tabular-nums; }
+.company-table a { color: #0052cc; text-decoration: none; }
+.company-filter { width: 320px; padding: 6px 10px; margin: 8px 0 16px; border: 1px solid #ccc; border-radius: 4px; }
+.chart { min-height: 360px; }
+"""
+
+
+def _chart(charts, name, empty_html):
+    html = charts.get(name)
+    return html if html is not None else empty_html
+
+
+def cash_color(value):
+    """
+    现金流为正显示绿色，为负或缺失显示红色
+    """
+    return '#52c41a' if value is not None and value >= 0 else '#ff4d4f'
+
+
+def _cash_cell(title, value, color):
+    return (
+        f"<div><h5>{title}</h5>"
+        f"<div style='font-size:1.6rem; font-weight:bold; color:{color};'>{format_wan(value)}</div></div>"
+    )
+
+
+def render_company_body(row, schema, title, charts):
+    """
+    单个公司的报告正文 HTML，版式与看板页面一致
+    charts 为 {'quarterly', 'group_pie', 'expense_pie'} → 图表 HTML 片段，缺少数据的图表为 None
+    """
+    metrics = company_metrics(row)
+    revenue, net_profit = metrics['revenue'], metrics['net_profit']
+    *cash_items, cash_gap = metrics['cash_flow']
+
+    expense_notes = ''
+    for item in metrics['expenses']:
+        expense_notes += (
+            f"<h5>{item['name']}</h5>"
+            f"<p><b>金额:</b> {format_wan(item['amount'])} | <b>费率:</b> {item['rate_text']}</p>"
+            f"{format_text_list(schema.get(row, item['remark_field']))}"
+        )
+    expense_notes += f"<h5>毛利备注</h5>{format_text_list(schema.get(row, 'margin_remark'))}"
+    cash_cells = ''.join(_cash_cell(item['name'], item['amount'], cash_color(item['amount'])) for item in cash_items)
+
+    return f"""
+<h1>{html.escape(str(title))}</h1>
+<p>2026年全面预算概览</p>
+<div class="grid grid-3">
+  <div><h3>2026年营业收入</h3><div class="kpi-big">{format_wan(revenue['2026'])}</div>
+    <div class="kpi-prev">2025年：{format_wan(revenue['2025'])}</div>{format_change(revenue['2026'], revenue['2025'])}</div>
+  <div><h3>2026年净利润</h3><div class="kpi-big">{format_wan(net_profit['2026'])}</div>
+    <div class="kpi-prev">2025年：{format_wan(net_profit['2025'])}</div>{format_change(net_profit['2026'], net_profit['2025'])}</div>
+  <div><h3>2026年综合毛利率</h3><div class="kpi-big">{metrics['gross_margin_text']['2026']}</div>
+    <div class="kpi-prev" style="font-weight:bold; color:#333;">2025年：{metrics['gross_margin_text']['2025']}</div></div>
+</div>
+<hr>
+<div class="section-title">收入分析</div>
+<h5>季度收入趋势对比</h5>
+{_chart(charts, 'quarterly', '')}
+<div class="grid grid-2">
+  <div><h5>收入变动备注</h5>
+    <div class="info-box"><b>环比变动原因：</b><br>{schema.get(row, 'revenue_remark')}</div></div>
+  <div><h5>集团内外收入分布</h5>{_chart(charts, 'group_pie', '<div class="info-box">暂无集团内外数据</div>')}</div>
+</div>
+<hr>
+<div class="section-title">费用与成本</div>
+<div class="grid grid-2">
+  <div>{_chart(charts, 'expense_pie', '<p>暂无费用数据</p>')}</div>
+  <div><h5>费用明细说明</h5>{expense_notes}</div>
+</div>
+<hr>
+<div class="section-title">固定成本费用</div>
+{fixed_cost_table_html(metrics['fixed_costs'])}
+<hr>
+<div class="section-title">资金投入与现金流量情况</div>
+<div class="grid grid-4">
+  {cash_cells}
+  {_cash_cell(cash_gap['name'], cash_gap['amount'], '#0052cc')}
+</div>
+<h5>资金缺口说明</h5>
+<div class="note-box">{format_text_list(schema.get(row, 'funding_remark'), color='#1f1f1f')}</div>
+<hr>
+<h3>2026年预算执行小结</h3>
+<div style="font-size:1.1rem; line-height:1.8; color:#1f1f1f;">{format_text_list(schema.get(row, 'summary', '暂无小结'), color='#1f1f1f')}</div>
+<hr>
+<h3>提请管理层关注</h3>
+<div class="attention-box">{format_text_list(schema.get(row, 'attention'), color='#d46b08')}</div>
+"""
+
+
+def page_css():
+    """
+    静态页面的完整样式：看板样式加上报告页面的布局样式
+    """
+    return DASHBOARD_CSS + REPORT_CSS
+
+
+def render_page(title, body, head='', stylesheet=None):
+    """
+    完整的 HTML 页面：stylesheet 为共用样式表的地址，未指定时样式内联；head 中可追加脚本引用
+    """
+    if stylesheet is None:
+        style = f"<style>{page_css()}</style>"
+    else:
+        style = f'<link rel="stylesheet" href="{html.escape(stylesheet)}">'
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(str(title))} - 2026预算可视化看板</title>
+{style}
+{head}
+</head>
+<body><div class="page">{body}</div></body>
+</html>
+"""
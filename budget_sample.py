@@ -0,0 +1,217 @@
+"""
+生成与 2026预算小结 版式一致的模拟工作簿，用于性能测试和模板变动前的验证
+
+用法：
+    python budget_sample.py sample.xlsx --companies 1000 --extra-columns 150
+
+版式：前 11 行为说明性前言行，第 12、13 行为合并单元格的两行表头，之后每行一个公司；
+备注列为 "1、xxx 2、xxx" 形式的编号文本，比率列为小数形式（0.05 表示 5%）
+指定 --fanout 时另写一个"层级"工作表，每个公司有 fanout 个下级，全部公司组成一棵以公司0001为根的树
+"""
+import argparse
+import itertools
+import random
+
+from openpyxl import Workbook
+from openpyxl.worksheet.cell_range import CellRange
+
+from budget_core import HEADER_ROWS, QUARTERS
+
+# 表头：(上层表头, [下层表头])；下层为空列表表示上下两行合并的单列
+SAMPLE_HEADER = [
+    ('序号', []),
+    ('公司简称', []),
+    ('2025年\n营业收入', []),
+    ('2026年\n营业收入', []),
+    ('2025年度收入按季度分', [f'{q}25' for q in QUARTERS]),
+    ('2026年度收入按季度分', [f'{q}26' for q in QUARTERS]),
+    ('备注1：收入环比变动原因', []),
+    ('2026年收入构成', ['集团内', '集团外']),
+    ('2025毛利率', []),
+    ('2026毛利率', []),
+    ('备注2：毛利率变动原因', []),
+    ('2026销售费用', []),
+    ('2026年销售费用率', []),
+    ('备注3：销售费用变动原因', []),
+    ('2026管理费用', []),
+    ('2026年管理费用率', []),
+    ('备注4：管理费用变动原因', []),
+    ('2026研发费用', []),
+    ('2026年研发费用率', []),
+    ('备注5（请填写研发费用变动原因）', []),
+    ('固定成本费用', [
+        '固定成本费用合计', '职工薪酬-小计', '职工薪酬-销售', '职工薪酬-管理', '职工薪酬-生产', '职工薪酬-研发',
+        '折旧费', '房租物业费', '其他', '长期待摊费用', '无形资产摊销',
+    ]),
+    ('2025净利润', []),
+    ('2026净利润', []),
+    ('现金流量', ['经营活动产生的现金流量净额', '投资活动产生的现金流量净额', '筹资活动产生的现金流量净额']),
+    ('资金投入（缺口）', []),
+    ('备注5：资金缺口说明', []),
+    ('小结', []),
+    ('提请管理层关注', []),
+]
+
+# 备注文本的素材，按主题抽取若干条组成编号列表
+REMARK_PHRASES = {
+    'revenue': ['市场拓展带动收入增长', '新产品上线', '重点客户订单增加', '部分业务收缩', '价格下调影响收入', '海外业务恢复'],
+    'margin': ['原材料降价', '产品结构优化', '人工成本上升', '规模效应显现', '低毛利业务占比提高'],
+    'sales': ['销售人员增加', '差旅费用增加', '市场推广投入加大', '渠道佣金下降'],
+    'admin': ['管理费用持平', '办公场地调整', '信息化系统投入', '中介咨询费用增加'],
+    'rd': ['研发投入增加', '新项目立项', '研发人员扩充', '委外研发减少'],
+    'funding': ['银行贷款', '集团借款', '应收账款回收', '设备采购支出', '股东增资'],
+    'summary': ['收入增长', '利润改善', '控制费用', '优化现金流', '推进降本增效', '加强应收管理'],
+    'attention': ['应收账款回收风险', '人员流失风险', '原材料价格波动', '汇率波动影响', '重大投资项目进度'],
+}
+REMARK_COLUMNS = {
+    '备注1：收入环比变动原因': 'revenue',
+    '备注2：毛利率变动原因': 'margin',
+    '备注3：销售费用变动原因': 'sales',
+    '备注4：管理费用变动原因': 'admin',
+    '备注5（请填写研发费用变动原因）': 'rd',
+    '备注5：资金缺口说明': 'funding',
+    '小结': 'summary',
+    '提请管理层关注': 'attention',
+}
+
+
+def sample_columns(extra_columns=0):
+    """
+    生成工作簿的表头：返回 [(上层表头, 下层表头或 None)]；额外的数值列挂在"补充指标"分组下
+    """
+    columns = []
+    for top, subs in SAMPLE_HEADER:
+        if subs:
+            columns += [(top, sub) for sub in subs]
+        else:
+            columns.append((top, None))
+    columns += [('补充指标', f'补充指标{i + 1}') for i in range(extra_columns)]
+    return columns
+
+
+BASE_COLUMNS = sample_columns()
+
+
+def remark_text(rnd, topic, max_items=3):
+    """
+    "1、xxx 2、xxx" 形式的编号备注；偶尔返回不编号的单句或空值，与实际填报情况一致
+    """
+    phrases = REMARK_PHRASES[topic]
+    roll = rnd.random()
+    if roll < 0.05:
+        return None
+    if roll < 0.15:
+        return rnd.choice(phrases)
+    items = rnd.sample(phrases, rnd.randint(1, min(max_items, len(phrases))))
+    return ' '.join(f'{i}、{item}' for i, item in enumerate(items, start=1))
+
+
+def company_values(rnd, i, extra_columns=0, max_items=3):
+    """
+    一个公司一行的模拟数据，顺序与 sample_columns() 一致；各合计项与明细项保持勾稽关系
+    """
+    q25 = [rnd.uniform(100, 5000) for _ in QUARTERS]
+    q26 = [v * rnd.uniform(0.8, 1.3) for v in q25]
+    rev25, rev26 = sum(q25), sum(q26)
+    in_group = rev26 * rnd.uniform(0, 0.5)
+    sales, admin, rd = (rev26 * rnd.uniform(0.02, 0.1) for _ in range(3))
+    salary = [rnd.uniform(10, 200) for _ in range(4)]
+    other = [rnd.uniform(1, 100) for _ in range(5)]
+
+    values = {
+        '序号': i + 1,
+        '公司简称': f'公司{i + 1:04d}',
+        '2025年\n营业收入': rev25,
+        '2026年\n营业收入': rev26,
+        **dict(zip([f'{q}25' for q in QUARTERS], q25)),
+        **dict(zip([f'{q}26' for q in QUARTERS], q26)),
+        '集团内': in_group,
+        '集团外': rev26 - in_group,
+        '2025毛利率': rnd.uniform(0.1, 0.4),
+        '2026毛利率': rnd.uniform(0.1, 0.4),
+        '2026销售费用': sales,
+        '2026年销售费用率': sales / rev26,
+        '2026管理费用': admin,
+        '2026年管理费用率': admin / rev26,
+        '2026研发费用': rd,
+        '2026年研发费用率': rd / rev26,
+        '固定成本费用合计': sum(salary) + sum(other),
+        '职工薪酬-小计': sum(salary),
+        **dict(zip(['职工薪酬-销售', '职工薪酬-管理', '职工薪酬-生产', '职工薪酬-研发'], salary)),
+        **dict(zip(['折旧费', '房租物业费', '其他', '长期待摊费用', '无形资产摊销'], other)),
+        '2025净利润': rev25 * rnd.uniform(-0.05, 0.15),
+        '2026净利润': rev26 * rnd.uniform(-0.05, 0.15),
+        '经营活动产生的现金流量净额': rnd.uniform(-500, 500),
+        '投资活动产生的现金流量净额': rnd.uniform(-500, 500),
+        '筹资活动产生的现金流量净额': rnd.uniform(-500, 500),
+        '资金投入（缺口）': rnd.uniform(-1000, 1000),
+    }
+    for column, topic in REMARK_COLUMNS.items():
+        values[column] = remark_text(rnd, topic, max_items)
+
+    row = [values[sub if sub is not None else top] for top, sub in BASE_COLUMNS]
+    return row + [rnd.uniform(0, 1000) for _ in range(extra_columns)]
+
+
+def write_sample_workbook(path, companies=20, extra_columns=0, seed=0, max_items=3, fanout=0):
+    """
+    写入模拟工作簿（只写模式，数万行也只占用少量内存），返回表头列数
+    fanout 大于 0 时同时写入"层级"工作表（公司简称 → 上级公司）
+    """
+    rnd = random.Random(seed)
+    columns = sample_columns(extra_columns)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('预算小结')
+    for r in range(HEADER_ROWS[0]):
+        ws.append([f'说明行{r + 1}：本表金额单位为万元，比率以小数填列'])
+
+    # 两行表头：分组标题只写在左上角并横向合并，单列标题纵向合并两行
+    top_row, bottom_row = HEADER_ROWS[0] + 1, HEADER_ROWS[1] + 1
+    top, bottom, merged = [], [], []
+    col = 1
+    for name, group in itertools.groupby(columns, key=lambda c: c[0]):
+        subs = [sub for _, sub in group]
+        top += [name] + [None] * (len(subs) - 1)
+        bottom += subs
+        if subs == [None]:
+            merged.append(CellRange(min_col=col, max_col=col, min_row=top_row, max_row=bottom_row))
+        elif len(subs) > 1:
+            merged.append(CellRange(min_col=col, max_col=col + len(subs) - 1, min_row=top_row, max_row=top_row))
+        col += len(subs)
+    ws.append(top)
+    ws.append(bottom)
+    for cell_range in merged:
+        ws.merged_cells.add(cell_range)
+
+    for i in range(companies):
+        ws.append(company_values(rnd, i, extra_columns, max_items))
+
+    if fanout > 0:
+        tree = wb.create_sheet('层级')
+        tree.append(['公司简称', '上级公司'])
+        for i in range(companies):
+            tree.append([f'公司{i + 1:04d}', f'公司{(i - 1) // fanout + 1:04d}' if i else None])
+    wb.save(path)
+    return len(columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成 2026预算小结 版式的模拟工作簿')
+    parser.add_argument('output', help='输出的 xlsx 文件路径')
+    parser.add_argument('-n', '--companies', type=int, default=20, help='公司数量（默认 20）')
+    parser.add_argument('--extra-columns', type=int, default=0, help='追加的数值列数量（默认 0）')
+    parser.add_argument('--remark-items', type=int, default=3, help='每条备注最多的编号条目数（默认 3）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子（默认 0）')
+    parser.add_argument('--fanout', type=int, default=0, help='写入层级工作表，每个公司的下级数量（默认 0，不写入）')
+    args = parser.parse_args(argv)
+
+    width = write_sample_workbook(
+        args.output, companies=args.companies, extra_columns=args.extra_columns,
+        seed=args.seed, max_items=args.remark_items, fanout=args.fanout,
+    )
+    print(f"已生成 {args.output}：{args.companies} 个公司，{width} 列")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+情景模拟：对规整后的数据帧整列施加参数化调整，得到与原表列名一致的情景数据帧，
+看板的指标、图表和集团合并可以直接基于情景数据帧计算
+
+    scenario = {'revenue_pct': -10, 'admin_pct': 5}   # 收入 -10%，管理费用 +5%
+    adjusted = apply_scenario(数据帧, scenario)
+
+口径：毛利按 收入 × 毛利率 计算，毛利和期间费用的变动全额计入净利润（税前口径，未考虑所得税），
+并同额计入经营活动现金流量净额和资金投入（缺口）
+"""
+import numpy as np
+import pandas as pd
+
+from budget_core import QUARTERS, EXPENSE_ITEMS, unique_columns, company_rows
+
+# 情景参数：{参数: (名称, 单位, 最小值, 最大值, 步长)}
+SCENARIO_PARAMETERS = {
+    'revenue_pct': ('营业收入', '%', -50.0, 50.0, 1.0),
+    'margin_pts': ('毛利率', '个百分点', -20.0, 20.0, 0.5),
+    'sales_pct': ('销售费用', '%', -50.0, 50.0, 1.0),
+    'admin_pct': ('管理费用', '%', -50.0, 50.0, 1.0),
+    'rd_pct': ('研发费用', '%', -50.0, 50.0, 1.0),
+}
+
+# 期间费用的调整参数，顺序与 EXPENSE_ITEMS 一致
+EXPENSE_PARAMETERS = ('sales_pct', 'admin_pct', 'rd_pct')
+
+# 随收入同比例调整的列
+REVENUE_COLUMNS = ('2026年营业收入', *[f'{q}26' for q in QUARTERS], '集团内', '集团外')
+
+# 全部公司情景结果表中对比的金额列
+RESULT_COLUMNS = ('2026年营业收入', '2026净利润', '经营活动产生的现金流量净额', '资金投入（缺口）')
+
+
+def scenario_key(scenario):
+    """
+    情景的规范化键：去掉为 0 的参数后按参数名排序，参数相同的情景共用缓存
+    """
+    return tuple(sorted((name, float(value)) for name, value in scenario.items() if value))
+
+
+def scenario_label(scenario):
+    """
+    情景的文字说明，例如 "营业收入 -10%，管理费用 +5%"
+    """
+    parts = []
+    for name, (label, unit, *_) in SCENARIO_PARAMETERS.items():
+        value = scenario.get(name)
+        if value:
+            parts.append(f"{label} {value:+g}{unit}")
+    return "，".join(parts) if parts else "基准"
+
+
+def apply_scenario(df, scenario):
+    """
+    返回施加情景调整后的数据帧（不修改原数据帧）；全部公司一次整列计算
+    未调整任何参数时直接返回原数据帧
+    """
+    params = dict(scenario_key(scenario))
+    if not params:
+        return df
+    out = unique_columns(df).copy(deep=False)
+
+    def column(name):
+        return out[name].to_numpy(np.float64)
+
+    revenue = column('2026年营业收入')
+    margin = column('2026毛利率')
+    revenue_factor = 1 + params.get('revenue_pct', 0.0) / 100
+    new_revenue = revenue * revenue_factor
+    new_margin = margin + params.get('margin_pts', 0.0)
+
+    # 毛利变动：毛利率缺失的公司无法计算毛利，视为不变
+    gross_change = np.nan_to_num(new_revenue * new_margin / 100 - revenue * margin / 100)
+    expense_change = np.zeros(len(out))
+
+    for column_name in REVENUE_COLUMNS:
+        out[column_name] = column(column_name) * revenue_factor
+    out['2026毛利率'] = new_margin.astype(out['2026毛利率'].dtype)
+
+    for (_, amount_col, rate_col, _), param in zip(EXPENSE_ITEMS, EXPENSE_PARAMETERS):
+        expense_factor = 1 + params.get(param, 0.0) / 100
+        amount = column(amount_col)
+        new_amount = amount * expense_factor
+        expense_change += new_amount - amount
+        out[amount_col] = new_amount
+        # 费用率按费用和收入的调整比例缩放表中填报的费用率；两者都未调整时保留原值
+        rate_factor = expense_factor / revenue_factor
+        if rate_factor != 1:
+            out[rate_col] = (column(rate_col) * rate_factor).astype(out[rate_col].dtype)
+
+    profit_change = gross_change - expense_change
+    out['2026净利润'] = column('2026净利润') + profit_change
+    out['经营活动产生的现金流量净额'] = column('经营活动产生的现金流量净额') + profit_change
+    out['资金投入（缺口）'] = column('资金投入（缺口）') + profit_change
+    return out
+
+
+def scenario_table(df, adjusted, key_column='公司简称'):
+    """
+    全部公司的情景结果：每个公司一行，RESULT_COLUMNS 各列的基准值、情景值和变动额（万元）
+    adjusted 为同一数据帧 apply_scenario() 的结果；重复的公司简称取第一次出现的行，与 CompanyIndex 一致
+    """
+    base = company_rows(df, key_column)
+    after = company_rows(adjusted, key_column)
+    out = {key_column: base[key_column].astype(object).astype(str).to_numpy()}
+    for name in RESULT_COLUMNS:
+        before_values = base[name].to_numpy(np.float64)
+        after_values = after[name].to_numpy(np.float64)
+        out[f'{name}（基准）'] = before_values
+        out[f'{name}（情景）'] = after_values
+        out[f'{name}（变动）'] = after_values - before_values
+    return pd.DataFrame(out)
@@ -0,0 +1,161 @@
+"""
+备注、小结等文本字段的全文搜索：按汉字 n-gram 建倒排索引，不依赖分词库
+每个工作簿只建一次索引，之后每次查询只需合并几个倒排表并在候选文本中确认：
+
+    index = SearchIndex(数据帧, ColumnSchema(数据帧.columns))
+    index.search('应收账款')   # [{'company': ..., 'field': ..., 'text': ..., 'spans': [(起, 止)]}]
+"""
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from budget_core import unique_columns
+
+# 参与搜索的文本字段（ColumnSchema 的逻辑字段）及结果中显示的名称
+SEARCH_FIELDS = {
+    'revenue_remark': '收入变动原因',
+    'margin_remark': '毛利率变动原因',
+    'sales_remark': '销售费用变动原因',
+    'admin_remark': '管理费用变动原因',
+    'rd_remark': '研发费用变动原因',
+    'funding_remark': '资金缺口说明',
+    'summary': '小结',
+    'attention': '提请管理层关注',
+}
+
+# 索引单位：相邻两个字符；中文词多为两字及以上，二元组在索引大小和候选精度之间较均衡
+NGRAM = 2
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+class _FoldTable(dict):
+    """
+    str.translate 使用的逐字符归一表：全角转半角、英文转小写，按需计算并缓存
+    归一后长度不变的字符才替换，保证命中位置可以直接对应到原文
+    """
+
+    def __missing__(self, code):
+        folded = unicodedata.normalize('NFKC', chr(code)).lower()
+        self[code] = value = folded if len(folded) == 1 else code
+        return value
+
+
+_FOLD = _FoldTable()
+
+
+def fold_text(text):
+    return str(text).translate(_FOLD)
+
+
+def ngrams(text, n=NGRAM):
+    """
+    文本中出现的全部 n-gram；短于 n 的文本整体作为一个单位
+    """
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def find_all(text, term):
+    """
+    term 在 text 中全部出现位置的 [(起, 止)]
+    """
+    spans = []
+    start = text.find(term)
+    while start >= 0:
+        spans.append((start, start + len(term)))
+        start = text.find(term, start + len(term))
+    return spans
+
+
+class SearchIndex:
+    """
+    一个工作簿文本字段的倒排索引：每个（公司, 字段）的非空文本为一篇文档，
+    文档编号按公司在表中的顺序排列，postings 为 n-gram → 有序的文档编号数组
+    """
+
+    def __init__(self, df, schema, fields=SEARCH_FIELDS, key_column='公司简称', n=NGRAM):
+        self.n = n
+        # 重复的公司简称都参与索引
+        frame = unique_columns(df)
+        columns = [(label, schema[field]) for field, label in fields.items() if schema[field] in frame.columns]
+        names = frame[key_column].to_numpy(object)
+        values = frame[[column for _, column in columns]].to_numpy(object)
+
+        self.companies, self.fields, self.texts = [], [], []
+        for name, row in zip(names, values):
+            if pd.isna(name):
+                continue
+            for (label, _), value in zip(columns, row):
+                if pd.isna(value) or value == 0:
+                    continue
+                text = str(value).strip()
+                if text:
+                    self.companies.append(name)
+                    self.fields.append(label)
+                    self.texts.append(text)
+        self._folded = [fold_text(t) for t in self.texts]
+
+        postings = defaultdict(list)
+        for doc, text in enumerate(self._folded):
+            for gram in ngrams(text, n):
+                postings[gram].append(doc)
+        self.postings = {gram: np.array(docs, dtype=np.int32) for gram, docs in postings.items()}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _candidates(self, term):
+        """
+        可能包含 term 的文档编号：term 的全部 n-gram 倒排表的交集，从最短的表开始合并
+        短于 n 的词合并所有包含它的 n-gram 的倒排表
+        """
+        if len(term) < self.n:
+            lists = [docs for gram, docs in self.postings.items() if term in gram]
+            return np.unique(np.concatenate(lists)) if lists else _EMPTY
+        grams = sorted(ngrams(term, self.n), key=lambda g: len(self.postings.get(g, _EMPTY)))
+        docs = self.postings.get(grams[0], _EMPTY)
+        for gram in grams[1:]:
+            if len(docs) == 0:
+                break
+            docs = np.intersect1d(docs, self.postings[gram], assume_unique=True)
+        return docs
+
+    def search(self, query, limit=None):
+        """
+        查询以空格分隔的一个或多个词，返回同时包含全部词的文档：
+        [{'company': 公司简称, 'field': 字段名称, 'text': 原文, 'spans': [(起, 止)]}]，按公司顺序排列
+        n-gram 交集只是候选，逐篇确认连续出现后才算命中；limit 指定时最多返回 limit 条
+        """
+        terms = [fold_text(t) for t in str(query).split()]
+        if not terms:
+            return []
+        docs = None
+        for term in sorted(terms, key=len, reverse=True):
+            candidates = self._candidates(term)
+            docs = candidates if docs is None else np.intersect1d(docs, candidates, assume_unique=True)
+            if len(docs) == 0:
+                return []
+
+        hits = []
+        for doc in docs:
+            text = self._folded[doc]
+            spans = []
+            for term in terms:
+                found = find_all(text, term)
+                if not found:
+                    break
+                spans += found
+            else:
+                hits.append({
+                    'company': self.companies[doc],
+                    'field': self.fields[doc],
+                    'text': self.texts[doc],
+                    'spans': sorted(spans),
+                })
+                if limit is not None and len(hits) >= limit:
+                    break
+        return hits
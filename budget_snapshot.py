@@ -0,0 +1,156 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# 快照格式版本；规整逻辑变化导致旧快照不再适用时递增
+SNAPSHOT_VERSION = 4
+
+
+class SnapshotStore:
+    """
+    已解析工作簿的本地列式快照目录（Arrow IPC 格式，不压缩以便内存映射读取）
+    每个快照由 <key>.arrow 数据文件和 <key>.json 元数据组成，按最近使用时间保留
+    """
+
+    def __init__(self, root, keep=20):
+        self.root = root
+        self.keep = keep
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """
+        从环境变量读取快照目录和保留数量：BUDGET_SNAPSHOT_DIR、BUDGET_SNAPSHOT_KEEP
+        """
+        root = os.environ.get(
+            'BUDGET_SNAPSHOT_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'budget_app', 'snapshots')
+        )
+        keep = int(os.environ.get('BUDGET_SNAPSHOT_KEEP', 20))
+        return cls(root, keep=keep)
+
+    def _paths(self, key):
+        # 缓存键中的冒号在 Windows 文件名中不合法
+        name = key.replace(':', '_')
+        return os.path.join(self.root, f'{name}.arrow'), os.path.join(self.root, f'{name}.json')
+
+    def save(self, key, frame, **meta):
+        """
+        写入快照；先写临时文件再替换，避免读到写了一半的快照
+        """
+        data_path, meta_path = self._paths(key)
+        columns = [str(c) for c in frame.columns]
+        arrow_frame, encoded = _to_arrow_frame(frame)
+        table = pa.Table.from_pandas(arrow_frame, preserve_index=False)
+
+        tmp_path = data_path + '.tmp'
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, data_path)
+
+        meta = {
+            **meta,
+            'key': key,
+            'version': SNAPSHOT_VERSION,
+            'columns': columns,
+            'encoded_columns': encoded,
+            'rows': len(frame),
+            'saved_at': time.time(),
+        }
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_path + '.tmp', meta_path)
+        self._prune()
+        return meta
+
+    def load(self, key):
+        """
+        以内存映射方式读取快照，返回 (数据帧, 元数据)；不存在或版本不符时返回 None
+        """
+        data_path, meta_path = self._paths(key)
+        meta = self._read_meta(meta_path)
+        if meta is None or meta.get('version') != SNAPSHOT_VERSION or not os.path.exists(data_path):
+            return None
+
+        table = feather.read_table(data_path, memory_map=True)
+        frame = table.to_pandas(split_blocks=True)
+        frame.columns = meta['columns']
+        for i in meta.get('encoded_columns', ()):
+            values = [_decode_cell(v) for v in table.column(i).to_pylist()]
+            frame.isetitem(i, pd.Series(values, index=frame.index, dtype=object))
+
+        # 更新访问时间，保留策略按最近使用排序
+        now = time.time()
+        os.utime(meta_path, (now, now))
+        return frame, meta
+
+    def recent(self):
+        """
+        按最近使用时间倒序列出所有可用快照的元数据
+        """
+        snapshots = []
+        for name in os.listdir(self.root):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.root, name)
+            meta = self._read_meta(path)
+            if meta is None or meta.get('version') != SNAPSHOT_VERSION:
+                continue
+            meta['used_at'] = os.path.getmtime(path)
+            snapshots.append(meta)
+        snapshots.sort(key=lambda m: m['used_at'], reverse=True)
+        return snapshots
+
+    def _prune(self):
+        for meta in self.recent()[self.keep:]:
+            for path in self._paths(meta['key']):
+                try:
+                    os.remove(path)
+                except OSError:
+                    # 快照可能仍被内存映射占用（Windows），下次再清理
+                    pass
+
+    @staticmethod
+    def _read_meta(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+def _encode_cell(value):
+    # 数字、布尔值和文本按 JSON 编码，读取时还原为原类型；其他对象（如日期）只能保存为文本
+    if value is None:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (str, bool, int, float)):
+        return json.dumps(value, ensure_ascii=False)
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+def _decode_cell(value):
+    return None if value is None else json.loads(value)
+
+
+def _to_arrow_frame(frame):
+    """
+    转换为 Arrow 可写的形式，返回 (数据帧, 编码列位置)：列名按位置去重，原始列名保存在元数据中，读取时还原；
+    混合类型的文本列（例如备注列中填了数字 0）逐个单元格按 JSON 编码为字符串，
+    读取时按编码列位置解码，还原后的数据帧与重新解析的结果一致，行指纹不变
+    """
+    out = frame.reset_index(drop=True)
+    out.columns = [f'{i}:{c}' for i, c in enumerate(frame.columns)]
+    encoded = []
+    for i in range(out.shape[1]):
+        values = out.iloc[:, i]
+        if values.dtype != object:
+            continue
+        if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty', 'floating', 'integer', 'boolean'):
+            out.isetitem(i, values.map(_encode_cell))
+            encoded.append(i)
+    return out, encoded
@@ -0,0 +1,117 @@
+import contextlib
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# 当前线程正在记录的 TimingLog。Streamlit 每次重跑脚本都会新建一个 ScriptRunner 线程，
+# 线程与会话之间没有固定对应关系，因此每次运行开始时都由 start_run() 重新绑定，
+# 未调用 start_run() 的线程（例如 fragment 单独重跑）中 timed() 为空操作
+_local = threading.local()
+
+PERCENTILES = (50, 90, 99)
+
+
+class TimingLog:
+    """
+    最近若干次运行的分阶段耗时，按运行先后保存在定长队列中
+    每次运行记为 {'started_at': 时间戳, 'label': 说明, 'stages': {阶段: 秒}}；
+    阶段名中的 "/" 表示子阶段，例如 load/read 是 load 的一部分
+    """
+
+    def __init__(self, max_runs=200):
+        self.runs = deque(maxlen=max_runs)
+        self._current = None
+        self._started = None
+
+    def start_run(self, label='rerun'):
+        """
+        开始一次运行，并把本记录设为当前线程的记录对象，供 timed() 使用
+        """
+        self._current = {'started_at': time.time(), 'label': label, 'stages': {}}
+        self._started = time.perf_counter()
+        _local.log = self
+
+    def finish_run(self):
+        """
+        结束当前运行，记录总耗时（total）并放入队列
+        """
+        run, self._current = self._current, None
+        if getattr(_local, 'log', None) is self:
+            _local.log = None
+        if run is None:
+            return None
+        run['stages']['total'] = time.perf_counter() - self._started
+        self.runs.append(run)
+        return run
+
+    def record(self, stage, seconds):
+        """
+        累加一个阶段的耗时；不在运行中时（例如 fragment 单独重跑）记为一次局部运行
+        """
+        if self._current is None:
+            self.runs.append({'started_at': time.time(), 'label': 'partial', 'stages': {stage: seconds}})
+            return
+        stages = self._current['stages']
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def frame(self):
+        """
+        原始耗时明细：每次运行的每个阶段一行（run、started_at、label、stage、ms）
+        """
+        rows = [
+            (i, run['started_at'], run['label'], stage, seconds * 1000)
+            for i, run in enumerate(self.runs)
+            for stage, seconds in run['stages'].items()
+        ]
+        return pd.DataFrame(rows, columns=['run', 'started_at', 'label', 'stage', 'ms'])
+
+    def summary(self):
+        """
+        各阶段的次数、平均值和分位数（毫秒），按平均耗时从高到低排列
+        """
+        df = self.frame()
+        if df.empty:
+            return pd.DataFrame(columns=['count', 'mean', *[f'p{p}' for p in PERCENTILES], 'max'])
+        grouped = df.groupby('stage')['ms']
+        out = pd.DataFrame({'count': grouped.size(), 'mean': grouped.mean()})
+        for p in PERCENTILES:
+            out[f'p{p}'] = grouped.quantile(p / 100)
+        out['max'] = grouped.max()
+        return out.sort_values('mean', ascending=False)
+
+    def histogram(self, stage='total', bins=10):
+        """
+        某个阶段耗时的分布：{区间下限(毫秒): 次数}
+        """
+        df = self.frame()
+        values = df.loc[df['stage'] == stage, 'ms'].to_numpy()
+        if len(values) == 0:
+            return pd.Series(dtype='int64')
+        counts, edges = np.histogram(values, bins=min(bins, max(1, len(values))))
+        return pd.Series(counts, index=[f'{e:,.0f}' for e in edges[:-1]], name='次数')
+
+    def to_csv(self):
+        return self.frame().to_csv(index=False)
+
+    def to_json(self):
+        return json.dumps(list(self.runs), ensure_ascii=False)
+
+
+def timed(name):
+    """
+    在当前线程正在记录的运行中为一段代码计时；未开启诊断时为空操作
+    """
+    log = getattr(_local, 'log', None)
+    return log.stage(name) if log is not None else contextlib.nullcontext()
@@ -0,0 +1,45 @@
+"""
+工作簿缓存：随参数变化的派生结果只保留最近一组，派生结果计入工作簿的内存占用
+"""
+import numpy as np
+import pandas as pd
+
+from budget_cache import CachedWorkbook, WorkbookCache
+
+
+def _workbook(key='a', rows=100):
+    return CachedWorkbook(key, pd.DataFrame({'公司简称': [f'公司{i}' for i in range(rows)], 'x': np.arange(rows)}))
+
+
+def test_derived_latest_keeps_only_current_params():
+    workbook = _workbook()
+    calls = []
+
+    def build(params):
+        return lambda df: calls.append(params) or pd.DataFrame({'v': np.zeros(1000)})
+
+    for params in [1, 2, 3, 1, 2, 3]:
+        workbook.derived_latest('diff', params, build(params))
+    workbook.derived_latest('diff', 3, build(3))
+    assert calls == [1, 2, 3, 1, 2, 3]
+    assert len(workbook._derived) == 1
+
+
+def test_nbytes_counts_derived_results():
+    workbook = _workbook()
+    base = workbook.nbytes
+    workbook.derived_latest('diff', 1, lambda df: pd.DataFrame({'v': np.zeros(1000)}))
+    assert workbook.nbytes >= base + 8000
+    # 引用工作簿数据帧本身的派生结果不重复计入数据帧的大小
+    before = workbook.nbytes
+    workbook.derived('frame_ref', lambda df: {'frame': df})
+    assert workbook.nbytes - before < base
+
+
+def test_cache_budget_includes_derived_results():
+    cache = WorkbookCache(max_entries=8, max_bytes=200_000)
+    first = cache.get_or_load('a', lambda: _workbook('a'))
+    first.derived('big', lambda df: pd.DataFrame({'v': np.zeros(30_000)}))
+    cache.get_or_load('b', lambda: _workbook('b'))
+    assert cache.total_bytes() <= 200_000
+    assert cache.evictions == 1
@@ -0,0 +1,41 @@
+"""
+勾稽检查：规整时补 0 的明细不应被当作填报值参与检查
+"""
+import numpy as np
+import pandas as pd
+
+from budget_core import normalize_frame, QUARTERS
+from budget_checks import check_consistency
+
+REVENUE_RULE = '2026年营业收入 = 四个季度之和'
+
+
+def _frame(**columns):
+    base = {'公司简称': ['甲', '乙'], '2026年营业收入': [1000.0, 800.0]}
+    base.update(columns)
+    return normalize_frame(pd.DataFrame(base))
+
+
+def _flagged(df, rule=REVENUE_RULE):
+    exceptions = check_consistency(df)
+    return exceptions.loc[exceptions['检查项'] == rule, '公司简称'].tolist()
+
+
+def test_missing_quarter_columns_are_not_checked():
+    assert _flagged(_frame()) == []
+
+
+def test_blank_quarters_are_not_checked():
+    blanks = {f'{q}26': [np.nan, None] for q in QUARTERS}
+    assert _flagged(_frame(**blanks)) == []
+
+
+def test_partly_filled_quarters_are_checked():
+    quarters = {f'{q}26': [250.0, np.nan] for q in QUARTERS}
+    quarters['1Q26'] = [100.0, 800.0]
+    assert _flagged(_frame(**quarters)) == ['甲']
+
+
+def test_quarters_filled_with_zero_are_checked():
+    zeros = {f'{q}26': [0.0, 0.0] for q in QUARTERS}
+    assert sorted(_flagged(_frame(**zeros))) == ['乙', '甲']
@@ -0,0 +1,75 @@
+"""
+budget_core：流式读取的两条路径结果一致；规整时记录补 0 之前为空的明细单元格
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import budget_core
+from budget_core import read_workbook_streaming, normalize_frame, blank_cells
+from budget_core import BLANK_DETAIL_COLUMN, ZERO_FILL_COLUMNS
+from budget_sample import write_sample_workbook
+
+
+@pytest.fixture(scope='module')
+def workbook(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('wb') / 'sample.xlsx')
+    write_sample_workbook(path, companies=12, extra_columns=5)
+    return path
+
+
+def _read_with_iter_rows(monkeypatch, path, columns):
+    with monkeypatch.context() as m:
+        m.setattr(budget_core, '_projected_parser_class', lambda: None)
+        return read_workbook_streaming(path, columns=columns)
+
+
+@pytest.mark.parametrize('columns', [budget_core.VIEW_COLUMNS, None])
+def test_projected_rows_match_iter_rows(monkeypatch, workbook, columns):
+    assert budget_core._projected_parser_class() is not None
+    projected = read_workbook_streaming(workbook, columns=columns)
+    pd.testing.assert_frame_equal(projected, _read_with_iter_rows(monkeypatch, workbook, columns))
+
+
+def test_incompatible_parser_falls_back_to_iter_rows(monkeypatch, workbook):
+    class ChangedParser:
+        def __init__(self, src):
+            pass
+
+    expected = _read_with_iter_rows(monkeypatch, workbook, budget_core.VIEW_COLUMNS)
+    monkeypatch.setattr(budget_core, '_projected_parser_class', lambda: ChangedParser)
+    pd.testing.assert_frame_equal(read_workbook_streaming(workbook), expected)
+
+
+def _blank_bits(df, column):
+    return ((df[BLANK_DETAIL_COLUMN].to_numpy() >> ZERO_FILL_COLUMNS.index(column)) & 1).tolist()
+
+
+def test_blank_mask_marks_missing_column_for_every_row():
+    df = normalize_frame(pd.DataFrame({'公司简称': ['甲', '乙', '丙']}))
+    assert df['1Q26'].tolist() == [0.0, 0.0, 0.0]
+    assert _blank_bits(df, '1Q26') == [1, 1, 1]
+    assert blank_cells(df, ZERO_FILL_COLUMNS).all()
+
+
+def test_blank_mask_marks_only_blank_cells_of_present_column():
+    df = normalize_frame(pd.DataFrame({
+        '公司简称': ['甲', '乙', '丙', '丁'],
+        '1Q26': [120.0, np.nan, 0.0, ' '],
+    }))
+    assert df['1Q26'].tolist() == [120.0, 0.0, 0.0, 0.0]
+    # 填报的 0 不是空白；空字符串等无法转为数值的内容按空白处理
+    assert _blank_bits(df, '1Q26') == [0, 1, 0, 1]
+    assert blank_cells(df, ['1Q26'])[:, 0].tolist() == [False, True, False, True]
+    assert _blank_bits(df, '2Q26') == [1, 1, 1, 1]
+
+
+def test_blank_mask_uses_first_of_duplicate_columns():
+    raw = pd.DataFrame([['甲', np.nan, 50.0], ['乙', 30.0, np.nan]], columns=['公司简称', '房租物业费', '房租物业费'])
+    df = normalize_frame(raw)
+    assert _blank_bits(df, '房租物业费') == [1, 0]
+
+
+def test_blank_cells_uses_current_values_for_other_columns():
+    df = normalize_frame(pd.DataFrame({'公司简称': ['甲', '乙'], '2026年营业收入': [100.0, np.nan]}))
+    assert blank_cells(df, ['2026年营业收入'])[:, 0].tolist() == [False, True]
@@ -0,0 +1,34 @@
+"""
+静态站点导出：重新导出只删除以前导出、本次已没有的公司页面
+"""
+import os
+
+from budget_export import export_workbook, read_manifest
+from budget_sample import write_sample_workbook
+
+
+def _export(tmp_path, companies, out_dir):
+    source = str(tmp_path / f'{companies}.xlsx')
+    write_sample_workbook(source, companies=companies)
+    pages, _ = export_workbook(source, str(out_dir), workers=1, include_group=False)
+    return pages
+
+
+def test_reexport_removes_pages_of_dropped_companies(tmp_path):
+    out_dir = tmp_path / 'site'
+    before = _export(tmp_path, 3, out_dir)
+    after = _export(tmp_path, 2, out_dir)
+    dropped = set(before) - set(after)
+    assert len(dropped) == 1
+    assert not any(os.path.exists(path) for _, path in dropped)
+    assert all(os.path.exists(path) for _, path in after)
+    assert len(read_manifest(str(out_dir))) == 2
+
+
+def test_reexport_keeps_unrelated_html_files(tmp_path):
+    out_dir = tmp_path / 'site'
+    out_dir.mkdir()
+    (out_dir / 'notes.html').write_text('<p>手写说明</p>', encoding='utf-8')
+    _export(tmp_path, 3, out_dir)
+    _export(tmp_path, 2, out_dir)
+    assert (out_dir / 'notes.html').read_text(encoding='utf-8') == '<p>手写说明</p>'
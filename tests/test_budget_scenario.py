@@ -0,0 +1,48 @@
+"""
+情景模拟：全部公司结果表与逐公司、集团合并的情景计算一致
+"""
+import numpy as np
+import pytest
+
+from budget_core import load_budget_frame, build_group_rollup
+from budget_sample import write_sample_workbook
+from budget_scenario import apply_scenario, scenario_table, RESULT_COLUMNS
+
+SCENARIO = {'revenue_pct': -10, 'margin_pts': 1.5, 'admin_pct': 5}
+
+
+@pytest.fixture(scope='module')
+def frame(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('wb') / 'sample.xlsx')
+    write_sample_workbook(path, companies=8)
+    df, _, _ = load_budget_frame(path, 'stream')
+    return df
+
+
+def test_table_has_one_row_per_company(frame):
+    table = scenario_table(frame, apply_scenario(frame, SCENARIO))
+    assert table['公司简称'].tolist() == frame['公司简称'].astype(str).tolist()
+    for name in RESULT_COLUMNS:
+        assert f'{name}（变动）' in table.columns
+
+
+def test_table_matches_adjusted_frame(frame):
+    adjusted = apply_scenario(frame, SCENARIO)
+    table = scenario_table(frame, adjusted)
+    np.testing.assert_allclose(table['2026净利润（情景）'], adjusted['2026净利润'].to_numpy(np.float64))
+    np.testing.assert_allclose(
+        table['2026净利润（变动）'], table['2026净利润（情景）'] - table['2026净利润（基准）']
+    )
+
+
+def test_changes_add_up_to_group_rollup(frame):
+    adjusted = apply_scenario(frame, SCENARIO)
+    table = scenario_table(frame, adjusted)
+    delta = build_group_rollup(adjusted)['2026净利润'] - build_group_rollup(frame)['2026净利润']
+    assert table['2026净利润（变动）'].sum() == pytest.approx(delta, rel=1e-6)
+
+
+def test_base_scenario_has_no_changes(frame):
+    table = scenario_table(frame, apply_scenario(frame, {}))
+    changes = table[[f'{name}（变动）' for name in RESULT_COLUMNS]].to_numpy()
+    assert not np.nansum(np.abs(changes))
@@ -0,0 +1,42 @@
+"""
+快照读写：混合类型的文本列还原后应与重新解析的结果一致
+"""
+import numpy as np
+import pandas as pd
+
+from budget_core import normalize_frame, compact_frame, row_fingerprints
+from budget_report import format_text_list
+from budget_snapshot import SnapshotStore
+
+
+def _frame():
+    return compact_frame(normalize_frame(pd.DataFrame({
+        '公司简称': ['甲', '乙', '丙'],
+        '备注2': [0, '1、价格下调', np.nan],
+        '备注3': [None, 1.5, '无变化'],
+    })))
+
+
+def _round_trip(tmp_path, frame):
+    store = SnapshotStore(str(tmp_path))
+    store.save('key', frame)
+    restored, _ = store.load('key')
+    return restored
+
+
+def test_mixed_text_columns_keep_original_values(tmp_path):
+    frame = _frame()
+    restored = _round_trip(tmp_path, frame)
+    assert restored['备注2'].tolist()[:2] == [0, '1、价格下调']
+    assert pd.isna(restored['备注2'].iloc[2])
+    assert restored['备注3'].tolist() == [None, 1.5, '无变化']
+
+
+def test_restored_frame_has_same_fingerprints(tmp_path):
+    frame = _frame()
+    assert row_fingerprints(_round_trip(tmp_path, frame)) == row_fingerprints(frame)
+
+
+def test_numeric_zero_remark_still_renders_as_none(tmp_path):
+    restored = _round_trip(tmp_path, _frame())
+    assert format_text_list(restored['备注2'].iloc[0]) == '无'